@@ -0,0 +1,66 @@
+"""Replay a capture file into a PurpleDropController as fast as possible
+
+Measures how quickly the full receive path -- framing, decoding, listener
+dispatch, and the controller's message handling -- can process recorded
+device traffic. Capture files are recorded with `pdserver --capture`. If no
+file is given, one is recorded from the emulator.
+
+Example:
+
+    python benchmarks/capture_replay.py --capture session.pdcap
+"""
+from gevent import monkey
+monkey.patch_all()
+
+import click
+import os
+import tempfile
+import time
+
+from purpledrop.capture import CapturePurpleDropDevice, RX, read_capture
+from purpledrop.controller import PurpleDropController
+from purpledrop.electrode_board import load_board
+
+def record_emulator(path, seconds):
+    from purpledrop.emulator import PurpleDropEmulator
+    from purpledrop.purpledrop import SerialPurpleDropDevice
+    emulator = PurpleDropEmulator()
+    emulator.set_electrode_capacitance(range(128), 50)
+    emulator.start()
+    dev = SerialPurpleDropDevice(emulator.port, capture_path=path)
+    time.sleep(seconds)
+    dev.stop_capture()
+    dev.close()
+    emulator.close()
+
+@click.command()
+@click.option('--capture', 'capture_file', help='Capture file to replay', required=False)
+@click.option('--seconds', default=3.0, help='Duration to record from the emulator if no file is given')
+@click.option('--board', default='misl_v4', help='Board definition for the controller')
+def main(capture_file, seconds, board):
+    tmpdir = None
+    if capture_file is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        capture_file = os.path.join(tmpdir.name, 'emulator.pdcap')
+        print(f"Recording {seconds}s from emulator")
+        record_emulator(capture_file, seconds)
+
+    n_bytes = sum(len(r.data) for r in read_capture(capture_file) if r.direction == RX)
+    dev = CapturePurpleDropDevice(capture_file)
+    events = [0]
+    controller = PurpleDropController(dev, load_board(board))
+    def on_event(_event):
+        events[0] += 1
+    controller.register_event_listener(on_event)
+
+    start = time.perf_counter()
+    count = dev.replay()
+    controller.flush_events()
+    elapsed = time.perf_counter() - start
+    print(f"{count} messages ({n_bytes} bytes) in {elapsed*1e3:.1f} ms: "
+          f"{count/elapsed:.0f} msg/s, {n_bytes/elapsed/1e6:.2f} MB/s, {events[0]} events")
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+if __name__ == '__main__':
+    main()
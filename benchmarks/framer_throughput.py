@@ -0,0 +1,92 @@
+"""Measure MessageFramer throughput
+
+Compares feeding a byte stream through `MessageFramer.parse_byte` one byte at
+a time against passing whole receive buffers to `MessageFramer.parse`.
+
+By default, a synthetic stream approximating device traffic is used: 500Hz
+active capacitance, group capacitance, and a 128 channel scan every 100ms
+split into chunks. A file containing a raw recorded byte stream, or a capture
+file recorded with `pdserver --capture`, may be provided instead.
+
+Example:
+
+    python benchmarks/framer_throughput.py --seconds 10 --chunk-size 4096
+"""
+import click
+import struct
+import time
+
+from purpledrop.capture import RX, read_capture
+from purpledrop.message_framer import MessageFramer, serialize
+from purpledrop.messages import PurpleDropMessage
+
+def synthetic_stream(seconds: float) -> bytes:
+    frames = []
+    n_samples = int(seconds * 500)
+    for i in range(n_samples):
+        # Active capacitance, with measurements which require escaping
+        frames.append(serialize(struct.pack("<BHHB", 3, 100 + i % 7, 0x7d00 + i % 3, 0)))
+        # Group capacitance for 5 groups
+        frames.append(serialize(struct.pack("<BBBB5H", 2, 1, 0, 5, *[(i + g) % 4096 for g in range(5)])))
+        if i % 50 == 0:
+            # Full scan, in chunks of 16 channels
+            for start in range(0, 128, 16):
+                values = [(start + c) * 31 % 4096 for c in range(16)]
+                frames.append(serialize(struct.pack("<BBBB16H", 2, 0, start, 16, *values)))
+            frames.append(serialize(struct.pack("<Bfh", 8, 120.0, 1500)))
+    return b"".join(frames)
+
+def run_bytewise(stream: bytes, chunk_size: int) -> int:
+    framer = MessageFramer(PurpleDropMessage.predictSize)
+    count = 0
+    for i in range(0, len(stream), chunk_size):
+        for b in stream[i:i+chunk_size]:
+            if framer.parse_byte(b) is not None:
+                count += 1
+    return count
+
+def run_block(stream: bytes, chunk_size: int) -> int:
+    framer = MessageFramer(PurpleDropMessage.predictSize)
+    count = 0
+    for i in range(0, len(stream), chunk_size):
+        for _ in framer.parse(stream[i:i+chunk_size]):
+            count += 1
+    return count
+
+def measure(func, stream, chunk_size, repeat):
+    best = None
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = func(stream, chunk_size)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return count, best
+
+@click.command()
+@click.option('--file', 'stream_file', help='File containing raw bytes received from a device', required=False)
+@click.option('--capture', 'capture_file', help='Capture file; its received bytes are used', required=False)
+@click.option('--seconds', default=5.0, help='Duration of synthetic stream to generate')
+@click.option('--chunk-size', default=64, help='Size of each simulated serial read')
+@click.option('--repeat', default=3, help='Number of runs; the best is reported')
+def main(stream_file, capture_file, seconds, chunk_size, repeat):
+    if capture_file is not None:
+        stream = b"".join(r.data for r in read_capture(capture_file) if r.direction == RX)
+    elif stream_file is not None:
+        with open(stream_file, 'rb') as f:
+            stream = f.read()
+    else:
+        stream = synthetic_stream(seconds)
+
+    print(f"Stream: {len(stream)} bytes, read size {chunk_size}")
+    results = {}
+    for name, func in [('parse_byte', run_bytewise), ('parse', run_block)]:
+        count, elapsed = measure(func, stream, chunk_size, repeat)
+        results[name] = elapsed
+        mb_per_s = len(stream) / elapsed / 1e6
+        print(f"{name:>12}: {count} messages in {elapsed*1e3:.1f} ms ({mb_per_s:.2f} MB/s, {count/elapsed:.0f} msg/s)")
+    print(f"Speedup: {results['parse_byte'] / results['parse']:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Measure decode cost for each received message type
+
+Each frame is decoded repeatedly with `PurpleDropMessage.from_bytes`, which
+includes the ID lookup and message construction.
+
+Example:
+
+    python benchmarks/message_decode.py --number 200000
+"""
+import click
+import struct
+import timeit
+
+from purpledrop.messages import PurpleDropMessage
+
+def sample_frames():
+    strings = b"Example parameter\x00Parameter description\x00float"
+    return {
+        'ActiveCapacitanceMsg': struct.pack("<BHHB", 3, 100, 2000, 0),
+        'BulkCapacitanceMsg (5 groups)': struct.pack("<BBBB5H", 2, 1, 0, 5, 1, 2, 3, 4, 5),
+        'BulkCapacitanceMsg (16 channels)': struct.pack("<BBBB16H", 2, 0, 16, 16, *range(16)),
+        'CommandAckMsg': struct.pack("<BB", 4, 0),
+        'DataBlobMsg': struct.pack("<BBBH", 10, 0, 6, 0) + b"v0.6.1",
+        'DutyCycleUpdatedMsg': struct.pack("<BBB", 15, 128, 255),
+        'GpioControlMsg': struct.pack("<BBB", 14, 3, 1),
+        'HvRegulatorMsg': struct.pack("<Bfh", 8, 120.0, 1500),
+        'ParameterDescriptorMsg': struct.pack("<BHIfHH", 12, len(strings), 1, 1.0, 0, 20) + strings,
+        'SetParameterMsg': struct.pack("<BIiB", 6, 3, 100, 0),
+        'TemperatureMsg': struct.pack("<BB4h", 7, 4, 2500, 2510, 2490, 2600),
+    }
+
+@click.command()
+@click.option('--number', default=100000, help='Number of decodes per message type')
+@click.option('--repeat', default=3, help='Number of runs; the best is reported')
+def main(number, repeat):
+    from_bytes = PurpleDropMessage.from_bytes
+    for name, frame in sample_frames().items():
+        best = min(timeit.repeat(lambda: from_bytes(frame), number=number, repeat=repeat))
+        print(f"{name:>34}: {best / number * 1e9:7.0f} ns/msg")
+
+if __name__ == '__main__':
+    main()
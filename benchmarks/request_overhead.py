@@ -0,0 +1,53 @@
+"""Measure host side overhead of a request/response round trip
+
+A device which responds to every message immediately is used, so that the
+time measured is only the cost of matching the response to the request. A
+SyncListener created for each request, as RPC methods used to do, is compared
+against `PurpleDropDevice.request`.
+
+Example:
+
+    python benchmarks/request_overhead.py --number 20000
+"""
+import click
+import time
+
+import purpledrop.messages as messages
+from purpledrop.purpledrop import PurpleDropDevice
+
+class EchoDevice(PurpleDropDevice):
+    def send_message(self, msg):
+        ack = messages.CommandAckMsg()
+        ack.acked_id = msg.ID
+        self.on_message_received(ack)
+
+    def connected(self):
+        return True
+
+def run_sync_listener(dev, msg, number):
+    match = lambda m: m.acked_id == msg.ID
+    for _ in range(number):
+        with dev.get_sync_listener(messages.CommandAckMsg, predicate=match) as listener:
+            dev.send_message(msg)
+            assert listener.next(timeout=0.5) is not None
+
+def run_request(dev, msg, number):
+    for _ in range(number):
+        assert dev.request(msg, messages.CommandAckMsg, msg.ID) is not None
+
+@click.command()
+@click.option('--number', default=20000, help='Number of requests per method')
+@click.option('--listeners', default=3, help='Number of other listeners registered, as the controller has')
+def main(number, listeners):
+    dev = EchoDevice()
+    # Listeners unregister when deleted, so keep references
+    _others = [dev.get_async_listener(lambda _msg: None, messages.ActiveCapacitanceMsg) for _ in range(listeners)]
+    msg = messages.GpioControlMsg()
+    for name, func in [('SyncListener', run_sync_listener), ('request', run_request)]:
+        start = time.perf_counter()
+        func(dev, msg, number)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>12}: {elapsed / number * 1e6:.2f} us/request")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Measure gevent event loop lag while receiving serial data
+
+A pseudo-terminal stands in for the device: an OS thread writes a synthetic
+device byte stream into the master side at real-time rates, and the slave
+side is opened with pyserial. The stream is received either by the original
+receive loop (blocking 64 byte reads with a 10ms timeout, yielding between
+reads) or by PurpleDropRxThread, while a LoopLagMonitor measures how late
+other greenlets are scheduled.
+
+The script does not monkey patch, so blocking calls hold the hub just as
+they do for library users who have not patched.
+
+Linux/macOS only.
+
+Example:
+
+    python benchmarks/serial_loop_lag.py --seconds 5
+"""
+import click
+import gevent
+import os
+import serial
+import threading
+import time
+
+from framer_throughput import synthetic_stream
+from purpledrop.loop_monitor import LoopLagMonitor
+from purpledrop.message_framer import MessageFramer
+from purpledrop.messages import PurpleDropMessage
+from purpledrop.purpledrop import PurpleDropRxThread
+
+def feed_pty(master_fd, stream, seconds, stop_event):
+    """Write stream over the given duration in 2ms bursts"""
+    n_bursts = int(seconds / 2e-3)
+    burst_size = max(1, len(stream) // n_bursts)
+    start = time.monotonic()
+    for i in range(n_bursts):
+        if stop_event.is_set():
+            return
+        os.write(master_fd, stream[i * burst_size:(i + 1) * burst_size])
+        delay = start + (i + 1) * 2e-3 - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+def legacy_reader(ser, counter, stop_event):
+    framer = MessageFramer(PurpleDropMessage.predictSize)
+    while not stop_event.is_set():
+        rx_bytes = ser.read(64)
+        # Without monkey patching, the read never yields to the hub, so yield
+        # explicitly between reads to let other greenlets run at all
+        gevent.sleep(0)
+        for buf in framer.parse(rx_bytes):
+            PurpleDropMessage.from_bytes(buf)
+            counter[0] += 1
+
+def run(mode, seconds):
+    master_fd, slave_fd = os.openpty()
+    ser = serial.Serial(os.ttyname(slave_fd), timeout=0.01)
+    stream = synthetic_stream(seconds)
+    stop_event = threading.Event()
+    counter = [0]
+
+    monitor = LoopLagMonitor(interval=0.005)
+    monitor.start()
+
+    if mode == 'legacy':
+        reader = gevent.spawn(legacy_reader, ser, counter, stop_event)
+    else:
+        def callback(_msg):
+            counter[0] += 1
+        rx_thread = PurpleDropRxThread(ser, callback=callback)
+        rx_thread.start()
+
+    writer = threading.Thread(target=feed_pty, args=(master_fd, stream, seconds, stop_event), daemon=True)
+    writer.start()
+    gevent.sleep(seconds + 0.2)
+    stop_event.set()
+
+    if mode == 'legacy':
+        reader.join()
+    else:
+        rx_thread.stop()
+        rx_thread.join()
+    monitor.stop()
+    writer.join()
+    ser.close()
+    os.close(master_fd)
+    os.close(slave_fd)
+    return counter[0], monitor.stats()
+
+@click.command()
+@click.option('--seconds', default=3.0, help='Duration of each run')
+def main(seconds):
+    for mode in ['legacy', 'rx_thread']:
+        count, stats = run(mode, seconds)
+        print(f"{mode:>10}: {count} messages, loop lag mean {stats['mean_lag']*1e3:.2f} ms, "
+              f"max {stats['max_lag']*1e3:.2f} ms over {stats['count']} samples")
+
+if __name__ == '__main__':
+    main()
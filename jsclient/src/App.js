@@ -64,6 +64,16 @@ function setStateWrapper(component, minRenderPeriod_ms) {
   };
 }
 
+// Check whether an electrode is in an ElectrodeGroup event. Groups store a
+// packed mask, with electrode N in bit N % 8 of byte N / 8, or in older
+// versions an array of bools.
+function groupHasElectrode(group, i) {
+  if (group.mask && group.mask.length > 0) {
+    return (group.mask[i >> 3] & (1 << (i & 7))) !== 0;
+  }
+  return Boolean(group.electrodes && group.electrodes[i]);
+}
+
 // Register an App instance and feed it state updates
 function hookup_remote_state(app) {
   let imageObjectUrl = null;
@@ -75,8 +85,11 @@ function hookup_remote_state(app) {
     if (event.electrodeState) {
       // There are two groups of drive electrodes, A and B, used mostly for feedback controlled drop splitting. 
       // For display purposes here, they are just OR'd together so both groups are highlighted
-      let electrodeState = event.electrodeState.driveGroups[0].electrodes.map((elem, i) => {
-        return elem || event.electrodeState.driveGroups[1].electrodes[i];
+      let electrodeState = Array(128).fill(false);
+      event.electrodeState.driveGroups.forEach((group) => {
+        for (let i = 0; i < electrodeState.length; i++) {
+          electrodeState[i] = electrodeState[i] || groupHasElectrode(group, i);
+        }
       });
       stateWrapper.setState({
         electrodeState: electrodeState,
@@ -147,11 +160,8 @@ function hookup_remote_state(app) {
     });
     return resp;
   }).then(async (resp) => {
-    let paramValues = {};
-    for(let i=0; i<resp.parameters.length; i++) {
-      let paramId = resp.parameters[i].id;
-      paramValues[paramId] = await pdrpc.getParameter(paramId);
-    }
+    let paramIds = resp.parameters.map((p) => p.id);
+    let paramValues = await pdrpc.getParameters(paramIds);
     app.setState({
       parameters: paramValues,
     });
@@ -180,11 +190,8 @@ function hookup_remote_state(app) {
         });
         return resp;
       }).then(async (resp) => {
-        let paramValues = {};
-        for(let i=0; i<resp.parameters.length; i++) {
-          let paramId = resp.parameters[i].id;
-          paramValues[paramId] = await pdrpc.getParameter(paramId);
-        }
+        let paramIds = resp.parameters.map((p) => p.id);
+        let paramValues = await pdrpc.getParameters(paramIds, true);
         app.setState({
           parameters: paramValues,
           parameterDirtyMap: {},
@@ -37,6 +37,10 @@ export function PdRpc() {
     setParameter(paramIdx, value) {
         return rpc.call('set_parameter', [paramIdx, value]);
     },
+    getParameters(paramIds, refresh) {
+        // Returns an object mapping each parameter ID to its value
+        return rpc.call('get_parameters', [paramIds, refresh || false]);
+    },
     setElectrodePins(pins) {
         // Send a list of activated pin numbers, e.g. [4, 2, 100] will enable
         // electrode outputs 4, 2, and 100 while disabling all others.
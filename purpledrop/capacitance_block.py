@@ -0,0 +1,73 @@
+"""Accumulates capacitance samples into blocks
+
+At 500Hz, building and serializing an event for each capacitance sample is a
+large part of the cost of streaming them. A CapacitanceBlockBuffer collects
+consecutive samples into preallocated arrays, so that they can be sent as a
+single CapacitanceBlock event.
+"""
+import numpy as np
+from typing import NamedTuple, Optional, Sequence
+
+class CapacitanceBlock(NamedTuple):
+    # Receive time of the first sample
+    start_ns: int
+    # Mean time between samples, in seconds
+    sample_interval: float
+    # Arrays of shape (samples, channels)
+    calibrated: np.ndarray
+    raw: np.ndarray
+
+class CapacitanceBlockBuffer(object):
+    """Collects samples until the block is full, or its first sample is older
+    than max_age
+    """
+    def __init__(self, channels: int=1, max_samples: int=50, max_age: float=0.1):
+        self.max_samples = max_samples
+        self.max_age_ns = int(max_age * 1e9)
+        self.reset(channels)
+
+    def reset(self, channels: int):
+        """Discard any samples, and set the number of values per sample
+        """
+        self.channels = channels
+        self.calibrated = np.zeros((self.max_samples, channels), dtype=np.float32)
+        self.raw = np.zeros((self.max_samples, channels), dtype=np.float32)
+        self.clear()
+
+    def clear(self):
+        """Discard any samples
+        """
+        self.count = 0
+        self.start_ns = 0
+        self.end_ns = 0
+
+    def append(self, rx_time_ns: int, calibrated: Sequence[float], raw: Sequence[float]) -> bool:
+        """Add a sample
+
+        Returns: True if the block is ready to be flushed
+        """
+        if self.count == 0:
+            self.start_ns = rx_time_ns
+        self.calibrated[self.count] = calibrated
+        self.raw[self.count] = raw
+        self.count += 1
+        self.end_ns = rx_time_ns
+        return self.count == self.max_samples or rx_time_ns - self.start_ns >= self.max_age_ns
+
+    def flush(self) -> Optional[CapacitanceBlock]:
+        """Return the collected samples, and start a new block
+
+        Returns None if there are no samples.
+        """
+        if self.count == 0:
+            return None
+        count = self.count
+        interval = (self.end_ns - self.start_ns) * 1e-9 / (count - 1) if count > 1 else 0.0
+        block = CapacitanceBlock(
+            self.start_ns,
+            interval,
+            self.calibrated[:count].copy(),
+            self.raw[:count].copy(),
+        )
+        self.count = 0
+        return block
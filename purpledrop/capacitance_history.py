@@ -0,0 +1,95 @@
+"""Fixed capacity history of timestamped capacitance samples
+
+A CapacitanceHistory keeps the most recent samples of one capacitance stream
+(e.g. active capacitance, or group capacitance) in preallocated NumPy arrays,
+overwriting the oldest samples once it is full. Samples are stored with the
+monotonic time at which they were received, so a range of time can be found
+by binary search.
+"""
+import numpy as np
+from typing import NamedTuple, Optional, Sequence
+
+class CapacitanceSamples(NamedTuple):
+    # Monotonic receive times, in ns
+    times: np.ndarray
+    # Arrays of shape (samples, channels)
+    calibrated: np.ndarray
+    raw: np.ndarray
+
+class CapacitanceHistory(object):
+    def __init__(self, capacity: int, channels: int=1):
+        """
+        Args:
+          capacity: Number of samples kept
+          channels: Number of values in each sample. Samples with fewer values
+            are padded with NaN.
+        """
+        self.capacity = capacity
+        self.channels = channels
+        self.times = np.zeros(capacity, dtype=np.int64)
+        self.calibrated = np.full((capacity, channels), np.nan, dtype=np.float32)
+        self.raw = np.full((capacity, channels), np.nan, dtype=np.float32)
+        # Total number of samples appended. The next sample is stored at
+        # count % capacity.
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, time_ns: int, calibrated: Sequence[float], raw: Sequence[float]):
+        i = self.count % self.capacity
+        self.times[i] = time_ns
+        if self.channels > 1:
+            # Values beyond the capacity of the history are dropped
+            n = min(len(calibrated), self.channels)
+            calibrated = calibrated[:n]
+            raw = raw[:n]
+        else:
+            n = 1
+        self.calibrated[i, :n] = calibrated
+        self.raw[i, :n] = raw
+        if n < self.channels:
+            self.calibrated[i, n:] = np.nan
+            self.raw[i, n:] = np.nan
+        self.count += 1
+
+    def query(self,
+              start_ns: Optional[int]=None,
+              end_ns: Optional[int]=None,
+              decimate: int=1) -> CapacitanceSamples:
+        """Return samples received in [start_ns, end_ns], oldest first
+
+        Only the selected samples are copied.
+
+        Args:
+          start_ns: Optional earliest monotonic time
+          end_ns: Optional latest monotonic time
+          decimate: Return only every Nth sample of the range
+        """
+        if decimate < 1:
+            raise ValueError("decimate must be at least 1")
+        # Samples are stored in two segments, each in time order: from the
+        # oldest sample to the end of the arrays, and from the start of the
+        # arrays to the newest sample
+        split = self.count % self.capacity if self.count > self.capacity else 0
+        size = len(self)
+        segments = [(split, size), (0, split)] if split > 0 else [(0, size)]
+        ranges = []
+        for seg_start, seg_end in segments:
+            times = self.times[seg_start:seg_end]
+            lo = 0 if start_ns is None else np.searchsorted(times, start_ns, side='left')
+            hi = len(times) if end_ns is None else np.searchsorted(times, end_ns, side='right')
+            if hi > lo:
+                ranges.append((seg_start + lo, seg_start + hi))
+        # Keep every Nth sample of the whole range, across the segment boundary
+        offset = 0
+        index_parts = []
+        for lo, hi in ranges:
+            first = lo + (-offset % decimate)
+            index_parts.append(np.arange(first, hi, decimate))
+            offset += hi - lo
+        if len(index_parts) == 1 and decimate == 1:
+            lo, hi = ranges[0]
+            return CapacitanceSamples(self.times[lo:hi].copy(), self.calibrated[lo:hi].copy(), self.raw[lo:hi].copy())
+        indices = np.concatenate(index_parts) if index_parts else np.zeros(0, dtype=np.int64)
+        return CapacitanceSamples(self.times[indices], self.calibrated[indices], self.raw[indices])
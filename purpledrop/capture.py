@@ -0,0 +1,158 @@
+"""Capture and replay of the raw serial byte stream
+
+A capture file records every chunk of bytes read from or written to the
+device, with a timestamp, so that a session can be analyzed or replayed at
+full rate. It is unaffected by any of the throttling applied to events.
+
+File format (all values little-endian):
+
+    Header: 8 byte magic, int64 wall clock time (ns since epoch) and int64
+    monotonic time (ns) at which the capture was started.
+
+    Records: uint8 direction (0: RX, 1: TX), int64 monotonic time (ns),
+    uint32 length, followed by `length` data bytes.
+
+The monotonic timestamps of records can be converted to wall clock time using
+the pair of times in the header.
+"""
+import gevent
+import struct
+import threading
+import time
+from typing import BinaryIO, Iterator, NamedTuple, Optional
+
+from .messages import PurpleDropMessage, predict_request_size
+from .message_framer import MessageFramer
+from .purpledrop import PurpleDropDevice
+
+MAGIC = b"PDCAP\x00\x00\x01"
+_HEADER = struct.Struct("<8sqq")
+_RECORD = struct.Struct("<BqI")
+
+RX = 0
+TX = 1
+
+class CaptureRecord(NamedTuple):
+    direction: int
+    timestamp_ns: int
+    data: bytes
+
+class CaptureWriter(object):
+    """Appends timestamped RX/TX chunks to a capture file
+
+    If the file already exists, records are appended to it.
+    """
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._file: Optional[BinaryIO] = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(_HEADER.pack(MAGIC, time.time_ns(), time.monotonic_ns()))
+
+    def write(self, direction: int, data: bytes):
+        record = _RECORD.pack(direction, time.monotonic_ns(), len(data))
+        with self._lock:
+            if self._file is not None:
+                self._file.write(record)
+                self._file.write(data)
+
+    def write_rx(self, data: bytes):
+        self.write(RX, data)
+
+    def write_tx(self, data: bytes):
+        self.write(TX, data)
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+def read_capture_header(f: BinaryIO):
+    """Read the header from an open capture file
+
+    Returns: A tuple of (wall clock ns, monotonic ns) at the start of capture
+    """
+    header = f.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        raise ValueError("Capture file is truncated")
+    magic, wall_ns, monotonic_ns = _HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError("Not a purpledrop capture file")
+    return wall_ns, monotonic_ns
+
+def read_capture(path: str) -> Iterator[CaptureRecord]:
+    """Iterate over the records in a capture file
+
+    A truncated record at the end of the file, e.g. if the capturing process
+    was killed, is ignored.
+    """
+    with open(path, 'rb') as f:
+        read_capture_header(f)
+        while True:
+            header = f.read(_RECORD.size)
+            if len(header) < _RECORD.size:
+                return
+            direction, timestamp_ns, length = _RECORD.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+                return
+            yield CaptureRecord(direction, timestamp_ns, data)
+
+def decode_capture(path: str, direction: int=RX) -> Iterator[PurpleDropMessage]:
+    """Decode the messages received (or sent) in a capture file
+
+    Each message's `rx_time_ns` is set to the monotonic time of the record
+    which completed it.
+    """
+    if direction == RX:
+        framer = MessageFramer(PurpleDropMessage.predictSize)
+    else:
+        framer = MessageFramer(predict_request_size)
+    for record in read_capture(path):
+        if record.direction != direction:
+            continue
+        for buf in framer.parse(record.data):
+            msg = PurpleDropMessage.from_bytes(buf, record.timestamp_ns)
+            if msg is not None:
+                yield msg
+
+class CapturePurpleDropDevice(PurpleDropDevice):
+    """A device which plays back the messages received in a capture file
+
+    Messages are delivered to listeners as fast as possible when `replay` is
+    called, so that e.g. a PurpleDropController can process a full rate
+    recording. Messages sent to the device are discarded.
+    """
+    # Number of messages delivered between yields to other greenlets
+    YIELD_INTERVAL = 100
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+
+    def connected(self) -> bool:
+        # Nothing can be sent to a recording
+        return False
+
+    def send_message(self, msg: PurpleDropMessage):
+        pass
+
+    def replay(self) -> int:
+        """Deliver all received messages in the capture to listeners
+
+        Returns: The number of messages delivered
+        """
+        count = 0
+        for msg in decode_capture(self.path, RX):
+            self.on_message_received(msg)
+            count += 1
+            # Give listeners' greenlets, e.g. a controller's event publisher,
+            # a chance to keep up
+            if count % self.YIELD_INTERVAL == 0:
+                gevent.sleep(0)
+        return count
@@ -5,18 +5,28 @@ interfaces
 
 import fnmatch
 import gevent
+import gevent.event
 import logging
+import numpy as np
 import struct
 import threading
 import time
 from typing import Any, AnyStr, Callable, Dict, List, Optional, Sequence
 
 from purpledrop.calibration import ElectrodeOffsetCalibration
+from purpledrop.capacitance_block import CapacitanceBlockBuffer
+from purpledrop.capacitance_history import CapacitanceHistory
+from purpledrop.descriptor_cache import DescriptorCache
 from purpledrop.electrode_board import Board
+from purpledrop.event_policy import EventSubscription, PolicySpec
+from purpledrop.event_publisher import EventPublisher
 from purpledrop.exceptions import NoDeviceException
 import purpledrop.messages as messages
+from purpledrop.pin_mask import mask_to_bools, mask_to_bytes, mask_to_pins, pins_to_mask
 import purpledrop.protobuf.messages_pb2 as messages_pb2
 from .move_drop import move_drop, move_drops, MoveDropResult
+from .router import plan_routes_in_thread, route_drops, RouteResult
+from .sequence import run_sequence, SequenceResult
 
 logger = logging.getLogger("controller")
 
@@ -34,6 +44,9 @@ def validate_version(v):
     return False
 
 N_PINS = 128
+
+# Writing this parameter index saves all parameters to flash
+SAVE_PARAMETERS_IDX = 0xFFFFFFFF
 N_MASK_BYTES = N_PINS/8
 
 # Compute coefficients to convert integrated voltage to integrated charge
@@ -52,29 +65,23 @@ CAPGAIN_HIGH = RHIGH * GAIN1 * GAIN2 * GAIN3 * 4096. / 3.3
 CAPGAIN_LOW = RLOW * GAIN1 * GAIN2 * GAIN3 * 4096. / 3.3
 
 def pinlist2bool(pins):
-    pin_state = [False] * N_PINS
-
-    for p in pins:
-        if(p >= N_PINS):
-            raise ValueError(f"Pin {p} is invalid. Must be < {N_PINS}")
-        pin_state[p] = True
-    return pin_state
+    return mask_to_bools(pins_to_mask(pins))
 
 def pinlist2mask(pins):
-    mask = [0] * int(((N_PINS + 7) / 8))
-    for p in pins:
-        word = int(p / 8)
-        bit = p % 8
-        mask[word] |= (1<<bit)
-    return mask
-
-def get_pb_timestamp():
+    return list(mask_to_bytes(pins_to_mask(pins)))
+
+def get_pb_timestamp(monotonic_ns: Optional[int]=None):
     """Get a protobuf timestamp for the current system time
+
+    If monotonic_ns is provided -- e.g. a message's rx_time_ns -- the
+    timestamp is for that time instead, converted to system time.
     """
-    time_f = time.time()
+    time_ns = time.time_ns()
+    if monotonic_ns is not None:
+        time_ns -= time.monotonic_ns() - monotonic_ns
     ts = messages_pb2.Timestamp()
-    ts.seconds = int(time_f)
-    ts.nanos = int((time_f % 1) * 1e9)
+    ts.seconds = time_ns // 1000000000
+    ts.nanos = time_ns % 1000000000
     return ts
 
 class PinState(object):
@@ -85,14 +92,17 @@ class PinState(object):
     N_SCAN_GROUPS = 5
 
     class PinGroup(object):
-        def __init__(self, pin_mask: Sequence[int], setting: int):
+        def __init__(self, pin_mask: int, setting: int):
+            # Integer bit mask of the pins in the group; see pin_mask.py
             self.pin_mask = pin_mask
             self.setting = setting
 
+        @property
+        def pins(self) -> List[int]:
+            return mask_to_pins(self.pin_mask)
+
     class DriveGroup(PinGroup):
-        def __init__(self, pin_mask=None, duty_cycle=255):
-            if pin_mask is None:
-                pin_mask = pinlist2bool([])
+        def __init__(self, pin_mask=0, duty_cycle=255):
             super().__init__(pin_mask, duty_cycle)
 
         @property
@@ -105,19 +115,17 @@ class PinState(object):
 
         def to_dict(self):
             return {
-                'pins': self.pin_mask,
+                'pins': mask_to_bools(self.pin_mask),
                 'duty_cycle': self.duty_cycle,
             }
 
     class ScanGroup(PinGroup):
-        def __init__(self, pin_mask=None, setting=0):
-            if pin_mask is None:
-                pin_mask = pinlist2bool([])
+        def __init__(self, pin_mask=0, setting=0):
             super().__init__(pin_mask, setting)
 
         def to_dict(self):
             return {
-                'pins': self.pin_mask,
+                'pins': mask_to_bools(self.pin_mask),
                 'setting': self.setting,
             }
 
@@ -138,6 +146,8 @@ class PurpleDropController(object):
         'get_parameter_definitions',
         'get_parameter',
         'set_parameter',
+        'get_parameters',
+        'set_parameters',
         'get_bulk_capacitance',
         'get_scan_capacitance',
         'get_group_capacitance',
@@ -148,6 +158,9 @@ class PurpleDropController(object):
         'set_feedback_command',
         'move_drop',
         'move_drops',
+        'plan_routes',
+        'route_drops',
+        'run_sequence',
         'get_temperatures',
         'set_pwm_duty_cycle',
         'get_hv_supply_voltage',
@@ -158,83 +171,158 @@ class PurpleDropController(object):
         'set_scan_gains',
         'get_scan_gains',
         'set_electrode_calibration',
+        'get_listener_stats',
+        'get_connection_stats',
+        'get_capacitance_history',
+        'get_event_queue_stats',
     ]
 
-    def __init__(self, purpledrop, board_definition: Board, electrode_calibration: Optional[ElectrodeOffsetCalibration]=None):
+    # Number of samples kept in each capacitance history: one minute of active
+    # and group capacitance at 500Hz, and of scans at up to 20Hz
+    ACTIVE_HISTORY_SIZE = 30000
+    GROUP_HISTORY_SIZE = 30000
+    SCAN_HISTORY_SIZE = 1200
+
+    def __init__(self,
+                 purpledrop,
+                 board_definition: Board,
+                 electrode_calibration: Optional[ElectrodeOffsetCalibration]=None,
+                 descriptor_cache: Optional[DescriptorCache]=None):
         self.purpledrop = purpledrop
         self.board_definition = board_definition
+        # Descriptors are only kept in memory unless the caller provides a
+        # persistent cache
+        if descriptor_cache is None:
+            descriptor_cache = DescriptorCache(persistent=False)
+        self.descriptor_cache = descriptor_cache
 
         self.active_capacitance = 0.0
         self.electrode_calibration = electrode_calibration
-        self.raw_scan_capacitance: List[float] = []
-        self.calibrated_scan_capacitance: List[float] = []
-        self.raw_group_capacitance: List[float] = []
-        self.calibrated_group_capacitance: List[float] = []
-        self.scan_gains = [CAPGAIN_HIGH] * N_PINS
+        # Capacitance state is kept in preallocated arrays, so that each
+        # received report is calibrated with one vectorized expression. Only
+        # the first scan_size/group_size entries have been received. Raw
+        # counts are stored as floats to avoid a conversion during calibration.
+        self.raw_scan_capacitance = np.zeros(N_PINS)
+        self.calibrated_scan_capacitance = np.zeros(N_PINS)
+        self.scan_size = 0
+        self.raw_group_capacitance = np.zeros(PinState.N_SCAN_GROUPS)
+        self.calibrated_group_capacitance = np.zeros(PinState.N_SCAN_GROUPS)
+        self.group_size = 0
+        self.group_gains = np.full(PinState.N_SCAN_GROUPS, CAPGAIN_HIGH)
+        self.scan_gains = np.full(N_PINS, CAPGAIN_HIGH)
+        # Full rate samples for *_capacitance_block events. Only filled while
+        # a listener accepts the events.
+        self.active_block = CapacitanceBlockBuffer(1)
+        self.group_block = CapacitanceBlockBuffer(PinState.N_SCAN_GROUPS)
+        # Full rate history, for get_capacitance_history
+        self.active_history = CapacitanceHistory(self.ACTIVE_HISTORY_SIZE)
+        self.group_history = CapacitanceHistory(self.GROUP_HISTORY_SIZE, PinState.N_SCAN_GROUPS)
+        self.scan_history = CapacitanceHistory(self.SCAN_HISTORY_SIZE, N_PINS)
         self.temperatures: Sequence[float] = []
         self.duty_cycles: Dict[int, float] = {}
         self.hv_supply_voltage = 0.0
+        # Factors converting raw counts to pF for each channel; see
+        # __update_calibration_scale
+        self.scan_scale = np.zeros(N_PINS)
+        self.group_scale = np.zeros(PinState.N_SCAN_GROUPS)
         self.parameter_list: List[dict] = []
+        # Last known value of each parameter, by ID. Seeded from the parameter
+        # descriptors, and updated by every parameter read and write response.
+        self.parameter_values: Dict[int, Any] = {}
         self.lock = gevent.lock.RLock()
-        self.event_listeners: List[Callable] = []
-        self.active_capacitance_counter = 0
-        self.group_capacitance_counter = 0
-        self.duty_cycle_updated_counter = 0
-        self.hv_regulator_counter = 0
+        self.event_listeners: List[EventSubscription] = []
+        # Builds and delivers events outside of the receive path
+        self.event_publisher = EventPublisher()
+        self.event_publisher.start()
         self.pin_state = PinState()
-
-        def msg_filter(msg):
-            desired_types = [
-                messages.ActiveCapacitanceMsg,
-                messages.BulkCapacitanceMsg,
-                messages.CommandAckMsg,
-                messages.DutyCycleUpdatedMsg,
-                messages.TemperatureMsg,
-                messages.HvRegulatorMsg,
-            ]
-
-            for t in desired_types:
-                if isinstance(msg, t):
-                    return True
-            return False
+        # Scan gains set by the user, restored on reconnect. None for the board
+        # defaults.
+        self.scan_gain_settings: Optional[List[bool]] = None
+        # Set after the first connection, so that device state is restored on
+        # subsequent connections
+        self.has_connected = False
+
+        desired_types = [
+            messages.ActiveCapacitanceMsg,
+            messages.BulkCapacitanceMsg,
+            messages.CommandAckMsg,
+            messages.DutyCycleUpdatedMsg,
+            messages.TemperatureMsg,
+            messages.HvRegulatorMsg,
+            messages.SetParameterMsg,
+        ]
 
         if self.purpledrop.connected():
             self.__on_connected()
         self.purpledrop.register_connected_callback(self.__on_connected)
         self.purpledrop.register_disconnected_callback(self.__on_disconnected)
 
-        self.listener = self.purpledrop.get_async_listener(self.__message_callback, msg_filter)
+        self.listener = self.purpledrop.get_async_listener(self.__message_callback, desired_types)
 
     def __on_connected(self):
-        self.__set_scan_gains()
-        self.__get_parameter_descriptors()
+        # Scan gains, the software version and calibration are independent, so
+        # their requests are all in flight at once. Parameter descriptors are
+        # only read from the device if they aren't cached for its version.
+        start = time.monotonic()
+        # The device may have been reset or reprogrammed
+        self.parameter_values = {}
+        steps = [gevent.spawn(self.__set_scan_gains, self.scan_gain_settings)]
+        if self.electrode_calibration is not None:
+            logger.info("Loading electrode calibration")
+            steps.append(gevent.spawn(
+                self.set_electrode_calibration,
+                self.electrode_calibration.voltage,
+                self.electrode_calibration.offsets))
         software_version = self.get_software_version()
         if not validate_version(software_version):
             logger.error(f"Unsupported software version '{software_version}'. This driver may not" + \
                 "work correcly, and you should upgrade your purpledrop firmware to one of the following: " +  \
                     f"{SUPPORTED_VERSIONS}")
+        serial_number = self.purpledrop.connected_serial_number()
+        # Devices which can't report a serial number (e.g. when connected by
+        # port) give "NA", and can't be told apart in the cache
+        cache_key = serial_number if serial_number != 'NA' else None
+        descriptors = self.descriptor_cache.get(cache_key, software_version)
+        if descriptors is None:
+            descriptors = self.__get_parameter_descriptors()
+            if descriptors is not None:
+                self.descriptor_cache.put(cache_key, software_version, descriptors)
+        self.parameter_list = descriptors or []
+        gevent.joinall(steps)
+        for step in steps:
+            if step.exception is not None:
+                logger.error(f"Failed during device setup: {step.exception}")
         self.__send_device_info_event(
             True,
-            self.purpledrop.connected_serial_number() or '',
+            serial_number or '',
             software_version or ''
         )
-        if self.electrode_calibration is not None:
-            logger.info("Loading electrode calibration")
-            self.set_electrode_calibration(self.electrode_calibration.voltage, self.electrode_calibration.offsets)
+        if self.has_connected:
+            self.__restore_pin_state()
+        self.has_connected = True
+        logger.info(f"Device ready in {(time.monotonic() - start) * 1e3:.1f}ms")
 
-    def __on_disconnected(self):
-        self.__send_device_info_event(False, '', '')
+    def __restore_pin_state(self):
+        """Re-send the last electrode and scan group settings after reconnecting
 
-    def __request_with_retry(self, msg_to_send, msg_listener, timeout=1.0, tries=3):
-        """Send a message, and wait for a listener to receive a response"""
-        while tries > 0:
-            tries -= 1
-            self.purpledrop.send_message(msg_to_send)
-            response = msg_listener.next(timeout=timeout)
-            if response is not None:
-                return response
+        The device loses its state when it is reset or re-enumerated, so this
+        puts it back the way the user left it.
+        """
+        logger.info("Restoring electrode state")
+        try:
+            for i, group in enumerate(self.pin_state.scan_groups):
+                self.set_capacitance_group(group.pins, i, group.setting)
+            for i, group in enumerate(self.pin_state.drive_groups):
+                self.set_electrode_pins(group.pins, i, group.duty_cycle)
+        except TimeoutError:
+            logger.error("Failed to restore electrode state")
 
-        return None
+    def __on_disconnected(self):
+        # Values may change before the device reconnects, e.g. if it is reset
+        self.parameter_values = {}
+        self.__flush_block('active_capacitance_block', self.active_block)
+        self.__flush_block('group_capacitance_block', self.group_block)
+        self.__send_device_info_event(False, '', '')
 
     def __ensure_device_connected(self):
         """Raises NoDeviceException unless there is a purpledrop connected
@@ -250,26 +338,37 @@ class PurpleDropController(object):
         event.device_info.software_version = software_version
         self.__fire_event(event)
 
-    def __get_parameter_descriptors(self):
+    def __get_parameter_descriptors(self, timeout: float=2.0) -> Optional[List[dict]]:
         """Request and receive the list of parameters from device
+
+        Returns: The list of descriptors, or None if they were not all received
+        within timeout
         """
-        with self.purpledrop.get_sync_listener(messages.ParameterDescriptorMsg) as listener:
+        descriptors: List[dict] = []
+        done = gevent.event.Event()
+
+        def on_descriptor(msg):
+            descriptors.append({
+                'id': msg.param_id,
+                'name': msg.name,
+                'description': msg.description,
+                'type': msg.type,
+            })
+            # Values aren't stored in the descriptor cache, since they can be
+            # changed
+            self.parameter_values[msg.param_id] = msg.value
+            if msg.sequence_number == msg.sequence_total - 1:
+                done.set()
+
+        listener = self.purpledrop.get_async_listener(on_descriptor, messages.ParameterDescriptorMsg)
+        try:
             self.purpledrop.send_message(messages.ParameterDescriptorMsg())
-            descriptors = []
-            while True:
-                msg = listener.next(timeout=2.0)
-                if msg is None:
-                    logger.error("Timed out waiting for parameter descriptors")
-                    break
-                descriptors.append({
-                    'id': msg.param_id,
-                    'name': msg.name,
-                    'description': msg.description,
-                    'type': msg.type,
-                })
-                if msg.sequence_number == msg.sequence_total - 1:
-                    break
-            self.parameter_list = descriptors
+            if not done.wait(timeout):
+                logger.error("Timed out waiting for parameter descriptors")
+                return None
+        finally:
+            self.purpledrop.unregister_listener(listener.get_msg_handler())
+        return descriptors
 
     def __set_scan_gains(self, gains: Sequence[bool]=None):
         """Setup gains used for capacitance scan
@@ -286,14 +385,14 @@ class PurpleDropController(object):
             gains = [False] * N_PINS
             for pin in self.board_definition.oversized_electrodes:
                 gains[pin] = True # low gain
-        self.scan_gains = list(map(lambda x: CAPGAIN_LOW if x else CAPGAIN_HIGH, gains))
+        self.scan_gains = np.where(np.asarray(gains, dtype=bool), CAPGAIN_LOW, CAPGAIN_HIGH)
+        self.__update_calibration_scale()
 
         msg = messages.SetGainMsg()
         msg.gains = list(map(lambda x: 1 if x else 0, gains))
-        with self.purpledrop.get_sync_listener(messages.CommandAckMsg) as listener:
-            ack = self.__request_with_retry(msg, listener)
-            if ack is None:
-                logger.error("Got no ACK for SetGains message")
+        ack = self.purpledrop.request(msg, messages.CommandAckMsg, msg.ID, timeout=1.0)
+        if ack is None:
+            logger.error("Got no ACK for SetGains message")
 
     def __calibrate_capacitance(self, raw, gain):
         # Can't measure capacitance unless high voltage is on
@@ -302,110 +401,238 @@ class PurpleDropController(object):
         # Return as pF
         return raw * 1e12 / gain / self.hv_supply_voltage
 
-    def __calibrate_group_capacitance(self, raw):
-        calibrated_group_capacitance = [0.0] * len(raw)
-        for i in range(len(raw)):
-            if self.pin_state.scan_groups[i].setting == 0:
-                gain = CAPGAIN_HIGH
-            else:
-                gain = CAPGAIN_LOW
-            calibrated_group_capacitance[i] = self.__calibrate_capacitance(raw[i], gain)
-        return calibrated_group_capacitance
+    def __update_calibration_scale(self):
+        """Recompute the per-channel factors used by __calibrate_capacitance
+        for scan and group measurements
+
+        Must be called whenever the HV supply voltage or the gains change.
+        """
+        # Can't measure capacitance unless high voltage is on
+        if self.hv_supply_voltage < 60.0:
+            k = 0.0
+        else:
+            k = 1e12 / self.hv_supply_voltage
+        self.scan_scale = k / self.scan_gains
+        self.group_scale = k / self.group_gains
+
+    def __calibrate_group_capacitance(self, raw: np.ndarray) -> np.ndarray:
+        return raw * self.group_scale[:len(raw)]
+
+    @staticmethod
+    def __grow(array: np.ndarray, size: int, fill=0.0) -> np.ndarray:
+        """Return array, extended with fill if it is shorter than size"""
+        if len(array) >= size:
+            return array
+        return np.concatenate((array, np.full(size - len(array), fill)))
 
     def __message_callback(self, msg):
+        # Events are built outside of the receive path, when listeners first
+        # use them, so the values they need are captured here. This is only
+        # done when some listener wants the event.
         if isinstance(msg, messages.ActiveCapacitanceMsg):
             # TODO: I-sense resistor values are adjustable, and the
             # CAPGAIN_HIGH/CAPGAIN_LOW should be gotten from the device at some
             # point, rather than duplicated here
             capgain = CAPGAIN_LOW if (msg.settings & 1 == 1) else CAPGAIN_HIGH
             self.active_capacitance = self.__calibrate_capacitance(msg.measurement - msg.baseline, capgain)
-            self.active_capacitance_counter += 1
-            # Throttle the events. 500Hz messages is a lot for the browser to process.
-            # This also means logs don't have a full resolution, and it would be better
-            # if clients could choose what they get
-            if (self.active_capacitance_counter % 10) == 0:
-                cap_event = messages_pb2.PurpleDropEvent()
-                cap_event.active_capacitance.baseline = msg.baseline
-                cap_event.active_capacitance.measurement = msg.measurement
-                cap_event.active_capacitance.calibrated = float(self.active_capacitance)
-                cap_event.active_capacitance.timestamp.CopyFrom(get_pb_timestamp())
-                self.__fire_event(cap_event)
+            rx_time_ns = messages.get_rx_time_ns(msg)
+            self.active_history.append(rx_time_ns, self.active_capacitance, msg.measurement - msg.baseline)
+            subscribers = self.__subscribers('active_capacitance')
+            if subscribers:
+                baseline = msg.baseline
+                measurement = msg.measurement
+                calibrated = float(self.active_capacitance)
+                def build_active_event():
+                    cap_event = messages_pb2.PurpleDropEvent()
+                    cap_event.active_capacitance.baseline = baseline
+                    cap_event.active_capacitance.measurement = measurement
+                    cap_event.active_capacitance.calibrated = calibrated
+                    cap_event.active_capacitance.timestamp.CopyFrom(get_pb_timestamp(rx_time_ns))
+                    return cap_event
+                self.event_publisher.publish('active_capacitance', build_active_event, subscribers)
+            if self.__accepts('active_capacitance_block'):
+                if self.active_block.append(rx_time_ns, self.active_capacitance, msg.measurement - msg.baseline):
+                    self.__flush_block('active_capacitance_block', self.active_block)
+            else:
+                self.active_block.clear()
 
         elif isinstance(msg, messages.BulkCapacitanceMsg):
             if(msg.group_scan != 0):
-                self.group_capacitance_counter += 1
-                self.raw_group_capacitance = msg.measurements
-                self.calibrated_group_capacitance = self.__calibrate_group_capacitance(msg.measurements)
-                if (self.group_capacitance_counter % 10) == 0:
-                    group_event = messages_pb2.PurpleDropEvent()
-                    group_event.group_capacitance.timestamp.CopyFrom(get_pb_timestamp())
-                    group_event.group_capacitance.measurements[:] = self.calibrated_group_capacitance
-                    group_event.group_capacitance.raw_measurements[:] = self.raw_group_capacitance
-                    self.__fire_event(group_event)
+                count = msg.count
+                if count > len(self.raw_group_capacitance):
+                    self.raw_group_capacitance = self.__grow(self.raw_group_capacitance, count)
+                    self.calibrated_group_capacitance = self.__grow(self.calibrated_group_capacitance, count)
+                    self.group_gains = self.__grow(self.group_gains, count, CAPGAIN_HIGH)
+                    self.__update_calibration_scale()
+                if count == len(self.raw_group_capacitance):
+                    # Usual case: all groups are reported, so no slicing
+                    raw = self.raw_group_capacitance
+                    raw[:] = msg.measurements
+                    np.multiply(raw, self.group_scale, out=self.calibrated_group_capacitance)
+                else:
+                    raw = self.raw_group_capacitance[:count]
+                    raw[:] = msg.measurements
+                    np.multiply(raw, self.group_scale[:count], out=self.calibrated_group_capacitance[:count])
+                self.group_size = count
+                rx_time_ns = messages.get_rx_time_ns(msg)
+                self.group_history.append(rx_time_ns, self.calibrated_group_capacitance[:count], raw)
+                subscribers = self.__subscribers('group_capacitance')
+                if subscribers:
+                    calibrated = self.calibrated_group_capacitance[:count].copy()
+                    raw_copy = raw.copy()
+                    def build_group_event():
+                        group_event = messages_pb2.PurpleDropEvent()
+                        group_event.group_capacitance.timestamp.CopyFrom(get_pb_timestamp(rx_time_ns))
+                        group_event.group_capacitance.measurements[:] = calibrated.tolist()
+                        group_event.group_capacitance.raw_measurements[:] = raw_copy.tolist()
+                        return group_event
+                    self.event_publisher.publish('group_capacitance', build_group_event, subscribers)
+                if self.__accepts('group_capacitance_block'):
+                    if count != self.group_block.channels:
+                        self.__flush_block('group_capacitance_block', self.group_block)
+                        self.group_block.reset(count)
+                    if self.group_block.append(rx_time_ns, self.calibrated_group_capacitance[:count], raw):
+                        self.__flush_block('group_capacitance_block', self.group_block)
+                else:
+                    self.group_block.clear()
             else:
                 # Scan capacitance measurements are broken up into multiple messages
-                if len(self.raw_scan_capacitance) < msg.start_index + msg.count:
-                    self.raw_scan_capacitance.extend([0] * (msg.start_index + msg.count - len(self.raw_scan_capacitance)))
-                    self.calibrated_scan_capacitance.extend([0] * (msg.start_index + msg.count - len(self.calibrated_scan_capacitance)))
-                for i in range(msg.count):
-                    chan = msg.start_index + i
-                    gain = self.scan_gains[chan]
-                    self.raw_scan_capacitance[chan] = msg.measurements[i]
-                    self.calibrated_scan_capacitance[chan] = self.__calibrate_capacitance(msg.measurements[i], gain)
+                start = msg.start_index
+                end = start + msg.count
+                if end > len(self.raw_scan_capacitance):
+                    self.raw_scan_capacitance = self.__grow(self.raw_scan_capacitance, end)
+                    self.calibrated_scan_capacitance = self.__grow(self.calibrated_scan_capacitance, end)
+                    self.scan_gains = self.__grow(self.scan_gains, end, CAPGAIN_HIGH)
+                    self.__update_calibration_scale()
+                raw = self.raw_scan_capacitance[start:end]
+                raw[:] = msg.measurements
+                np.multiply(raw, self.scan_scale[start:end], out=self.calibrated_scan_capacitance[start:end])
+                self.scan_size = max(self.scan_size, end)
 
                 # Fire event on the last group
-                if msg.start_index + msg.count == 128:
-                    bulk_event = messages_pb2.PurpleDropEvent()
-                    def make_cap_measurement(raw, calibrated):
-                        m = messages_pb2.CapacitanceMeasurement()
-                        m.raw = float(raw)
-                        m.capacitance = float(calibrated)
-                        return m
-                    bulk_event.scan_capacitance.measurements.extend(
-                        [make_cap_measurement(raw, cal)
-                        for (raw, cal) in zip(self.raw_scan_capacitance, self.calibrated_scan_capacitance)]
-                    )
-                    bulk_event.scan_capacitance.timestamp.CopyFrom(get_pb_timestamp())
-                    self.__fire_event(bulk_event)
+                if end == 128:
+                    rx_time_ns = messages.get_rx_time_ns(msg)
+                    self.scan_history.append(
+                        rx_time_ns, self.calibrated_scan_capacitance[:N_PINS], self.raw_scan_capacitance[:N_PINS])
+                    subscribers = self.__subscribers('scan_capacitance')
+                    if subscribers:
+                        raw_copy = self.raw_scan_capacitance[:self.scan_size].copy()
+                        calibrated = self.calibrated_scan_capacitance[:self.scan_size].copy()
+                        def build_scan_event():
+                            bulk_event = messages_pb2.PurpleDropEvent()
+                            def make_cap_measurement(raw, calibrated):
+                                m = messages_pb2.CapacitanceMeasurement()
+                                m.raw = raw
+                                m.capacitance = calibrated
+                                return m
+                            bulk_event.scan_capacitance.measurements.extend(
+                                [make_cap_measurement(r, c)
+                                for (r, c) in zip(raw_copy.tolist(), calibrated.tolist())]
+                            )
+                            bulk_event.scan_capacitance.timestamp.CopyFrom(get_pb_timestamp(rx_time_ns))
+                            return bulk_event
+                        self.event_publisher.publish('scan_capacitance', build_scan_event, subscribers)
 
         elif isinstance(msg, messages.DutyCycleUpdatedMsg):
-            self.duty_cycle_updated_counter += 1
-            if (self.duty_cycle_updated_counter%10) == 0:
-                # Update local state of duty cycle
-                self.pin_state.drive_groups[0].duty_cycle = msg.duty_cycle_A
-                self.pin_state.drive_groups[1].duty_cycle = msg.duty_cycle_B
-
-                # Publish event with new values
-                duty_cycle_event = messages_pb2.PurpleDropEvent()
-                duty_cycle_event.duty_cycle_updated.timestamp.CopyFrom(get_pb_timestamp())
-                duty_cycle_event.duty_cycle_updated.duty_cycles[:] = [msg.duty_cycle_A, msg.duty_cycle_B]
-                self.__fire_event(duty_cycle_event)
+            # Update local state of duty cycle
+            self.pin_state.drive_groups[0].duty_cycle = msg.duty_cycle_A
+            self.pin_state.drive_groups[1].duty_cycle = msg.duty_cycle_B
+
+            subscribers = self.__subscribers('duty_cycle_updated')
+            if subscribers:
+                duty_cycles = [msg.duty_cycle_A, msg.duty_cycle_B]
+                rx_time_ns = messages.get_rx_time_ns(msg)
+                def build_duty_cycle_event():
+                    # Publish event with new values
+                    duty_cycle_event = messages_pb2.PurpleDropEvent()
+                    duty_cycle_event.duty_cycle_updated.timestamp.CopyFrom(get_pb_timestamp(rx_time_ns))
+                    duty_cycle_event.duty_cycle_updated.duty_cycles[:] = duty_cycles
+                    return duty_cycle_event
+                self.event_publisher.publish('duty_cycle_updated', build_duty_cycle_event, subscribers)
 
         elif isinstance(msg, messages.HvRegulatorMsg):
-            self.hv_supply_voltage = msg.voltage
-            self.hv_regulator_counter += 1
-            if (self.hv_regulator_counter % 10) == 0:
-                event = messages_pb2.PurpleDropEvent()
-                event.hv_regulator.voltage = msg.voltage
-                event.hv_regulator.v_target_out = msg.v_target_out
-                event.hv_regulator.timestamp.CopyFrom(get_pb_timestamp())
-                self.__fire_event(event)
+            if msg.voltage != self.hv_supply_voltage:
+                self.hv_supply_voltage = msg.voltage
+                self.__update_calibration_scale()
+            subscribers = self.__subscribers('hv_regulator')
+            if subscribers:
+                voltage = msg.voltage
+                v_target_out = msg.v_target_out
+                rx_time_ns = messages.get_rx_time_ns(msg)
+                def build_hv_event():
+                    event = messages_pb2.PurpleDropEvent()
+                    event.hv_regulator.voltage = voltage
+                    event.hv_regulator.v_target_out = v_target_out
+                    event.hv_regulator.timestamp.CopyFrom(get_pb_timestamp(rx_time_ns))
+                    return event
+                self.event_publisher.publish('hv_regulator', build_hv_event, subscribers)
+
+        elif isinstance(msg, messages.SetParameterMsg):
+            # Reads and writes are both answered with the current value
+            if msg.param_idx() != SAVE_PARAMETERS_IDX:
+                self.parameter_values[msg.param_idx()] = self.__parameter_value(msg)
 
         elif isinstance(msg, messages.TemperatureMsg):
             self.temperatures = [float(x) / 100.0 for x in msg.measurements]
-            event = messages_pb2.PurpleDropEvent()
-            event.temperature_control.temperatures[:] = self.temperatures
-            duty_cycles = []
-            for i in range(len(self.temperatures)):
-                duty_cycles.append(self.duty_cycles.get(i, 0.0))
-            event.temperature_control.duty_cycles[:] = duty_cycles
-            event.temperature_control.timestamp.CopyFrom(get_pb_timestamp())
-            self.__fire_event(event)
+            subscribers = self.__subscribers('temperature_control')
+            if subscribers:
+                temperatures = self.temperatures
+                duty_cycles = []
+                for i in range(len(temperatures)):
+                    duty_cycles.append(self.duty_cycles.get(i, 0.0))
+                rx_time_ns = messages.get_rx_time_ns(msg)
+                def build_temperature_event():
+                    event = messages_pb2.PurpleDropEvent()
+                    event.temperature_control.temperatures[:] = temperatures
+                    event.temperature_control.duty_cycles[:] = duty_cycles
+                    event.temperature_control.timestamp.CopyFrom(get_pb_timestamp(rx_time_ns))
+                    return event
+                self.event_publisher.publish('temperature_control', build_temperature_event, subscribers)
+
+    def __accepts(self, event_type: str) -> bool:
+        """Check whether any listener receives events of a type
+        """
+        with self.lock:
+            return any(s.accepts(event_type) for s in self.event_listeners)
 
-    def __fire_event(self, event):
+    def __flush_block(self, event_type: str, buffer: CapacitanceBlockBuffer):
+        """Send the samples collected in buffer as a CapacitanceBlock event
+        """
+        block = buffer.flush()
+        if block is None:
+            return
+        subscribers = self.__subscribers(event_type)
+        if subscribers:
+            def build_block_event():
+                event = messages_pb2.PurpleDropEvent()
+                block_event = getattr(event, event_type)
+                block_event.timestamp.CopyFrom(get_pb_timestamp(block.start_ns))
+                block_event.sample_interval = block.sample_interval
+                block_event.channels = block.calibrated.shape[1]
+                block_event.calibrated[:] = block.calibrated.ravel().tolist()
+                block_event.raw[:] = block.raw.ravel().tolist()
+                return event
+            self.event_publisher.publish(event_type, build_block_event, subscribers)
+
+    def __subscribers(self, event_type: str) -> List[EventSubscription]:
+        """Return the listeners which will receive the next event of a type
+
+        Each listener's policy is advanced, so this must be called once for
+        every event of the type produced.
+        """
         with self.lock:
-            for listener in self.event_listeners:
-                listener(event)
+            if len(self.event_listeners) == 0:
+                return []
+            now = time.monotonic()
+            return [s for s in self.event_listeners if s.wants(event_type, now)]
+
+    def __fire_event(self, event):
+        """Queue a complete event for delivery to listeners
+        """
+        event_type = event.WhichOneof('msg')
+        subscribers = self.__subscribers(event_type)
+        if subscribers:
+            self.event_publisher.publish(event_type, lambda: event, subscribers)
 
     def __get_parameter_definition(self, id):
         for p in self.parameter_list:
@@ -413,54 +640,131 @@ class PurpleDropController(object):
                 return p
         return None
 
+    def __parameter_value(self, msg: messages.SetParameterMsg):
+        """Return the value in a SetParameterMsg, decoded based on the type of
+        the parameter
+        """
+        desc = self.__get_parameter_definition(msg.param_idx())
+        if desc is not None and desc['type'] == 'float':
+            return msg.param_value_float()
+        return msg.param_value_int()
+
+    def __parameter_request(self, param_idx: int, value=None) -> messages.SetParameterMsg:
+        """Create a message to read a parameter, or to write it if a value is
+        given
+        """
+        msg = messages.SetParameterMsg()
+        msg.set_param_idx(param_idx)
+        if value is None:
+            msg.set_param_value_int(0)
+            msg.set_write_flag(0)
+        else:
+            desc = self.__get_parameter_definition(param_idx)
+            if desc is not None and desc['type'] == 'float':
+                msg.set_param_value_float(value)
+            else:
+                msg.set_param_value_int(value)
+            msg.set_write_flag(1)
+        return msg
+
+    def __request_parameters(self, requests: Dict[int, Any]) -> Dict[int, Any]:
+        """Read (for a value of None) or write parameters, and wait for every
+        response
+
+        The requests are pipelined through the command window.
+
+        Returns: The value of each parameter reported by the device
+        """
+        window = self.purpledrop.command_window
+        results = {
+            param_idx: window.send(
+                self.__parameter_request(param_idx, value),
+                ack_key=param_idx,
+                response_type=messages.SetParameterMsg)
+            for param_idx, value in requests.items()
+        }
+        values = {}
+        missing = []
+        for param_idx, result in results.items():
+            resp = result.get()
+            if resp is None:
+                missing.append(param_idx)
+                continue
+            values[param_idx] = self.__parameter_value(resp)
+            if param_idx != SAVE_PARAMETERS_IDX:
+                self.parameter_values[param_idx] = values[param_idx]
+        if len(missing) > 0:
+            raise TimeoutError(f"No response from purpledrop for parameters {missing}")
+        return values
+
     def __fire_pinstate_event(self):
+        # Groups are sent as packed masks, and as the repeated bool
+        # `electrodes` field for clients which don't read the mask
         event = messages_pb2.PurpleDropEvent()
-        for g in self.pin_state.drive_groups:
-            event.electrode_state.drive_groups.add(electrodes=g.pin_mask, setting=g.setting)
-        for g in self.pin_state.scan_groups:
-            event.electrode_state.scan_groups.add(electrodes=g.pin_mask, setting=g.setting)
+        for groups, pin_groups in [
+                (event.electrode_state.drive_groups, self.pin_state.drive_groups),
+                (event.electrode_state.scan_groups, self.pin_state.scan_groups)]:
+            for g in pin_groups:
+                groups.add(
+                    electrodes=mask_to_bools(g.pin_mask),
+                    mask=mask_to_bytes(g.pin_mask),
+                    setting=g.setting)
 
         self.__fire_event(event)
 
     def get_software_version(self) -> Optional[str]:
-        with self.purpledrop.get_sync_listener(msg_filter=messages.DataBlobMsg) as listener:
-            versionRequest = messages.DataBlobMsg()
-            versionRequest.blob_id = messages.DataBlobMsg.SOFTWARE_VERSION_ID
-            self.purpledrop.send_message(versionRequest)
-            msg = listener.next(0.5)
-            if msg is None:
-                software_version = None
-                logger.warning("Timed out requesting software version")
-            else:
-                software_version = msg.payload.decode('utf-8')
-            return software_version
+        versionRequest = messages.DataBlobMsg()
+        versionRequest.blob_id = messages.DataBlobMsg.SOFTWARE_VERSION_ID
+        msg = self.purpledrop.request(versionRequest, messages.DataBlobMsg, versionRequest.blob_id, tries=1)
+        if msg is None:
+            software_version = None
+            logger.warning("Timed out requesting software version")
+        else:
+            software_version = msg.payload.decode('utf-8')
+        return software_version
 
-    def register_event_listener(self, func):
+    def register_event_listener(self, func, policies: Optional[Dict[str, PolicySpec]]=None):
         """Register a callback for state update events
+
+        Args:
+          func: Called with each PurpleDropEvent
+          policies: Optional dict mapping event types (e.g.
+            'active_capacitance') to an EventPolicy, or a policy string such
+            as 'full', 'every:10', 'max_hz:10' or 'latest'. Event types which
+            aren't included are delivered at full rate. If not provided,
+            high rate events are reduced to one in ten (see
+            DEFAULT_EVENT_POLICIES).
         """
+        subscription = EventSubscription(func, policies)
         with self.lock:
-            self.event_listeners.append(func)
+            self.event_listeners.append(subscription)
 
     def unregister_event_listener(self, func):
         """Remove a previously registered listener
         """
         with self.lock:
-            if func in self.event_listeners:
-                self.event_listeners.remove(func)
+            self.event_listeners = [s for s in self.event_listeners if s.callback != func]
 
-    def active_capacitance_collector(self):
+    def active_capacitance_collector(self, with_rx_time: bool=False):
         """Return a collector for active capacitance reports
+
+        Collected items are tuples of (raw, calibrated), or if with_rx_time is
+        set, (raw, calibrated, rx_time_ns), where rx_time_ns is the monotonic
+        time at which the report was received.
         """
 
-        def match(msg):
-            return isinstance(msg, messages.ActiveCapacitanceMsg)
         def transform(msg):
             gain = CAPGAIN_LOW if (msg.settings & 1 == 1) else CAPGAIN_HIGH
             raw = msg.measurement - msg.baseline
             calibrated = self.__calibrate_capacitance(raw, gain)
+            if with_rx_time:
+                return raw, calibrated, messages.get_rx_time_ns(msg)
             return raw, calibrated
 
-        return self.purpledrop.get_sync_listener(match, transform)
+        return self.purpledrop.get_sync_listener(
+            messages.ActiveCapacitanceMsg,
+            transform,
+            name='active_capacitance_collector')
 
     def wait_for_active_capacitance(self, timeout=1.0):
         """Wait for the next active capacitance update to be recieved and return it
@@ -476,32 +780,39 @@ class PurpleDropController(object):
         calibrated = self.__calibrate_capacitance(raw, gain)
         return raw, calibrated
 
-    def group_capacitance_collector(self):
+    def group_capacitance_collector(self, with_rx_time: bool=False):
         """Return a collector for group capacitance reports
+
+        Collected items are tuples of (raw, calibrated), or if with_rx_time is
+        set, (raw, calibrated, rx_time_ns), where rx_time_ns is the monotonic
+        time at which the report was received.
         """
         def transform(msg):
-            raw = msg.measurements
+            raw = np.asarray(msg.measurements)
             calibrated = self.__calibrate_group_capacitance(raw)
-            return (raw, calibrated)
+            if with_rx_time:
+                return (raw.tolist(), calibrated.tolist(), messages.get_rx_time_ns(msg))
+            return (raw.tolist(), calibrated.tolist())
 
-        def match(msg):
-            return isinstance(msg, messages.BulkCapacitanceMsg) and msg.group_scan != 0
-
-        return self.purpledrop.get_sync_listener(match, transform)
+        return self.purpledrop.get_sync_listener(
+            messages.BulkCapacitanceMsg,
+            transform,
+            predicate=lambda m: m.group_scan != 0,
+            name='group_capacitance_collector')
 
     def wait_for_group_capacitance(self, timeout=1.0):
         """Wait for the next group capacitance update to be recieved and return it
         """
-        match = lambda m: isinstance(m, messages.BulkCapacitanceMsg) and m.group_scan != 0
-        with self.purpledrop.get_sync_listener(match) as listener:
+        match = lambda m: m.group_scan != 0
+        with self.purpledrop.get_sync_listener(messages.BulkCapacitanceMsg, predicate=match) as listener:
             msg = listener.next(timeout)
 
         if msg is None:
             raise TimeoutError("Timeout waiting for group capacitance update")
 
-        raw = msg.measurements
+        raw = np.asarray(msg.measurements)
         calibrated = self.__calibrate_group_capacitance(raw)
-        return raw, calibrated
+        return raw.tolist(), calibrated.tolist()
 
     def get_parameter_definitions(self):
         """Get a list of all of the parameters supported by the PurpleDrop
@@ -514,33 +825,21 @@ class PurpleDropController(object):
         }
 
     def get_parameter(self, paramIdx):
-        """Request the current value of a parameter from the device
+        """Get the value of a parameter
+
+        The last value read from or written to the device is returned if
+        there is one. Otherwise, the value is requested from the device.
 
         Arguments:
           - paramIdx: The ID of the parameter to request (from the list of
             parameters provided by 'get_parameter_definition')
         """
         self.__ensure_device_connected()
-        req_msg = messages.SetParameterMsg()
-        req_msg.set_param_idx(paramIdx)
-        req_msg.set_param_value_int(0)
-        req_msg.set_write_flag(0)
-        def msg_filter(msg):
-            return isinstance(msg, messages.SetParameterMsg) and msg.param_idx() == paramIdx
-        with self.purpledrop.get_sync_listener(msg_filter=msg_filter) as listener:
-            self.purpledrop.send_message(req_msg)
-            resp = listener.next(timeout=0.5)
-        if resp is None:
-            raise TimeoutError("No response from purpledrop")
-        else:
-            paramDesc = self.__get_parameter_definition(paramIdx)
-            value = None
-            if paramDesc is not None and paramDesc['type'] == 'float':
-                value = resp.param_value_float()
-            else:
-                value = resp.param_value_int()
-            logger.debug(f"get_parameter({paramIdx}) returning {value}")
-            return value
+        value = self.parameter_values.get(paramIdx)
+        if value is None:
+            value = self.get_parameters([paramIdx])[paramIdx]
+        logger.debug(f"get_parameter({paramIdx}) returning {value}")
+        return value
 
     def set_parameter(self, paramIdx, value):
         """Set a config parameter
@@ -555,21 +854,52 @@ class PurpleDropController(object):
               value to assign
         """
         logging.debug(f"Received set_parameter({paramIdx}, {value})")
+        self.set_parameters({paramIdx: value})
+
+    def get_parameters(self, ids: Optional[Sequence[int]]=None, refresh: bool=False) -> Dict[int, Any]:
+        """Get the values of several parameters
+
+        Parameters without a known value are requested from the device
+        together, rather than one at a time.
+
+        Arguments:
+          - ids: Optional list of parameter IDs. If not provided, all
+            parameters in the definitions are returned.
+          - refresh: Optional. If true, all values are read from the device.
+
+        Returns: An object mapping each parameter ID to its value
+        """
         self.__ensure_device_connected()
-        req_msg = messages.SetParameterMsg()
-        req_msg.set_param_idx(paramIdx)
-        paramDesc = self.__get_parameter_definition(paramIdx)
-        if paramDesc is not None and paramDesc['type'] == 'float':
-            req_msg.set_param_value_float(value)
-        else:
-            req_msg.set_param_value_int(value)
-        req_msg.set_write_flag(1)
-        def msg_filter(msg):
-            return isinstance(msg, messages.SetParameterMsg) and msg.param_idx() == paramIdx
-        with self.purpledrop.get_sync_listener(msg_filter=msg_filter) as listener:
-            resp = self.__request_with_retry(req_msg, listener, timeout=0.5)
-        if resp is None:
-            raise TimeoutError(f"No response from purpledrop to set parameter ({paramIdx})")
+        if ids is None:
+            ids = [p['id'] for p in self.parameter_list]
+        ids = [int(x) for x in ids]
+        missing = ids if refresh else [x for x in ids if self.parameter_values.get(x) is None]
+        values = {x: self.parameter_values.get(x) for x in ids}
+        if len(missing) > 0:
+            values.update(self.__request_parameters({x: None for x in missing}))
+        return values
+
+    def set_parameters(self, values: Dict[int, Any]):
+        """Set several config parameters
+
+        The writes are sent together, and this returns once the device has
+        acknowledged all of them. Each write is resent independently if it is
+        not acknowledged, so they may be applied in any order. As with
+        set_parameter, writing parameter 0xFFFFFFFF saves parameters to flash.
+        If it is included, the save is sent after all of the other writes have
+        been acknowledged.
+
+        Arguments:
+          - values: An object mapping parameter IDs to their new values
+        """
+        self.__ensure_device_connected()
+        values = {int(k): v for k, v in values.items()}
+        save = SAVE_PARAMETERS_IDX in values
+        save_value = values.pop(SAVE_PARAMETERS_IDX, None)
+        if len(values) > 0:
+            self.__request_parameters(values)
+        if save:
+            self.__request_parameters({SAVE_PARAMETERS_IDX: save_value})
 
     def get_board_definition(self):
         """Get electrode board configuratin object
@@ -586,7 +916,7 @@ class PurpleDropController(object):
         Arguments: None
         """
         logging.debug("Received get_bulk_capacitance")
-        return self.calibrated_scan_capacitance
+        return self.calibrated_scan_capacitance[:self.scan_size].tolist()
 
     def get_scan_capacitance(self) -> Dict[str, Any]:
         """Get the most recent capacitance scan results
@@ -594,8 +924,8 @@ class PurpleDropController(object):
         Arguments: None
         """
         return {
-            "raw": self.raw_scan_capacitance,
-            "calibrated": self.calibrated_scan_capacitance
+            "raw": self.raw_scan_capacitance[:self.scan_size].astype(int).tolist(),
+            "calibrated": self.calibrated_scan_capacitance[:self.scan_size].tolist()
         }
 
     def get_group_capacitance(self) -> Dict[str, List[float]]:
@@ -604,8 +934,63 @@ class PurpleDropController(object):
         Arguments: None
         """
         return {
-            "raw": self.raw_group_capacitance,
-            "calibrated": self.calibrated_group_capacitance,
+            "raw": self.raw_group_capacitance[:self.group_size].astype(int).tolist(),
+            "calibrated": self.calibrated_group_capacitance[:self.group_size].tolist(),
+        }
+
+    def get_capacitance_history(self,
+                                kind: str,
+                                start: Optional[float]=None,
+                                end: Optional[float]=None,
+                                decimate: int=1) -> Dict[str, list]:
+        """Get recent capacitance measurements, at up to the full sample rate
+
+        Arguments:
+            - kind: One of "active", "group" or "scan"
+            - start: Optional earliest time, in seconds. Negative values are
+              relative to the current time, e.g. -5.0 for the last five
+              seconds. Otherwise, it is a time in seconds since the epoch, as
+              used in event timestamps.
+            - end: Optional latest time, in the same form as start
+            - decimate: Optional. Return only every Nth sample.
+
+        Returns: An object with the following fields:
+            - time: Receive time of each sample, in seconds since the epoch
+            - calibrated: Calibrated capacitance of each sample. For group and
+              scan capacitance, each sample is a list of values.
+            - raw: Raw counts of each sample
+        """
+        histories = {
+            'active': self.active_history,
+            'group': self.group_history,
+            'scan': self.scan_history,
+        }
+        if kind not in histories:
+            raise ValueError(f"Invalid capacitance kind '{kind}'. Must be one of {list(histories)}")
+        now_ns = time.monotonic_ns()
+        offset_ns = time.time_ns() - now_ns
+
+        def to_monotonic_ns(t):
+            if t is None:
+                return None
+            elif t < 0:
+                return now_ns + int(t * 1e9)
+            else:
+                return int(t * 1e9) - offset_ns
+
+        samples = histories[kind].query(to_monotonic_ns(start), to_monotonic_ns(end), decimate)
+        calibrated = samples.calibrated
+        raw = samples.raw
+        if kind == 'active':
+            calibrated = calibrated[:, 0]
+            raw = raw[:, 0]
+        elif kind == 'group':
+            calibrated = calibrated[:, :self.group_size]
+            raw = raw[:, :self.group_size]
+        return {
+            'time': ((samples.times + offset_ns) * 1e-9).tolist(),
+            'calibrated': calibrated.tolist(),
+            'raw': raw.tolist(),
         }
 
     def get_active_capacitance(self) -> float:
@@ -644,19 +1029,15 @@ class PurpleDropController(object):
         msg = messages.ElectrodeEnableMsg()
         msg.group_id = group_id + 100
         msg.setting = setting
-        msg.values = pinlist2mask(pins)
-        # TODO: Check for ACK; but as of 0.5.1 there is no ACK sent by embedded software to this command
-        #match = lambda m: isinstance(m, messages.CommandAckMsg) and m.acked_id == messages.ElectrodeEnableMsg.ID
-        #listener = self.purpledrop.get_sync_listener(match)
-        self.purpledrop.send_message(msg)
-        # msg = listener.next(timeout=1.0)
-        # listener.unregister()
-        # if msg is None:
-        #     logger.error("Timeout waiting for capacitance group ack")
-        # else:
-        #     logger.warn("Got ack")
+        pin_mask = pins_to_mask(pins)
+        msg.values = mask_to_bytes(pin_mask)
+        # As of 0.5.1 there is no ACK sent by embedded software to this command,
+        # so it is paced by the command window rather than waiting for a reply
+        self.purpledrop.command_window.send(msg)
         # Update local state
-        self.pin_state.scan_groups[group_id] = PinState.ScanGroup(pinlist2bool(pins), setting)
+        self.pin_state.scan_groups[group_id] = PinState.ScanGroup(pin_mask, setting)
+        self.group_gains[group_id] = CAPGAIN_HIGH if setting == 0 else CAPGAIN_LOW
+        self.__update_calibration_scale()
 
         # Send event with new state
         self.__fire_pinstate_event()
@@ -678,29 +1059,52 @@ class PurpleDropController(object):
 
         self.__ensure_device_connected()
 
+        # Let any scan group updates complete first, so that an ACK sent for
+        # them cannot be taken for the ACK of this message
+        self.purpledrop.command_window.wait()
+        ack = self.send_electrode_pins(pins, group_id, duty_cycle).get()
+        if ack is None:
+            logger.error("Received no ACK for set electrode pins")
+            raise TimeoutError("Received no ACK for set electrode pins")
+
+    def send_electrode_pins(self,
+                            pins: Sequence[int],
+                            group_id: int=0,
+                            duty_cycle: int=255) -> gevent.event.AsyncResult:
+        """Send new pins for a drive group, without waiting for the ACK
+
+        The local pin state is updated, and an electrode state event sent,
+        once the ACK is received. Since every ElectrodeEnableMsg is acked with
+        the same ID, the caller must wait for the result before sending
+        another command which is acked.
+
+        Returns: An AsyncResult which is set to the CommandAckMsg, or to None
+        if no ACK was received
+        """
         if group_id < 0 or group_id > 1:
             raise ValueError(f"group_id={group_id} is invalid. It must be 0 or 1.")
 
-        # Send message to device to update
         msg = messages.ElectrodeEnableMsg()
         msg.group_id = group_id
         msg.setting = duty_cycle
-        msg.values = pinlist2mask(pins)
-
-        match = lambda m: isinstance(m, messages.CommandAckMsg) and m.acked_id == messages.ElectrodeEnableMsg.ID
-
-        with self.purpledrop.get_sync_listener(match) as listener:
-            ack = self.__request_with_retry(msg, listener, timeout=0.5)
-
-        if ack is None:
-            logger.error("Received no ACK for set electrode pins")
-            raise TimeoutError("Received no ACK for set electrode pins")
-
-        # Update local state
-        self.pin_state.drive_groups[group_id] = PinState.DriveGroup(pinlist2bool(pins), duty_cycle)
-
-        # Send event with new state
-        self.__fire_pinstate_event()
+        pin_mask = pins_to_mask(pins)
+        msg.values = mask_to_bytes(pin_mask)
+
+        result = gevent.event.AsyncResult()
+        def on_complete(sent):
+            # This runs on the hub, so the result must be set even if the
+            # update fails, or the caller would wait for it forever
+            ack = sent.value
+            try:
+                if ack is not None:
+                    self.pin_state.drive_groups[group_id] = PinState.DriveGroup(pin_mask, duty_cycle)
+                    self.__fire_pinstate_event()
+            except Exception as e:
+                logger.exception(f"Error updating pin state: {e}")
+            finally:
+                result.set(ack)
+        self.purpledrop.command_window.send(msg, msg.ID).rawlink(on_complete)
+        return result
 
     def set_feedback_command(self, target, mode, input_groups_p_mask, input_groups_n_mask, baseline):
         """Update feedback control settings
@@ -772,6 +1176,83 @@ class PurpleDropController(object):
         self.__ensure_device_connected()
         return move_drops(self, moves)
 
+    def plan_routes(self, drops: List[Dict], spacing: int=1) -> List[List[List[int]]]:
+        """Plan collision free paths for several drops, without moving them
+
+        Arguments:
+            - drops: A list of drop route objects, as for route_drops
+            - spacing: Minimum number of empty electrodes kept between drops
+
+        Returns: A list of paths, one for each drop, each a list of [x, y]
+        grid locations of the top-left corner of the drop. All paths have the
+        same length.
+        """
+        logging.debug(f"Received plan_routes({drops})")
+        paths = plan_routes_in_thread(self.board_definition.layout, drops, spacing)
+        return [[list(p) for p in path] for path in paths]
+
+    def route_drops(self, drops: List[Dict], spacing: int=1) -> RouteResult:
+        """Move up to 5 drops to target locations along planned paths
+
+        Paths are planned on the board grid so that drops keep at least
+        `spacing` empty electrodes between them, and are then executed one
+        step at a time, moving every drop which moves in a step with a single
+        move_drops.
+
+        Arguments:
+            - drops: A list of drop route objects
+            - spacing: Minimum number of empty electrodes kept between drops
+
+        A drop route object can contain the following fields:
+            - start: Required. [x, y] location of the top-left corner of the drop.
+            - target: Required. [x, y] location to move the drop to.
+            - size: Optional. [width, height] of the drop. Default: [1, 1]
+            - timeout, post_capture_time, low_gain, threshold: Optional. As for
+                    move_drops.
+
+        The result has the following fields:
+            - success: True if every move completed
+            - paths: The planned paths, as returned by plan_routes
+            - steps: For each step executed, a list of the MoveDropResults of
+                    the drops moved in that step
+        """
+        logging.debug(f"Received route_drops({drops})")
+        self.__ensure_device_connected()
+        return route_drops(self, drops, spacing)
+
+    def run_sequence(self, steps: List[Dict]) -> SequenceResult:
+        """Apply a sequence of electrode settings on a fixed schedule
+
+        Each step is applied at its scheduled time, measured from the start of
+        the sequence, and held for its dwell time, or until its capacitance
+        condition is met. Returns once all steps are complete, with the
+        timing and capacitance of each step.
+
+        Arguments:
+            - steps: A list of step objects
+
+        A step object can contain the following fields:
+            - pins: Required. A list of pins to enable.
+            - group: Optional. Drive group to set, 0 or 1.
+            - duty_cycle: Optional. Duty cycle for the group (0-255).
+            - dwell: Required. Time to hold the step, in seconds.
+            - condition: Optional. An object with either an "above" or a
+                    "below" field, giving an active capacitance at which the
+                    step ends early, and optionally "required": true to stop
+                    the sequence if it is not reached within the dwell time.
+
+        The result has the following fields:
+            - completed: False if the sequence stopped early
+            - steps: A list of objects, one for each step executed, with the
+                    fields scheduled_time, start_time, ack_time, end_time
+                    (seconds from the start of the sequence), capacitance (the
+                    last active capacitance measured during the step) and
+                    condition_met
+        """
+        logging.debug(f"Received run_sequence with {len(steps)} steps")
+        self.__ensure_device_connected()
+        return run_sequence(self, steps)
+
     def get_temperatures(self) -> Sequence[float]:
         """Returns an array of all temperature sensor measurements in degrees C
 
@@ -856,8 +1337,7 @@ class PurpleDropController(object):
         msg.pin = gpio_num
         msg.read = True
 
-        with self.purpledrop.get_sync_listener(msg_filter=messages.GpioControlMsg) as listener:
-            rxmsg = self.__request_with_retry(msg, listener, timeout=0.5)
+        rxmsg = self.purpledrop.request(msg, messages.GpioControlMsg, gpio_num)
         if rxmsg is None:
             raise TimeoutError("No response from purpledrop to GPIO read request")
         else:
@@ -882,8 +1362,7 @@ class PurpleDropController(object):
         msg.value = value
         msg.output_enable = output_enable
 
-        with self.purpledrop.get_sync_listener(msg_filter=messages.GpioControlMsg) as listener:
-            rxmsg = self.__request_with_retry(msg, listener, timeout=0.5)
+        rxmsg = self.purpledrop.request(msg, messages.GpioControlMsg, gpio_num)
         if rxmsg is None:
             raise TimeoutError("No response from purpledrop to GPIO read request")
         else:
@@ -909,7 +1388,12 @@ class PurpleDropController(object):
         self.__ensure_device_connected()
         offsets = list(map(int, offsets))
         table = struct.pack("<f128H", voltage, *offsets)
+        # Keep the calibration, so it is reloaded on reconnect
+        self.electrode_calibration = ElectrodeOffsetCalibration(voltage, offsets)
 
+        # Chunks are pipelined, and each is acknowledged
+        window = self.purpledrop.command_window
+        results = []
         tx_pos = 0
         while tx_pos < len(table):
             tx_size = min(64, len(table) - tx_pos)
@@ -919,10 +1403,9 @@ class PurpleDropController(object):
             msg.payload_size = tx_size
             msg.payload = table[tx_pos:tx_pos+tx_size]
             tx_pos += tx_size
-            with self.purpledrop.get_sync_listener(messages.CommandAckMsg) as listener:
-                ack = self.__request_with_retry(msg, listener, timeout=0.5)
-            if ack is None:
-                raise TimeoutError("No ACK while setting electrode calibration")
+            results.append(window.send(msg, ack_key=msg.ID))
+        if any(result.get() is None for result in results):
+            raise TimeoutError("No ACK while setting electrode calibration")
 
     def set_scan_gains(self, gains: Optional[Sequence[bool]]=None):
         """Set the gains used for capacitance scan measurement
@@ -940,9 +1423,69 @@ class PurpleDropController(object):
                 raise ValueError("Scan gains must have 128 values")
             # Make sure they are all convertible to bool
             gains = [bool(x) for x in gains]
+        self.scan_gain_settings = gains
         self.__set_scan_gains(gains)
 
+    def get_listener_stats(self) -> List[Dict[str, Any]]:
+        """Get queue statistics for all active message listeners
+
+        Arguments: None
+
+        Returns: A list of objects, one per listener, with fields:
+          - name: Listener name
+          - capacity: Maximum queue length (0 for unlimited)
+          - policy: What happens when the queue is full ('block', 'drop_oldest',
+            'drop_newest', or 'coalesce_latest')
+          - depth: Current number of queued messages
+          - high_water: Maximum queue depth observed
+          - received: Number of messages received
+          - dropped: Number of messages discarded due to overflow
+        """
+        return self.purpledrop.get_listener_stats()
+
+    def get_connection_stats(self) -> Dict[str, Any]:
+        """Get device connection statistics
+
+        Arguments: None
+
+        Returns: An object with fields:
+          - connected: True if the device is connected
+          - reconnects: Number of times the connection was restored after
+            being lost
+          - last_reconnect_latency: Time in seconds from losing the connection
+            to reconnecting and restoring device state, for the most recent
+            reconnect, or null
+          - max_reconnect_latency: Largest reconnect time observed, or null
+        """
+        return self.purpledrop.get_connection_stats()
+
+    def get_event_queue_stats(self) -> Dict[str, Any]:
+        """Get statistics for the queue of events waiting to be sent to
+        listeners
+
+        Arguments: None
+
+        Returns: An object with fields:
+          - capacity: Maximum number of queued events
+          - depth: Current number of queued events
+          - high_water: Maximum queue depth observed
+          - published: Number of events delivered
+          - dropped: Number of events discarded because listeners fell behind
+          - mean_lag: Average time, in seconds, from queueing an event to
+            delivering it
+          - max_lag: Largest lag observed
+          - last_lag: Lag of the most recent event
+        """
+        return self.event_publisher.stats()
+
+    def flush_events(self, timeout: Optional[float]=1.0) -> bool:
+        """Wait until all queued events have been delivered to listeners
+
+        Returns: True if the queue was emptied within timeout
+        """
+        return self.event_publisher.flush(timeout)
+
     def get_scan_gains(self) -> List[bool]:
         """Return the current scan gain settings
         """
-        return [x == CAPGAIN_LOW for x in self.scan_gains]
\ No newline at end of file
+        return (self.scan_gains[:N_PINS] == CAPGAIN_LOW).tolist()
\ No newline at end of file
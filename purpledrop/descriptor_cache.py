@@ -0,0 +1,88 @@
+"""Persistent cache of device parameter descriptors
+
+The set of parameters a device supports is fixed by its software version, so
+the descriptors only need to be read from a device the first time it is seen
+with a given version. They are stored in a JSON file, keyed by serial number
+and software version, which is kept across server restarts.
+"""
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("purpledrop")
+
+def default_cache_path() -> str:
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'purpledrop', 'descriptors.json')
+
+class DescriptorCache(object):
+    def __init__(self, path: Optional[str]=None, persistent: bool=True):
+        """
+        Args:
+          path: Location of the cache file. Defaults to
+            `$XDG_CACHE_HOME/purpledrop/descriptors.json`.
+          persistent: If False, the cache is only kept in memory
+        """
+        self.path = (path or default_cache_path()) if persistent else None
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[dict]] = {}
+        if self.path is not None:
+            self._load()
+
+    @staticmethod
+    def key(serial_number: str, software_version: str) -> str:
+        return f"{serial_number}:{software_version}"
+
+    def get(self, serial_number: Optional[str], software_version: Optional[str]) -> Optional[List[dict]]:
+        """Return the cached descriptors for a device, or None
+        """
+        if not serial_number or not software_version:
+            return None
+        with self._lock:
+            descriptors = self._entries.get(self.key(serial_number, software_version))
+        if descriptors is None:
+            return None
+        return [dict(d) for d in descriptors]
+
+    def put(self, serial_number: Optional[str], software_version: Optional[str], descriptors: List[dict]):
+        """Store the descriptors read from a device
+
+        Devices without a serial number or software version are not cached,
+        since there is no way to tell them apart.
+        """
+        if not serial_number or not software_version:
+            return
+        with self._lock:
+            if self.path is not None:
+                # Pick up entries written by other controllers or processes
+                # sharing the file
+                self._load()
+            self._entries[self.key(serial_number, software_version)] = [dict(d) for d in descriptors]
+            if self.path is not None:
+                self._save()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable descriptor cache {self.path}: {e}")
+            return
+        if isinstance(entries, dict):
+            self._entries.update(entries)
+
+    def _save(self):
+        # Write to a temporary file and rename it, so that a crash can't leave
+        # a partially written cache
+        tmp_path = self.path + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to write descriptor cache {self.path}: {e}")
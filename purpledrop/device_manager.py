@@ -0,0 +1,227 @@
+"""Manages several PurpleDrop devices attached to one host
+
+The DeviceManager discovers devices by serial number, and creates a
+PersistentPurpleDropDevice and PurpleDropController for each one. Each device
+has its own receive and transmit greenlets, which wait on the event loop for
+their port, so a busy device does not hold up I/O for the others.
+
+RPC methods for a device are namespaced with its serial number, e.g.
+`<serial_number>.get_active_capacitance`, and events are delivered to
+listeners along with the serial number of the device they came from. Each
+listener is registered with every controller, so its event policies are
+applied separately for each device.
+"""
+import gevent
+import gevent.lock
+import logging
+import os
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .calibration import ElectrodeOffsetCalibration
+from .controller import PurpleDropController
+from .descriptor_cache import DescriptorCache
+from .electrode_board import Board
+from .event_policy import PolicySpec
+from .purpledrop import PersistentPurpleDropDevice, list_purpledrop_devices
+
+logger = logging.getLogger("purpledrop")
+
+def capture_path_for_device(capture_path: str, serial_number: str) -> str:
+    """Insert a serial number into a capture file path, so that each device
+    records to its own file
+
+    e.g. "session.pdcap" -> "session-<serial_number>.pdcap"
+    """
+    root, ext = os.path.splitext(capture_path)
+    return f"{root}-{serial_number}{ext}"
+
+class DeviceManager(object):
+    # Interval between checks for newly attached devices
+    SCAN_PERIOD = 5.0
+
+    def __init__(self,
+                 board_definition: Board,
+                 electrode_calibration: Optional[ElectrodeOffsetCalibration]=None,
+                 serial_numbers: Optional[Sequence[str]]=None,
+                 capture_path: Optional[str]=None,
+                 descriptor_cache: Optional[DescriptorCache]=None):
+        """
+        Args:
+          board_definition: Board used for all devices
+          electrode_calibration: Optional calibration loaded on all devices
+          serial_numbers: If provided, only devices with these serial numbers
+            are managed. Otherwise, every detected device is.
+          capture_path: If provided, raw serial data for each device is
+            recorded to a capture file named by inserting the device's serial
+            number before the extension.
+          descriptor_cache: Parameter descriptor cache shared by all
+            controllers. Defaults to an in-memory cache.
+        """
+        self.board_definition = board_definition
+        self.electrode_calibration = electrode_calibration
+        self.serial_numbers = list(serial_numbers) if serial_numbers else None
+        self.capture_path = capture_path
+        # Shared by all controllers
+        if descriptor_cache is None:
+            descriptor_cache = DescriptorCache(persistent=False)
+        self.descriptor_cache = descriptor_cache
+        self.devices: Dict[str, PersistentPurpleDropDevice] = {}
+        self.controllers: Dict[str, PurpleDropController] = {}
+        self.lock = gevent.lock.RLock()
+        # (func, policies, serial_number) for each registered event listener.
+        # serial_number is None for listeners to all devices.
+        self.event_listeners: List[Tuple[Callable, Optional[Dict[str, PolicySpec]], Optional[str]]] = []
+        # Per-device callbacks registered with controllers, by (func, serial_number)
+        self.__event_handlers: Dict[Tuple[Callable, str], Callable] = {}
+        self.device_added_listeners: List[Callable] = []
+        self.__thread: Optional[gevent.Greenlet] = None
+
+    def start(self):
+        """Begin managing devices
+
+        Devices named by serial number are added immediately, and connect
+        once they are attached. Other detected devices are added as they are
+        found.
+        """
+        if self.serial_numbers is not None:
+            for serial_number in self.serial_numbers:
+                self.__add_device(serial_number)
+        if self.__thread is None:
+            self.__thread = gevent.spawn(self.__thread_entry)
+
+    def stop(self):
+        if self.__thread is not None:
+            self.__thread.kill()
+            self.__thread = None
+
+    def scan(self) -> List[str]:
+        """Add any newly detected devices
+
+        Returns: A list of the serial numbers of added devices
+        """
+        added = []
+        for info in list_purpledrop_devices():
+            serial_number = info.serial_number
+            if serial_number is None or serial_number in self.controllers:
+                continue
+            if not self.accepts(serial_number):
+                continue
+            self.__add_device(serial_number)
+            added.append(serial_number)
+        return added
+
+    def get_controller(self, serial_number: str) -> PurpleDropController:
+        """Return the controller for a device
+
+        Raises KeyError if the device is not managed
+        """
+        return self.controllers[serial_number]
+
+    def list_devices(self) -> List[dict]:
+        """Get the managed devices
+
+        Returns: A list of objects with the following fields:
+          - serial_number
+          - connected: True if the device is currently attached
+        """
+        with self.lock:
+            return [
+                {'serial_number': serial_number, 'connected': device.connected()}
+                for serial_number, device in self.devices.items()
+            ]
+
+    def rpc_methods(self, serial_number: str) -> List[Tuple[str, Callable]]:
+        """Return the RPC methods of a device, namespaced by its serial number
+
+        Returns: A list of (name, method) tuples
+        """
+        controller = self.controllers[serial_number]
+        return [
+            (f"{serial_number}.{name}", getattr(controller, name))
+            for name in controller.RPC_METHODS
+        ]
+
+    def accepts(self, serial_number: str) -> bool:
+        """Check whether a device is, or may later be, managed
+        """
+        return self.serial_numbers is None or serial_number in self.serial_numbers
+
+    def register_event_listener(self,
+                                func: Callable,
+                                policies: Optional[Dict[str, PolicySpec]]=None,
+                                serial_number: Optional[str]=None):
+        """Register a callback for events from all devices, or from one
+
+        The callback is called with the serial number of the device, and the
+        PurpleDropEvent.
+
+        Args:
+          func: The callback
+          policies: Optional event policies, as for
+            PurpleDropController.register_event_listener
+          serial_number: If provided, only events from this device are
+            delivered. If it hasn't been added yet, the callback receives its
+            events once it is.
+
+        Raises ValueError if serial_number is not accepted by the manager's
+        serial number filter
+        """
+        if serial_number is not None and not self.accepts(serial_number):
+            raise ValueError(f"Device {serial_number} is not managed")
+        with self.lock:
+            self.event_listeners.append((func, policies, serial_number))
+            for sn, controller in self.controllers.items():
+                if serial_number is None or sn == serial_number:
+                    self.__subscribe(sn, controller, func, policies)
+
+    def unregister_event_listener(self, func: Callable):
+        with self.lock:
+            self.event_listeners = [l for l in self.event_listeners if l[0] != func]
+            for serial_number, controller in self.controllers.items():
+                handler = self.__event_handlers.pop((func, serial_number), None)
+                if handler is not None:
+                    controller.unregister_event_listener(handler)
+
+    def register_device_added_listener(self, func: Callable):
+        """Register a callback for newly added devices
+
+        The callback is called with the serial number and PurpleDropController
+        of the device. It is also called immediately for each device already
+        added.
+        """
+        with self.lock:
+            self.device_added_listeners.append(func)
+            for serial_number, controller in self.controllers.items():
+                func(serial_number, controller)
+
+    def __add_device(self, serial_number: str):
+        logger.info(f"Adding purpledrop {serial_number}")
+        capture_path = None
+        if self.capture_path is not None:
+            capture_path = capture_path_for_device(self.capture_path, serial_number)
+        device = PersistentPurpleDropDevice(serial_number, capture_path=capture_path)
+        controller = PurpleDropController(
+            device, self.board_definition, self.electrode_calibration, self.descriptor_cache)
+
+        with self.lock:
+            self.devices[serial_number] = device
+            self.controllers[serial_number] = controller
+            for func, policies, listener_serial_number in self.event_listeners:
+                if listener_serial_number is None or listener_serial_number == serial_number:
+                    self.__subscribe(serial_number, controller, func, policies)
+            for listener in self.device_added_listeners:
+                listener(serial_number, controller)
+
+    def __subscribe(self, serial_number: str, controller: PurpleDropController, func: Callable, policies):
+        def handle_event(event):
+            func(serial_number, event)
+        self.__event_handlers[(func, serial_number)] = handle_event
+        controller.register_event_listener(handle_event, policies)
+
+    def __thread_entry(self):
+        while True:
+            try:
+                self.scan()
+            except Exception as e:
+                logger.exception(e)
+            gevent.sleep(self.SCAN_PERIOD)
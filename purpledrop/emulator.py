@@ -0,0 +1,278 @@
+"""Emulates the PurpleDrop embedded software on a pseudo-terminal
+
+Unlike SimulatedPurpleDropDevice, which hands message objects directly to
+the driver, the emulator speaks the framed binary protocol over a pty. The
+driver connects to it with SerialPurpleDropDevice exactly as it would to a
+real device, so serialization, framing, and the serial receive path are all
+exercised. This allows end to end throughput and latency testing on a Linux
+host without hardware.
+
+The emulator reports active and group capacitance at 500Hz, full scans in
+chunks, and high voltage and temperature readings. It acknowledges commands
+and answers requests for the software version, parameters, and GPIOs.
+Electrode capacitance is static -- set with `set_electrode_capacitance` --
+rather than following a drop model.
+
+Linux/macOS only.
+"""
+import logging
+import os
+import select
+import threading
+import time
+import tty
+from typing import Any, Dict, List, Optional, Sequence
+
+import purpledrop.messages as messages
+from .message_framer import MessageFramer, serialize
+from .messages import predict_request_size
+
+logger = logging.getLogger("emulator")
+
+N_PINS = 128
+
+# Example parameters. The parameters of a real device are defined by its
+# software version.
+DEFAULT_PARAMETERS = [
+    {'id': 0, 'name': 'HV Target', 'description': 'High voltage target, in volts', 'type': 'float', 'value': 100.0},
+    {'id': 1, 'name': 'Sample Delay', 'description': 'Delay before capacitance sample, in ns', 'type': 'int', 'value': 500},
+    {'id': 2, 'name': 'Blanking Delay', 'description': 'Delay after drive switching, in ns', 'type': 'int', 'value': 1000},
+    {'id': 3, 'name': 'Feedback Gain', 'description': 'Proportional gain for feedback control', 'type': 'float', 'value': 0.5},
+]
+
+class PurpleDropEmulator(object):
+    # Rate of active and group capacitance messages
+    SAMPLE_RATE = 500.0
+    # Interval between full capacitance scans
+    SCAN_PERIOD = 0.1
+    # Number of electrodes reported in each BulkCapacitanceMsg of a scan
+    SCAN_CHUNK_SIZE = 16
+    HV_PERIOD = 0.1
+    TEMPERATURE_PERIOD = 1.0
+    N_SCAN_GROUPS = 5
+    # Data waiting to be read by the driver beyond this limit is discarded
+    MAX_TX_BACKLOG = 65536
+
+    def __init__(self,
+                 software_version: str='v0.6.0-emulator',
+                 parameters: Optional[List[Dict[str, Any]]]=None,
+                 hv_voltage: float=100.0):
+        self.software_version = software_version
+        self.hv_voltage = hv_voltage
+        self.parameters = {p['id']: dict(p) for p in (parameters or DEFAULT_PARAMETERS)}
+        self.capacitance = [0] * N_PINS
+        self.drive_groups = [[0] * 16, [0] * 16]
+        self.duty_cycles = [255, 255]
+        self.scan_groups = [([], 0)] * self.N_SCAN_GROUPS
+        self.gains = [0] * N_PINS
+        self.gpio_values: Dict[int, bool] = {}
+        self.calibration = bytearray()
+        # Count of received messages, by message class name
+        self.received: Dict[str, int] = {}
+        self.tx_dropped = 0
+
+        self._master_fd, self._slave_fd = os.openpty()
+        # The driver configures the port when it opens it, but until then the
+        # line discipline must not echo data back or buffer lines
+        tty.setraw(self._slave_fd)
+        os.set_blocking(self._master_fd, False)
+        self.port = os.ttyname(self._slave_fd)
+
+        self._framer = MessageFramer(predict_request_size)
+        self._tx_pending = bytearray()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self.run, name="PurpleDrop emulator", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        os.close(self._master_fd)
+        os.close(self._slave_fd)
+
+    def set_electrode_capacitance(self, pins: Sequence[int], value: int):
+        """Set the capacitance measurement, in counts, reported for electrodes
+        """
+        for p in pins:
+            self.capacitance[p] = value
+
+    def drive_pins(self) -> List[int]:
+        """Return the list of electrodes enabled in either drive group
+        """
+        return [p for p in range(N_PINS) if any(g[p // 8] & (1 << (p % 8)) for g in self.drive_groups)]
+
+    def run(self):
+        sample_period = 1.0 / self.SAMPLE_RATE
+        now = time.monotonic()
+        next_sample = now
+        next_scan = now
+        next_hv = now
+        next_temperature = now
+        while self._running:
+            timeout = max(0.0, next_sample - time.monotonic())
+            readable, _, _ = select.select([self._master_fd], [], [], timeout)
+            if readable:
+                try:
+                    data = os.read(self._master_fd, 4096)
+                except (BlockingIOError, OSError):
+                    data = b''
+                for buf in self._framer.parse(data):
+                    self._handle_message(buf)
+
+            now = time.monotonic()
+            if now < next_sample:
+                self._flush()
+                continue
+            next_sample += sample_period
+            if now - next_sample > 0.1:
+                # Don't try to catch up after a long stall
+                next_sample = now + sample_period
+            out = [self._active_capacitance(), self._group_capacitance()]
+            if now >= next_scan:
+                next_scan = now + self.SCAN_PERIOD
+                out += self._scan_capacitance()
+            if now >= next_hv:
+                next_hv = now + self.HV_PERIOD
+                msg = messages.HvRegulatorMsg()
+                msg.voltage = self.hv_voltage
+                msg.v_target_out = 1500
+                out.append(msg)
+            if now >= next_temperature:
+                next_temperature = now + self.TEMPERATURE_PERIOD
+                msg = messages.TemperatureMsg()
+                msg.measurements = [2500, 2510, 2490, 2505]
+                out.append(msg)
+            self._send(out)
+
+    def _send(self, msgs: Sequence[messages.PurpleDropMessage]):
+        if len(self._tx_pending) > self.MAX_TX_BACKLOG:
+            self.tx_dropped += len(msgs)
+        else:
+            self._tx_pending += b"".join(serialize(m.to_bytes()) for m in msgs)
+        self._flush()
+
+    def _flush(self):
+        if len(self._tx_pending) == 0:
+            return
+        try:
+            n = os.write(self._master_fd, self._tx_pending)
+        except BlockingIOError:
+            return
+        del self._tx_pending[:n]
+
+    def _ack(self, msg_id: int):
+        ack = messages.CommandAckMsg()
+        ack.acked_id = msg_id
+        self._send([ack])
+
+    def _active_capacitance(self) -> messages.ActiveCapacitanceMsg:
+        msg = messages.ActiveCapacitanceMsg()
+        msg.measurement = min(4095, sum(self.capacitance[p] for p in self.drive_pins()))
+        return msg
+
+    def _group_capacitance(self) -> messages.BulkCapacitanceMsg:
+        msg = messages.BulkCapacitanceMsg()
+        msg.group_scan = 1
+        msg.measurements = [min(4095, sum(self.capacitance[p] for p in pins)) for pins, _ in self.scan_groups]
+        return msg
+
+    def _scan_capacitance(self) -> List[messages.BulkCapacitanceMsg]:
+        chunks = []
+        for start in range(0, N_PINS, self.SCAN_CHUNK_SIZE):
+            msg = messages.BulkCapacitanceMsg()
+            msg.start_index = start
+            msg.measurements = self.capacitance[start:start + self.SCAN_CHUNK_SIZE]
+            chunks.append(msg)
+        return chunks
+
+    def _handle_message(self, buf: bytes):
+        msg_class = messages.PurpleDropMessage.findClassById(buf[0])
+        if msg_class is None:
+            logger.warning(f"Emulator received unknown message ID {buf[0]}")
+            return
+        try:
+            msg = msg_class(buf)
+        except (ValueError, RuntimeError) as e:
+            logger.warning(f"Emulator failed to decode {msg_class.__name__}: {e}")
+            return
+        name = msg_class.__name__
+        self.received[name] = self.received.get(name, 0) + 1
+
+        if isinstance(msg, messages.ElectrodeEnableMsg):
+            if msg.group_id >= 100:
+                # Scan group updates are not acknowledged
+                pins = [p for p in range(N_PINS) if msg.values[p // 8] & (1 << (p % 8))]
+                self.scan_groups[msg.group_id - 100] = (pins, msg.setting)
+            else:
+                self.drive_groups[msg.group_id] = msg.values
+                self.duty_cycles[msg.group_id] = msg.setting
+                self._ack(msg.ID)
+        elif isinstance(msg, messages.SetGainMsg):
+            self.gains[:len(msg.gains)] = msg.gains
+            self._ack(msg.ID)
+        elif isinstance(msg, messages.DataBlobMsg):
+            if msg.blob_id == messages.DataBlobMsg.SOFTWARE_VERSION_ID:
+                resp = messages.DataBlobMsg()
+                resp.blob_id = msg.blob_id
+                resp.payload = self.software_version.encode('utf-8')
+                resp.payload_size = len(resp.payload)
+                self._send([resp])
+            else:
+                end = msg.chunk_index + msg.payload_size
+                if len(self.calibration) < end:
+                    self.calibration.extend(bytes(end - len(self.calibration)))
+                self.calibration[msg.chunk_index:end] = msg.payload
+                self._ack(msg.ID)
+        elif isinstance(msg, messages.SetParameterMsg):
+            self._handle_set_parameter(msg)
+        elif isinstance(msg, messages.ParameterDescriptorMsg):
+            self._send_parameter_descriptors()
+        elif isinstance(msg, messages.GpioControlMsg):
+            if not msg.read:
+                self.gpio_values[msg.pin] = msg.value
+            resp = messages.GpioControlMsg()
+            resp.pin = msg.pin
+            resp.value = self.gpio_values.get(msg.pin, False)
+            self._send([resp])
+        elif isinstance(msg, messages.CalibrateCommandMsg):
+            self._ack(msg.ID)
+
+    def _handle_set_parameter(self, msg: messages.SetParameterMsg):
+        param = self.parameters.get(msg.param_idx())
+        resp = messages.SetParameterMsg()
+        resp.set_param_idx(msg.param_idx())
+        if param is not None:
+            if msg.write_flag():
+                if param['type'] == 'float':
+                    param['value'] = msg.param_value_float()
+                else:
+                    param['value'] = msg.param_value_int()
+            if param['type'] == 'float':
+                resp.set_param_value_float(param['value'])
+            else:
+                resp.set_param_value_int(param['value'])
+        self._send([resp])
+
+    def _send_parameter_descriptors(self):
+        out = []
+        params = sorted(self.parameters.values(), key=lambda p: p['id'])
+        for i, p in enumerate(params):
+            msg = messages.ParameterDescriptorMsg()
+            msg.param_id = p['id']
+            msg.value = p['value']
+            msg.sequence_number = i
+            msg.sequence_total = len(params)
+            msg.name = p['name']
+            msg.description = p['description']
+            msg.type = p['type']
+            out.append(msg)
+        self._send(out)
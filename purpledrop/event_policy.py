@@ -0,0 +1,173 @@
+"""Per-listener rate policies for controller events
+
+Each event listener can choose, for each type of event, which events it
+receives:
+
+  - full: Every event
+  - every:N: Every Nth event
+  - max_hz:F: At most F events per second
+  - latest: Every event, unless the listener is still busy with an earlier one.
+    Events which arrive while it is busy are replaced by newer ones, so a slow
+    listener only ever receives the most recent event.
+  - off: No events
+
+Event types are the names of the fields of the PurpleDropEvent `msg` oneof,
+e.g. 'active_capacitance' or 'hv_regulator'.
+"""
+import gevent
+import time
+from typing import Callable, Dict, Optional, Union
+
+class EventPolicy(object):
+    FULL = 'full'
+    EVERY = 'every'
+    MAX_HZ = 'max_hz'
+    LATEST = 'latest'
+    OFF = 'off'
+
+    def __init__(self, kind: str, n: int=1, hz: float=0.0):
+        if kind not in (self.FULL, self.EVERY, self.MAX_HZ, self.LATEST, self.OFF):
+            raise ValueError(f"Invalid event policy '{kind}'")
+        if kind == self.EVERY and n < 1:
+            raise ValueError("N must be at least 1")
+        if kind == self.MAX_HZ and hz <= 0:
+            raise ValueError("Rate must be greater than 0")
+        self.kind = kind
+        self.n = n
+        self.hz = hz
+
+    @classmethod
+    def full(cls) -> 'EventPolicy':
+        return cls(cls.FULL)
+
+    @classmethod
+    def every(cls, n: int) -> 'EventPolicy':
+        return cls(cls.EVERY, n=n)
+
+    @classmethod
+    def max_hz(cls, hz: float) -> 'EventPolicy':
+        return cls(cls.MAX_HZ, hz=hz)
+
+    @classmethod
+    def latest(cls) -> 'EventPolicy':
+        return cls(cls.LATEST)
+
+    @classmethod
+    def off(cls) -> 'EventPolicy':
+        return cls(cls.OFF)
+
+    @classmethod
+    def parse(cls, text: str) -> 'EventPolicy':
+        """Parse a policy from a string, e.g. 'full', 'every:10', 'max_hz:5',
+        'latest' or 'off'
+        """
+        kind, _, arg = text.partition(':')
+        try:
+            if kind == cls.EVERY:
+                return cls.every(int(arg))
+            elif kind == cls.MAX_HZ:
+                return cls.max_hz(float(arg))
+        except ValueError:
+            raise ValueError(f"Invalid event policy '{text}'")
+        if arg:
+            raise ValueError(f"Invalid event policy '{text}'")
+        return cls(kind)
+
+    def __eq__(self, other):
+        return isinstance(other, EventPolicy) and \
+            (self.kind, self.n, self.hz) == (other.kind, other.n, other.hz)
+
+    def __repr__(self):
+        if self.kind == self.EVERY:
+            return f"EventPolicy.every({self.n})"
+        elif self.kind == self.MAX_HZ:
+            return f"EventPolicy.max_hz({self.hz})"
+        return f"EventPolicy.{self.kind}()"
+
+PolicySpec = Union[EventPolicy, str]
+
+# Policies used for listeners which don't provide their own. High rate events
+# are reduced to 1 in 10; 500Hz is a lot for a browser to process. Blocks of
+# capacitance samples are only sent to listeners which ask for them.
+DEFAULT_EVENT_POLICIES: Dict[str, EventPolicy] = {
+    'active_capacitance': EventPolicy.every(10),
+    'group_capacitance': EventPolicy.every(10),
+    'duty_cycle_updated': EventPolicy.every(10),
+    'hv_regulator': EventPolicy.every(10),
+    'active_capacitance_block': EventPolicy.off(),
+    'group_capacitance_block': EventPolicy.off(),
+}
+
+class EventSubscription(object):
+    """A listener callback, along with its policies and their state
+
+    Event types without a policy are delivered at full rate.
+    """
+    def __init__(self, callback: Callable, policies: Optional[Dict[str, PolicySpec]]=None):
+        self.callback = callback
+        if policies is None:
+            policies = DEFAULT_EVENT_POLICIES
+        self.policies: Dict[str, EventPolicy] = {
+            event_type: p if isinstance(p, EventPolicy) else EventPolicy.parse(p)
+            for event_type, p in policies.items()
+        }
+        self._counts: Dict[str, int] = {}
+        self._last_times: Dict[str, float] = {}
+        self._latest: Dict[str, object] = {}
+        self._latest_greenlet: Optional[gevent.Greenlet] = None
+
+    def accepts(self, event_type: str) -> bool:
+        """Check whether the subscription receives any events of a type
+        """
+        policy = self.policies.get(event_type)
+        return policy is None or policy.kind != EventPolicy.OFF
+
+    def wants(self, event_type: str, now: Optional[float]=None) -> bool:
+        """Check whether the next event of a type is to be delivered
+
+        This updates the policy state, so it must be called exactly once for
+        each event of the type which is produced.
+
+        Args:
+          event_type: Name of the event field
+          now: Optional time.monotonic(), for callers checking many
+            subscriptions at once
+        """
+        policy = self.policies.get(event_type)
+        if policy is None:
+            return True
+        kind = policy.kind
+        if kind == EventPolicy.EVERY:
+            count = self._counts.get(event_type, 0) + 1
+            self._counts[event_type] = count
+            return count % policy.n == 0
+        elif kind == EventPolicy.OFF:
+            return False
+        elif kind == EventPolicy.MAX_HZ:
+            if now is None:
+                now = time.monotonic()
+            last = self._last_times.get(event_type)
+            if last is not None and now - last < 1.0 / policy.hz:
+                return False
+            self._last_times[event_type] = now
+            return True
+        return True
+
+    def deliver(self, event_type: str, event):
+        """Deliver an event which the subscription wants
+        """
+        policy = self.policies.get(event_type)
+        if policy is not None and policy.kind == EventPolicy.LATEST:
+            self._latest[event_type] = event
+            if self._latest_greenlet is None:
+                self._latest_greenlet = gevent.spawn(self.__deliver_latest)
+        else:
+            self.callback(event)
+
+    def __deliver_latest(self):
+        try:
+            while len(self._latest) > 0:
+                event_type = next(iter(self._latest))
+                self.callback(self._latest.pop(event_type))
+        finally:
+            self._latest_greenlet = None
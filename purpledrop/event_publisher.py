@@ -0,0 +1,187 @@
+"""Delivers events to listeners from a dedicated greenlet
+
+The controller handles received messages in the receive path, where any delay
+holds up the parsing of further messages. Rather than building events and
+calling listeners (e.g. websocket senders) there, it queues a job for each
+event with an EventPublisher, which delivers them from its own greenlet.
+
+The queue is bounded. If listeners fall behind, the oldest queued events are
+dropped so that the receive path never waits for them.
+
+Listeners receive each event as an EventEnvelope, which builds the
+PurpleDropEvent the first time it is used, and serializes it at most once no
+matter how many listeners (e.g. websocket clients) send it.
+"""
+import collections
+import gevent
+import gevent.event
+import logging
+import time
+from typing import Any, Callable, Dict, Optional, Sequence
+
+logger = logging.getLogger("purpledrop")
+
+class EventEnvelope(object):
+    """A PurpleDropEvent which is built on first use, and serialized at most
+    once
+
+    Attributes not defined by the envelope are looked up on the event, so it
+    can be used in place of a PurpleDropEvent. Since it is shared by all
+    listeners, the event must not be modified.
+    """
+    __slots__ = ('event_type', '_build', '_event', '_serialized')
+
+    def __init__(self, event_type: str, build: Callable[[], Any]):
+        """
+        Args:
+          event_type: Name of the event field, e.g. 'active_capacitance'
+          build: Called to create the PurpleDropEvent
+        """
+        self.event_type = event_type
+        self._build = build
+        self._event = None
+        self._serialized: Optional[bytes] = None
+
+    @classmethod
+    def wrap(cls, event) -> 'EventEnvelope':
+        """Create an envelope for an existing PurpleDropEvent
+        """
+        envelope = cls(event.WhichOneof('msg'), None)
+        envelope._event = event
+        return envelope
+
+    @property
+    def event(self):
+        """The PurpleDropEvent, built if necessary
+        """
+        if self._event is None:
+            self._event = self._build()
+            self._build = None
+        return self._event
+
+    def SerializeToString(self) -> bytes:
+        if self._serialized is None:
+            self._serialized = self.event.SerializeToString()
+        return self._serialized
+
+    def WhichOneof(self, name: str):
+        # The event type is known without building the event
+        if name == 'msg':
+            return self.event_type
+        return self.event.WhichOneof(name)
+
+    def __getattr__(self, name):
+        return getattr(self.event, name)
+
+class EventPublisher(object):
+    # At 500 messages/s, this holds at least one second of events
+    DEFAULT_CAPACITY = 1000
+
+    def __init__(self, capacity: int=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._queue: collections.deque = collections.deque()
+        self._ready = gevent.event.Event()
+        self._idle = gevent.event.Event()
+        self._idle.set()
+        self._thread: Optional[gevent.Greenlet] = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Clear all accumulated statistics
+        """
+        self.published = 0
+        self.dropped = 0
+        self.high_water = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = gevent.spawn(self.__thread_entry)
+
+    def stop(self):
+        if self._thread is not None:
+            self._thread.kill()
+            self._thread = None
+
+    def publish(self, event_type: str, build: Callable[[], Any], subscribers: Sequence):
+        """Queue an event for delivery
+
+        Args:
+          event_type: Name of the event field, e.g. 'active_capacitance'
+          build: Called to create the PurpleDropEvent, the first time a
+            listener uses it. It must not refer to state which may change
+            before it is called.
+          subscribers: EventSubscriptions to deliver the event to
+        """
+        if len(self._queue) >= self.capacity:
+            self._queue.popleft()
+            self.dropped += 1
+        self._queue.append((event_type, build, subscribers, time.monotonic()))
+        self.high_water = max(self.high_water, len(self._queue))
+        self._idle.clear()
+        self._ready.set()
+
+    def flush(self, timeout: Optional[float]=None) -> bool:
+        """Wait until all queued events have been delivered
+
+        Returns: True if the queue was emptied within timeout
+        """
+        return self._idle.wait(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue statistics
+
+        Returns: Object with the following fields:
+          - capacity: Maximum number of queued events
+          - depth: Current number of queued events
+          - high_water: Maximum queue depth observed
+          - published: Number of events delivered
+          - dropped: Number of events discarded because the queue was full
+          - mean_lag: Average time, in seconds, from queueing an event to
+            delivering it
+          - max_lag: Largest lag observed
+          - last_lag: Lag of the most recent event
+        """
+        mean_lag = self.total_lag / self.published if self.published > 0 else 0.0
+        return {
+            'capacity': self.capacity,
+            'depth': len(self._queue),
+            'high_water': self.high_water,
+            'published': self.published,
+            'dropped': self.dropped,
+            'mean_lag': mean_lag,
+            'max_lag': self.max_lag,
+            'last_lag': self.last_lag,
+        }
+
+    def __deliver(self, event_type, build, subscribers, queued_time):
+        lag = time.monotonic() - queued_time
+        self.published += 1
+        self.total_lag += lag
+        self.max_lag = max(self.max_lag, lag)
+        self.last_lag = lag
+        envelope = EventEnvelope(event_type, build)
+        for subscription in subscribers:
+            # An error in one listener must not keep the event from the others
+            try:
+                subscription.deliver(event_type, envelope)
+            except Exception as e:
+                logger.exception(f"Error publishing {event_type} event: {e}")
+
+    def __thread_entry(self):
+        while True:
+            self._ready.wait()
+            self._ready.clear()
+            while len(self._queue) > 0:
+                # Deliver the events queued so far, then let other greenlets,
+                # including the receive path, run before the next batch
+                batch = len(self._queue)
+                # Listeners may yield, letting new events arrive or old ones be
+                # dropped, so the queue is checked for each one
+                while batch > 0 and len(self._queue) > 0:
+                    self.__deliver(*self._queue.popleft())
+                    batch -= 1
+                gevent.sleep(0)
+            self._idle.set()
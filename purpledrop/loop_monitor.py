@@ -0,0 +1,63 @@
+"""Measures latency of the gevent event loop
+
+A greenlet repeatedly sleeps for a fixed interval and records how late it
+wakes up. Any greenlet (or blocking call) which holds the hub delays the
+wakeup, so the lag is a direct measure of how long other greenlets -- e.g.
+HTTP and websocket handlers -- may have to wait to be scheduled.
+"""
+import gevent
+import time
+from typing import Dict, Optional
+
+class LoopLagMonitor(object):
+    def __init__(self, interval: float=0.01):
+        self.interval = interval
+        self._thread: Optional[gevent.Greenlet] = None
+        self.reset()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = gevent.spawn(self.__thread_entry)
+
+    def stop(self):
+        if self._thread is not None:
+            self._thread.kill()
+            self._thread = None
+
+    def reset(self):
+        """Clear all accumulated statistics
+        """
+        self.count = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """Return event loop lag statistics, in seconds
+
+        Returns: Object with the following fields:
+          - interval: The nominal sleep interval used for measurement
+          - count: Number of measurements taken
+          - mean_lag: Average delay of wakeups beyond the interval
+          - max_lag: Largest delay observed
+          - last_lag: Delay of the most recent wakeup
+        """
+        mean_lag = self.total_lag / self.count if self.count > 0 else 0.0
+        return {
+            'interval': self.interval,
+            'count': self.count,
+            'mean_lag': mean_lag,
+            'max_lag': self.max_lag,
+            'last_lag': self.last_lag,
+        }
+
+    def __thread_entry(self):
+        while True:
+            start = time.perf_counter()
+            gevent.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - start - self.interval)
+            self.count += 1
+            self.total_lag += lag
+            self.last_lag = lag
+            if lag > self.max_lag:
+                self.max_lag = lag
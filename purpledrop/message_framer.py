@@ -1,74 +1,106 @@
 """Purple drop messages are transmitted using an encoding similar to that used
-by HDLC for asynchronous framing. 
+by HDLC for asynchronous framing.
 
 The framing serves to divide a stream of bytes into packets (messages).
 
 The framing doesn't care about the content of the messages, however in order
 to minimize the amount of bytes lost in the event of an error, the framer
-depends on knowledge of the packet lengths, which is provided in the form of 
+depends on knowledge of the packet lengths, which is provided in the form of
 the `size_predictor` function provided when creating a MessageFramer. This
 function will inspect partial contents of a message and determine if its valid
 and how many bytes are required to complete it -- i.e. the size_predictor
-knows where to find a message ID, which message IDs are valid ones, and how to 
-determine the length of a packet (which may be a function of the packet contents, 
+knows where to find a message ID, which message IDs are valid ones, and how to
+determine the length of a packet (which may be a function of the packet contents,
 for variable length messages).
 """
 from typing import Callable, Iterator, Optional, Tuple
+import itertools
 import logging
+import re
 
 logger = logging.getLogger()
 
-def calc_checksum(data: bytes) -> Tuple[int, int]:
-    a = 0
-    b = 0
-    for x in data:
-        a = (a + x) % 256
-        b = (b + a) % 256
+START_BYTE = 0x7e
+ESCAPE_BYTE = 0x7d
+
+# Matches either of the control characters which require special handling
+# while parsing. Bytes in between them can be copied in bulk.
+_CONTROL_RE = re.compile(b"[\x7d\x7e]")
 
+def calc_checksum(data: bytes) -> Tuple[int, int]:
+    # Same result as accumulating a and b one byte at a time modulo 256, but
+    # the summations run in C
+    a = sum(data) & 0xff
+    b = sum(itertools.accumulate(data)) & 0xff
     return (a, b)
 
 def serialize(input: bytes) -> bytes:
-    """Convert a message into a framed message ready to be sent with packet 
+    """Convert a message into a framed message ready to be sent with packet
     start, control code escaping, and checksum.
     """
     chk_a, chk_b = calc_checksum(input)
-
-    out = [0x7e]
-    def add_byte(b):
-        if b == 0x7d or b == 0x7e:
-            out.append(0x7d)
-            out.append(b ^ 0x20)
-        else:
-            out.append(b)
-
-    for b in input:
-        add_byte(b)
-        
-    add_byte(chk_a)
-    add_byte(chk_b)
-    return bytes(out)
+    body = bytes(input) + bytes((chk_a, chk_b))
+    # The escape byte must be replaced first, so that the escapes inserted for
+    # start bytes are not themselves escaped
+    body = body.replace(b"\x7d", b"\x7d\x5d").replace(b"\x7e", b"\x7d\x5e")
+    return b"\x7e" + body
 
 class MessageFramer(object):
     """Class for framing an incoming stream of bytes into messages
+
+    Data can be fed in either with `parse`, which works on whole receive
+    buffers at a time, or with `parse_byte`. Both produce the same messages
+    and share parser state, so they may be mixed.
     """
     def __init__(self, size_predictor: Callable[[bytes], int]):
-        self._buffer = b""
+        self._buffer = bytearray()
         self._size_predictor = size_predictor
+        self._expected_size = 0
         self._escaping = False
         self._parsing = False
 
-    def parse(self, bytes: bytearray) -> Iterator[bytes]:
+    def parse(self, data: bytes) -> Iterator[bytes]:
         """Parse an array of bytes, and yield any messages completed
 
+        The buffer is scanned for control characters, and the runs of plain
+        data between them are copied into the message buffer in bulk.
+
         Example:
-            newdata = read_data_from_somewhere() 
+            newdata = read_data_from_somewhere()
             for packet in parser.parse(newdata):
                 HandleNewMessage(packet)
         """
-        for b in bytes:
-            msg = self.parse_byte(b)
-            if msg is not None:
-                yield msg
+        if not isinstance(data, (bytes, bytearray)):
+            data = bytes(data)
+        pos = 0
+        end = len(data)
+        while pos < end:
+            if self._escaping:
+                # The byte following an escape is never a control character
+                self._escaping = False
+                if self._parsing:
+                    msg = self._append(bytes((data[pos] ^ 0x20,)))
+                    if msg is not None:
+                        yield msg
+                pos += 1
+                continue
+
+            match = _CONTROL_RE.search(data, pos)
+            ctrl_pos = end if match is None else match.start()
+
+            if self._parsing and ctrl_pos > pos:
+                msg = self._append(data[pos:ctrl_pos])
+                if msg is not None:
+                    yield msg
+
+            if match is None:
+                break
+
+            if data[ctrl_pos] == ESCAPE_BYTE:
+                self._escaping = True
+            else:
+                self._start_frame()
+            pos = ctrl_pos + 1
 
     def parse_byte(self, b: int) -> Optional[bytes]:
         """Parse a single new byte of data
@@ -79,43 +111,66 @@ class MessageFramer(object):
         if self._escaping:
             b = b ^ 0x20
             self._escaping = False
-        elif b == 0x7d:
+        elif b == ESCAPE_BYTE:
             # Escape control character
             self._escaping = True
             return None
-        elif b == 0x7e:
-            if self._parsing and len(self._buffer) > 0:
-                logger.warning(f"Aborted parsing a message (ID={self._buffer[0]})")
-            # start of frame
-            self.reset()
-            self._parsing = True
+        elif b == START_BYTE:
+            self._start_frame()
             return None
 
-        if not self._parsing: 
+        if not self._parsing:
             return None
 
-        self._buffer += bytes([b])
-
-        expected_size = self._size_predictor(self._buffer)
-        if expected_size == -1:
-            logger.warning("Got invalid message size")
-            # Not a valid message
-            self.reset()
-        elif expected_size > 0 and len(self._buffer) >= expected_size + 2:
-            msg_without_checksum = self._buffer[:-2]
-            calc_a, calc_b = calc_checksum(msg_without_checksum)
-            if calc_a == self._buffer[-2] and calc_b == self._buffer[-1]:
-                self.reset()
-                return msg_without_checksum
-            else:
-                logger.warning(f"Checksum mismatch (id: {self._buffer[0]}, buf: {[hex(a) for a in self._buffer]})")
-                self.reset()
-        
-        return None
+        return self._append(bytes((b,)))
 
     def reset(self):
         self._escaping = False
         self._parsing = False
-        self._buffer = b""
+        self._expected_size = 0
+        self._buffer = bytearray()
 
+    def _start_frame(self):
+        if self._parsing and len(self._buffer) > 0:
+            logger.warning(f"Aborted parsing a message (ID={self._buffer[0]})")
+        self.reset()
+        self._parsing = True
+
+    def _append(self, data: bytes) -> Optional[bytes]:
+        """Add unescaped bytes to the message in progress
+
+        The size predictor is only consulted until it reports a size for the
+        message. Any bytes beyond the end of the message are discarded, as they
+        would be while waiting for the next start of frame.
+        """
+        buf = self._buffer
+        pos = 0
+        while self._expected_size == 0:
+            if pos >= len(data):
+                return None
+            buf.append(data[pos])
+            pos += 1
+            expected_size = self._size_predictor(buf)
+            if expected_size == -1:
+                logger.warning("Got invalid message size")
+                # Not a valid message
+                self.reset()
+                return None
+            self._expected_size = expected_size
+
+        frame_size = self._expected_size + 2
+        remaining = frame_size - len(buf)
+        if remaining > 0:
+            buf += data[pos:pos + remaining]
+        if len(buf) < frame_size:
+            return None
 
+        msg_without_checksum = bytes(buf[:-2])
+        calc_a, calc_b = calc_checksum(msg_without_checksum)
+        if calc_a == buf[-2] and calc_b == buf[-1]:
+            self.reset()
+            return msg_without_checksum
+        else:
+            logger.warning(f"Checksum mismatch (id: {buf[0]}, buf: {[hex(a) for a in buf]})")
+            self.reset()
+        return None
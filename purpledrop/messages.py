@@ -1,64 +1,139 @@
 """Defines messages transmitted between purpledrop microcontroller and driver
 via the USB channel
 """
+import numpy as np
 import struct
-from typing import Optional, Sequence, Type, Union
+import sys
+import time
+from typing import Callable, Dict, Optional, Sequence, Type, Union
+
+# Message ID -> message class. Populated automatically as message classes are
+# defined.
+_MESSAGE_CLASSES: Dict[int, Type['PurpleDropMessage']] = {}
+# Message ID -> size in bytes for fixed size messages, or a size predictor
+# function for variable length messages. Messages which are never received
+# by the driver are left out.
+_SIZE_PREDICTORS: Dict[int, Union[int, Callable[[bytes], int]]] = {}
+
+def _unpack_array(buf: bytes, offset: int, count: int, fmt: str) -> Sequence[int]:
+    """Return `count` little-endian 16-bit values from buf, starting at offset
+
+    On little-endian hosts, this is a memoryview onto buf, so the values are
+    not copied.
+    """
+    if sys.byteorder == 'little':
+        return memoryview(buf)[offset:offset + count * 2].cast(fmt)
+    else:
+        return struct.unpack_from("<" + fmt * count, buf, offset)
+
+def get_rx_time_ns(msg: 'PurpleDropMessage') -> int:
+    """Get the monotonic receive time of a message
+
+    Falls back to the current time for messages which weren't stamped on
+    receipt, e.g. those generated by a simulated device.
+    """
+    rx_time_ns = msg.rx_time_ns
+    if rx_time_ns is None:
+        return time.monotonic_ns()
+    return rx_time_ns
 
 class PurpleDropMessage(object):
+    # rx_time_ns: Monotonic time, in nanoseconds, at which the message was
+    # read from the device. Only set on received messages.
+    __slots__ = ('rx_time_ns',)
+
+    # Size of the message in bytes, for messages with a fixed length.
+    # Variable length messages leave this as None and provide a predictSize
+    # static method instead.
+    SIZE: Optional[int] = None
+
+    def __init__(self):
+        self.rx_time_ns: Optional[int] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        msg_id = cls.__dict__.get('ID')
+        if msg_id is None:
+            return
+        if msg_id in _MESSAGE_CLASSES:
+            raise ValueError(f"Message ID {msg_id} is used by both "
+                f"{_MESSAGE_CLASSES[msg_id].__name__} and {cls.__name__}")
+        _MESSAGE_CLASSES[msg_id] = cls
+        if cls.SIZE is not None:
+            _SIZE_PREDICTORS[msg_id] = cls.SIZE
+        elif 'predictSize' in cls.__dict__:
+            _SIZE_PREDICTORS[msg_id] = cls.predictSize
+
     @classmethod
     def predictSize(cls, buf: bytes) -> int:
         if len(buf) == 0:
             return 0
-        msg_class = cls.findClassById(buf[0])
-        if msg_class is None:
+        predictor = _SIZE_PREDICTORS.get(buf[0])
+        if predictor is None:
             return -1
-        return msg_class.predictSize(buf)
+        if type(predictor) is int:
+            return predictor
+        return predictor(buf)
 
     @classmethod
     def findClassById(cls, id: int) -> Optional[Type]:
-        for sub_type in cls.__subclasses__():
-            if getattr(sub_type, 'ID') == id:
-                return sub_type
-        return None
+        return _MESSAGE_CLASSES.get(id)
 
     @classmethod
-    def from_bytes(cls, buf: bytes) -> object:
+    def from_bytes(cls, buf: bytes, rx_time_ns: Optional[int]=None) -> object:
         if len(buf) == 0:
             return None
-        msg_class = cls.findClassById(buf[0])
+        msg_class = _MESSAGE_CLASSES.get(buf[0])
         if msg_class is None:
             return None
         # TODO: Handle errors here. There's no guarantee that the frame we receive
         # is proper.
-        return msg_class(buf)
+        msg = msg_class(buf)
+        if rx_time_ns is not None:
+            msg.rx_time_ns = rx_time_ns
+        return msg
 
     def to_bytes(self) -> bytes:
         raise RuntimeError("Abstract method called")
 
 class ActiveCapacitanceMsg(PurpleDropMessage):
     ID = 3
+    SIZE = 6
+
+    __slots__ = ('baseline', 'measurement', 'settings')
+    _STRUCT = struct.Struct("<HHB")
 
     def __init__(self, fill_data: Optional[bytes]=None):
+        super().__init__()
         self.baseline = 0
         self.measurement = 0
         self.settings = 0
         if fill_data is not None:
             self.fill(fill_data)
 
-    @staticmethod
-    def predictSize(buf: bytes) -> int:
-        return 6
-
     def fill(self, fill_data):
-        self.baseline, self.measurement, self.settings = struct.unpack_from("<HHB", fill_data, 1)
+        self.baseline, self.measurement, self.settings = self._STRUCT.unpack_from(fill_data, 1)
+
+    def to_bytes(self) -> bytes:
+        return bytes((self.ID,)) + self._STRUCT.pack(self.baseline, self.measurement, self.settings)
 
     def __str__(self):
         return f"ActiveCapacitanceMsg(baseline={self.baseline}, measurement={self.measurement}, settings={self.settings})"
 
 class BulkCapacitanceMsg(PurpleDropMessage):
+    """Capacitance measurements for a range of electrodes, or for the scan
+    groups
+
+    When decoded from a received frame, `measurements` is a read-only view of
+    the uint16 values in the frame rather than a copy.
+    """
     ID = 2
 
+    __slots__ = ('group_scan', 'start_index', 'count', 'measurements')
+    _HEADER = struct.Struct("<BBB")
+
     def __init__(self, fill_data: Optional[bytes]=None):
+        super().__init__()
         self.group_scan = 0
         self.start_index = 0
         self.count = 0
@@ -76,50 +151,59 @@ class BulkCapacitanceMsg(PurpleDropMessage):
     def fill(self, buf):
         if len(buf) < 4:
             raise ValueError("Need at least 4 bytes to parse a BulkCapacitanceMsg")
-        self.group_scan, self.start_index, self.count = struct.unpack_from("<BBB", buf, 1)
+        self.group_scan, self.start_index, self.count = self._HEADER.unpack_from(buf, 1)
         if len(buf) < self.count * 2 + 4:
             raise ValueError(f"Not enough data for BulkCapacitanceMsg with count {self.count}")
-        self.measurements = struct.unpack_from("<" + "H" * self.count, buf, 4)
+        self.measurements = _unpack_array(buf, 4, self.count, 'H')
+
+    def to_bytes(self) -> bytes:
+        count = len(self.measurements)
+        return bytes((self.ID,)) + self._HEADER.pack(self.group_scan, self.start_index, count) + \
+            struct.pack(f"<{count}H", *self.measurements)
 
 class CalibrateCommandMsg(PurpleDropMessage):
     ID = 13
+    SIZE = 2
 
     CAP_OFFSET_CMD = 0
 
+    __slots__ = ('command',)
+    _STRUCT = struct.Struct("<BB")
+
     def __init__(self, fill_data: Optional[bytes]=None):
+        super().__init__()
         self.command: Optional[int] = None
         if fill_data is not None:
             self.fill(fill_data)
 
-    @staticmethod
-    def predictSize(buf: bytes) -> int:
-        return 2
-
     def fill(self, fill_data: bytes):
         if len(fill_data) < 2:
             raise ValueError("Need at least 2 bytes to parse a CalibrateCommandMsg")
         self.command = int(fill_data[1])
 
     def to_bytes(self) -> bytes:
-        return struct.pack("<BB", self.ID, self.command)
+        return self._STRUCT.pack(self.ID, self.command)
 
 class CommandAckMsg(PurpleDropMessage):
     ID = 4
+    SIZE = 2
+
+    __slots__ = ('acked_id',)
 
     def __init__(self, fill_data: Optional[bytes]=None):
+        super().__init__()
         self.acked_id = 0
         if fill_data is not None:
             self.fill(fill_data)
 
-    @staticmethod
-    def predictSize(buf: bytes) -> int:
-        return 2
-
     def fill(self, buf):
         if len(buf) < 2:
             raise ValueError("Require at least 2 bytes to parse a CommandAckMsg")
         self.acked_id = buf[1]
 
+    def to_bytes(self) -> bytes:
+        return bytes((self.ID, self.acked_id))
+
     def __str__(self):
         return f"CommandAckMsg(acked_id={self.acked_id})"
 
@@ -130,7 +214,11 @@ class DataBlobMsg(PurpleDropMessage):
     SOFTWARE_VERSION_ID = 0
     OFFSET_CALIBRATION_ID = 1
 
+    __slots__ = ('blob_id', 'chunk_index', 'payload_size', 'payload')
+    _HEADER = struct.Struct("<BBBH")
+
     def __init__(self, fill_data: Optional[bytes]=None):
+        super().__init__()
         self.blob_id = 0
         self.chunk_index = 0
         self.payload_size = 0
@@ -148,32 +236,30 @@ class DataBlobMsg(PurpleDropMessage):
     def fill(self, fill_data: bytes):
         if len(fill_data) < 5:
             raise ValueError("Need at least 5 bytes for a DataBlobMsg")
-        self.blob_id = fill_data[1]
-        self.payload_size = fill_data[2]
-        self.chunk_index = struct.unpack_from("<H", fill_data, 3)[0]
+        _id, self.blob_id, self.payload_size, self.chunk_index = self._HEADER.unpack_from(fill_data, 0)
         if len(fill_data) < 5 + self.payload_size:
             print(f"Insufficient data for DataBlobMsg. "\
             "payload_size={self.payload_size}, only {len(fill_data)} bytes")
         self.payload = fill_data[5:5+self.payload_size]
 
     def to_bytes(self) -> bytes:
-        ret = struct.pack("<BBBH", self.ID, self.blob_id, self.payload_size, self.chunk_index)
+        ret = self._HEADER.pack(self.ID, self.blob_id, self.payload_size, self.chunk_index)
         ret += self.payload
         return ret
 
 class DutyCycleUpdatedMsg(PurpleDropMessage):
     ID = 15
+    SIZE = 3
+
+    __slots__ = ('duty_cycle_A', 'duty_cycle_B')
 
     def __init__(self, fill_data: Optional[bytes]=None):
+        super().__init__()
         self.duty_cycle_A = 0
         self.duty_cycle_B = 0
         if(fill_data):
             self.fill(fill_data)
 
-    @staticmethod
-    def predictSize(buf: bytes) -> int:
-        return 3
-
     def fill(self, fill_data: bytes):
         if len(fill_data) < 3:
             raise ValueError("Need at least 3 bytes for a DutyCycleUpdated message")
@@ -181,6 +267,9 @@ class DutyCycleUpdatedMsg(PurpleDropMessage):
         self.duty_cycle_A = fill_data[1]
         self.duty_cycle_B = fill_data[2]
 
+    def to_bytes(self) -> bytes:
+        return bytes((self.ID, self.duty_cycle_A, self.duty_cycle_B))
+
 class FeedbackCommandMsg(PurpleDropMessage):
     ID = 16
 
@@ -189,18 +278,27 @@ class FeedbackCommandMsg(PurpleDropMessage):
     NORMAL = 1
     DIFFERENTIAL = 2
 
+    __slots__ = ('target', 'mode', 'input_groups_p_mask', 'input_groups_n_mask', 'baseline')
+    _STRUCT = struct.Struct("<BfBBBB")
+
     def __init__(self, fill_data: Optional[bytes]=None):
+        super().__init__()
         self.target = 0.0
         self.mode = 0
         self.input_groups_p_mask = 0
         self.input_groups_n_mask = 0
         self.baseline = 0
         if(fill_data):
-            raise RuntimeError("Receiving FeedbackCommandMsg unimplemented")
+            self.fill(fill_data)
+
+    def fill(self, fill_data: bytes):
+        if len(fill_data) < self._STRUCT.size:
+            raise ValueError(f"Need at least {self._STRUCT.size} bytes for a FeedbackCommandMsg")
+        _id, self.target, self.mode, self.input_groups_p_mask, self.input_groups_n_mask, self.baseline = \
+            self._STRUCT.unpack_from(fill_data, 0)
 
     def to_bytes(self) -> bytes:
-        return struct.pack(
-            "<BfBBBB",
+        return self._STRUCT.pack(
             self.ID,
             self.target,
             self.mode,
@@ -211,37 +309,46 @@ class FeedbackCommandMsg(PurpleDropMessage):
 
 class ElectrodeEnableMsg(PurpleDropMessage):
     ID = 0
+    SIZE = 19
+
+    __slots__ = ('group_id', 'setting', 'values')
+    _HEADER = struct.Struct("<BBB")
 
     def __init__(self, fill_data: Optional[bytes]=None):
+        super().__init__()
         self.group_id = 0
         self.setting = 0
         self.values = [0] * 16
+        if fill_data is not None:
+            self.fill(fill_data)
 
-    @staticmethod
-    def predictSize(buf: bytes) -> int:
-        return 19
+    def fill(self, fill_data: bytes):
+        if len(fill_data) < 19:
+            raise ValueError("Need at least 19 bytes for an ElectrodeEnableMsg")
+        _id, self.group_id, self.setting = self._HEADER.unpack_from(fill_data, 0)
+        self.values = list(fill_data[3:19])
 
     def to_bytes(self):
-        return struct.pack("<BBB" + "B" * len(self.values),
-            *([self.ID, self.group_id, self.setting] + self.values))
+        return self._HEADER.pack(self.ID, self.group_id, self.setting) + bytes(self.values)
 
 class GpioControlMsg(PurpleDropMessage):
     ID = 14
+    SIZE = 3
 
     VALUE_FLAG = 1
     OUTPUT_FLAG = 2
     READ_FLAG = 128
 
+    __slots__ = ('pin', 'flags')
+    _STRUCT = struct.Struct("<BBB")
+
     def __init__(self, fill_data: Optional[bytes]=None):
+        super().__init__()
         self.pin = 0
         self.flags = 0
         if fill_data is not None:
             self.fill(fill_data)
 
-    @staticmethod
-    def predictSize(buf: bytes) -> int:
-        return 3
-
     def fill(self, fill_data: bytes):
         if len(fill_data) < 3:
             raise ValueError("Need at least 3 bytes for a GpioControlMsg")
@@ -249,7 +356,7 @@ class GpioControlMsg(PurpleDropMessage):
         self.flags = fill_data[2]
 
     def to_bytes(self) -> bytes:
-        return struct.pack("<BBB", self.ID, self.pin, self.flags)
+        return self._STRUCT.pack(self.ID, self.pin, self.flags)
 
     @property
     def value(self):
@@ -287,7 +394,15 @@ class GpioControlMsg(PurpleDropMessage):
 class ParameterDescriptorMsg(PurpleDropMessage):
     ID = 12
 
+    __slots__ = ('param_id', 'value', 'sequence_number', 'sequence_total', 'name', 'description', 'type')
+    # ID, string size, param ID, raw value, sequence number, sequence total
+    _HEADER = struct.Struct("<BHI4sHH")
+    _FLOAT = struct.Struct("<f")
+    _INT = struct.Struct("<i")
+    _STR_SIZE = struct.Struct("<H")
+
     def __init__(self, fill_data: Optional[bytes]=None):
+        super().__init__()
         self.param_id: Optional[int] = None
         self.value: Optional[Union[float, int]] = None
         self.sequence_number: Optional[int] = None
@@ -303,40 +418,61 @@ class ParameterDescriptorMsg(PurpleDropMessage):
     def predictSize(buf: bytes) -> int:
         if len(buf) < 3:
             return 0
-        str_size = struct.unpack_from("<H", buf, 1)[0]
+        str_size = ParameterDescriptorMsg._STR_SIZE.unpack_from(buf, 1)[0]
         return str_size + 15
 
     def fill(self, fill_data: bytes):
-        str_size, self.param_id = struct.unpack_from("<HI", fill_data, 1)
-        str_section = fill_data[15:]
-        separators = [i for i, b in enumerate(str_section) if b == 0]
-        if len(separators) != 2:
-            raise ValueError(f"Expected two string separators in ParameterDescriptorMsg, found {len(separators)}")
-        self.name = str_section[0:separators[0]].decode('utf-8')
-        self.description = str_section[separators[0]+1:separators[1]].decode('utf-8')
-        self.type = str_section[separators[1]+1:].decode('utf-8')
+        if len(fill_data) == 1:
+            # A request for descriptors, which carries no fields
+            return
+        _id, str_size, self.param_id, raw_value, self.sequence_number, self.sequence_total = \
+            self._HEADER.unpack_from(fill_data, 0)
+        strings = bytes(fill_data[15:]).split(b'\x00')
+        if len(strings) != 3:
+            raise ValueError(f"Expected two string separators in ParameterDescriptorMsg, found {len(strings) - 1}")
+        self.name, self.description, self.type = [x.decode('utf-8') for x in strings]
 
         if self.type == 'float':
-            self.value = struct.unpack_from("<f", fill_data, 7)[0]
+            self.value = self._FLOAT.unpack(raw_value)[0]
         else:
-            self.value = struct.unpack_from("<i", fill_data, 7)[0]
-
-        self.sequence_number, self.sequence_total = struct.unpack_from("<HH", fill_data, 11)
+            self.value = self._INT.unpack(raw_value)[0]
 
     def to_bytes(self) -> bytes:
-        # Send request message
-        return struct.pack("<B", self.ID)
+        # A message without a param_id is the request for descriptors
+        if self.param_id is None:
+            return bytes((self.ID,))
+        if self.type == 'float':
+            raw_value = self._FLOAT.pack(self.value)
+        else:
+            raw_value = self._INT.pack(self.value)
+        strings = b'\x00'.join(x.encode('utf-8') for x in (self.name, self.description, self.type))
+        header = self._HEADER.pack(self.ID, len(strings), self.param_id, raw_value,
+            self.sequence_number, self.sequence_total)
+        return header + strings
 
 class SetGainMsg(PurpleDropMessage):
     ID = 11
 
+    __slots__ = ('gains',)
+
     def __init__(self, fill_data: Optional[bytes]=None):
+        super().__init__()
         self.gains: Sequence[int] = []
+        if fill_data is not None:
+            self.fill(fill_data)
 
     @staticmethod
     def predictSize(buf: bytes) -> int:
         return -1
 
+    def fill(self, fill_data: bytes):
+        if len(fill_data) < 2:
+            raise ValueError("Need at least 2 bytes for a SetGainMsg")
+        count = fill_data[1]
+        if len(fill_data) < 2 + (count + 3) // 4:
+            raise ValueError(f"Not enough data for SetGainMsg with count {count}")
+        self.gains = [(fill_data[2 + i // 4] >> ((i % 4) * 2)) & 0x3 for i in range(count)]
+
     def to_bytes(self):
         # Store a count byte, and then 2 bits per gain
         data = [self.ID, len(self.gains)]
@@ -352,8 +488,15 @@ class SetGainMsg(PurpleDropMessage):
 
 class SetParameterMsg(PurpleDropMessage):
     ID = 6
+    SIZE = 10
+
+    __slots__ = ('_buf',)
+    _IDX = struct.Struct("<I")
+    _FLOAT = struct.Struct("<f")
+    _INT = struct.Struct("<i")
 
     def __init__(self, fill_data: Optional[bytes]=None):
+        super().__init__()
         if fill_data is not None:
             if len(fill_data) < 10:
                 raise RuntimeError("Need at least 10 bytes to fill a SetParameterMsg")
@@ -361,27 +504,23 @@ class SetParameterMsg(PurpleDropMessage):
         else:
             self._buf = bytearray([self.ID] + [0]*9)
 
-    @staticmethod
-    def predictSize(buf: bytes) -> int:
-        return 10
-
     def param_idx(self) -> int:
-        return struct.unpack_from("<I", self._buf, 1)[0]
+        return self._IDX.unpack_from(self._buf, 1)[0]
 
     def set_param_idx(self, value: int):
-        struct.pack_into("<I", self._buf, 1, value)
+        self._IDX.pack_into(self._buf, 1, value)
 
     def param_value_float(self) -> float:
-        return struct.unpack_from("<f", self._buf, 5)[0]
+        return self._FLOAT.unpack_from(self._buf, 5)[0]
 
     def set_param_value_float(self, value: float):
-        struct.pack_into("<f", self._buf, 5, value)
+        self._FLOAT.pack_into(self._buf, 5, value)
 
     def param_value_int(self) -> int:
-        return struct.unpack_from("<i", self._buf, 5)[0]
+        return self._INT.unpack_from(self._buf, 5)[0]
 
     def set_param_value_int(self, value: int):
-        struct.pack_into("<i", self._buf, 5, value)
+        self._INT.pack_into(self._buf, 5, value)
 
     def write_flag(self) -> bool:
         if self._buf[9] == 0:
@@ -408,22 +547,38 @@ class SetParameterMsg(PurpleDropMessage):
 class SetPwmMsg(PurpleDropMessage):
     ID = 9
 
+    __slots__ = ('chan', 'duty_cycle')
+    _STRUCT = struct.Struct("<BBH")
+
     def __init__(self, fill_data: Optional[bytes]=None):
+        super().__init__()
         self.chan = 0
         self.duty_cycle = 0.0
         if fill_data is not None:
             self.fill(fill_data)
 
     def fill(self, buf: bytes):
-        raise RuntimeError("Not implemented")
+        if len(buf) < 4:
+            raise ValueError("Need at least 4 bytes for a SetPwmMsg")
+        _id, self.chan, duty_cycle = self._STRUCT.unpack_from(buf, 0)
+        self.duty_cycle = duty_cycle / 4096
 
     def to_bytes(self) -> bytes:
-        return struct.pack("<BBH", self.ID, self.chan, int(self.duty_cycle * 4096))
+        return self._STRUCT.pack(self.ID, self.chan, int(self.duty_cycle * 4096))
 
 class TemperatureMsg(PurpleDropMessage):
+    """Temperature sensor measurements, in hundredths of a degree C
+
+    When decoded from a received frame, `measurements` is a read-only view of
+    the int16 values in the frame.
+    """
     ID = 7
 
+    __slots__ = ('measurements',)
+    _HEADER = struct.Struct("<BB")
+
     def __init__(self, fill_data: Optional[bytes]=None):
+        super().__init__()
         self.measurements: Sequence[int] = []
         if fill_data is not None:
             self.fill(fill_data)
@@ -442,38 +597,61 @@ class TemperatureMsg(PurpleDropMessage):
         if len(buf) < count * 2 + 2:
             raise ValueError("Insufficient bytes for TemperatureMsg")
 
-        self.measurements = struct.unpack_from("<" + "h"*count, buf, 2)
+        self.measurements = _unpack_array(buf, 2, count, 'h')
 
     def to_bytes(self) -> bytes:
         count = len(self.measurements)
-        return struct.pack("<BB"+"h"*count, [self.ID, count] + list(self.measurements))
+        return self._HEADER.pack(self.ID, count) + np.asarray(self.measurements, dtype='<i2').tobytes()
 
     def __str__(self):
-        return "TemperatureMsg(measurements=%s)" % str(self.measurements)
+        return "TemperatureMsg(measurements=%s)" % str(list(self.measurements))
 
 class HvRegulatorMsg(PurpleDropMessage):
     ID = 8
+    SIZE = 7
+
+    __slots__ = ('voltage', 'v_target_out')
+    _STRUCT = struct.Struct("<fh")
 
     def __init__(self, fill_data: Optional[bytes]=None):
+        super().__init__()
         self.voltage = 0.0
         self.v_target_out = 0
         if fill_data is not None:
             self.fill(fill_data)
 
-    @staticmethod
-    def predictSize(buf: bytes) -> int:
-        return 7
-
     def fill(self, buf: bytes):
         if len(buf) < 7:
             raise ValueError("Insufficient bytes for HvRegulatorMsg")
 
-        self.voltage = struct.unpack_from("<f" , buf, 1)[0]
-        self.v_target_out = struct.unpack_from("<h", buf, 5)[0]
+        self.voltage, self.v_target_out = self._STRUCT.unpack_from(buf, 1)
 
     def to_bytes(self) -> bytes:
-        return struct.pack("<Bfh", [self.ID, self.voltage, self.v_target_out])
+        return bytes((self.ID,)) + self._STRUCT.pack(self.voltage, self.v_target_out)
 
     def __str__(self):
         return "HvRegulatorMsg(voltage=%0.1f, v_target_out=%d)" % \
-            (self.voltage, self.v_target_out)
\ No newline at end of file
+            (self.voltage, self.v_target_out)
+
+# Message ID -> size of messages sent by the driver, where it differs from
+# the size of messages with that ID received by the driver, or where the
+# driver never receives the message
+_REQUEST_SIZES = {
+    ParameterDescriptorMsg.ID: 1,
+    SetGainMsg.ID: lambda buf: 0 if len(buf) < 2 else 2 + (buf[1] + 3) // 4,
+    SetPwmMsg.ID: 4,
+    FeedbackCommandMsg.ID: 9,
+}
+
+def predict_request_size(buf: bytes) -> int:
+    """Size predictor for messages sent from the driver to the device, for
+    decoding them on the device side
+    """
+    if len(buf) == 0:
+        return 0
+    size = _REQUEST_SIZES.get(buf[0])
+    if size is None:
+        return PurpleDropMessage.predictSize(buf)
+    if type(size) is int:
+        return size
+    return size(buf)
@@ -1,10 +1,7 @@
 from functools import reduce
-import numpy as np
 import schema
-import time
-from typing import Dict, List, Sequence, Set
+from typing import Dict, List, Optional, Sequence, Set
 
-import purpledrop.messages as messages
 from purpledrop.electrode_board import Layout
 
 MoveCommandSchema = schema.Schema({
@@ -90,22 +87,16 @@ class Rectangle(object):
         return locs
 
 def _set_pins_with_ack(purpledrop, pins):
-    def msg_filter(msg):
-        if isinstance(msg, messages.CommandAckMsg) and \
-            msg.acked_id == messages.ElectrodeEnableMsg.ID:
-            return True
-        return False
-
-    with purpledrop.purpledrop.get_sync_listener(msg_filter) as listener:
-        retries = 8
-        while retries > 0:
-            purpledrop.set_electrode_pins(pins)
-            # Read up to ACK of set pins
-            msg = listener.next(timeout=0.25)
-            if msg is not None:
-                return msg
+    # set_electrode_pins waits for the ACK, and resends the message if none is
+    # received. Allow for a few of those rounds to fail.
+    retries = 3
+    while True:
+        try:
+            return purpledrop.set_electrode_pins(pins)
+        except TimeoutError:
             retries -= 1
-    raise RuntimeError("Timed out waiting for electrode command ACK")
+            if retries == 0:
+                raise RuntimeError("Timed out waiting for electrode command ACK")
 
 def move_drop(purpledrop, start, size, direction, post_capture_time=0.25):
     initial_rect = Rectangle(Location(start), size)
@@ -124,7 +115,7 @@ def move_drop(purpledrop, start, size, direction, post_capture_time=0.25):
     # Create a listener which will queue all incoming messages that match
     # our filter. We can expect to get all messages in the order they were
     # received
-    with purpledrop.active_capacitance_collector() as collector:
+    with purpledrop.active_capacitance_collector(with_rx_time=True) as collector:
         _raw, calibrated = purpledrop.wait_for_active_capacitance(timeout=2.0)
         pre_capacitance = calibrated
 
@@ -135,11 +126,13 @@ def move_drop(purpledrop, start, size, direction, post_capture_time=0.25):
 
         MOVE_THRESHOLD = 0.8 * pre_capacitance
         MOVE_TIMEOUT = 5.0
-        time_series = []
+        rx_times = []
         cap_series = []
-        t = 0.0
-        start_time = time.time()
-        end_time = start_time + MOVE_TIMEOUT
+        # Times are measured with the monotonic receive time of each sample,
+        # so samples which queue up before they are processed are still
+        # placed, and judged against the timeout, by when they arrived. The
+        # timeout starts at the first sample after the pin change.
+        end_ns = None
         detected = False
 
         # Flush received samples so we know we've consumed all samples from the
@@ -148,26 +141,28 @@ def move_drop(purpledrop, start, size, direction, post_capture_time=0.25):
             measurement = collector.next(timeout=1.0)
             if measurement is None:
                 raise TimeoutError("Timeout waiting for capacitance report")
-            _raw, calibrated = measurement
-            time_series.append(t)
+            _raw, calibrated, rx_time_ns = measurement
+            rx_times.append(rx_time_ns)
             cap_series.append(calibrated)
-            t += 2e-3
 
-        while time.time() < end_time:
+        while True:
             measurement = collector.next(timeout=1.0)
             if measurement is None:
                 raise RuntimeError("Timed out waiting for capacitance message")
-            _raw, calibrated = measurement
-            time_series.append(t)
+            _raw, calibrated, rx_time_ns = measurement
+            rx_times.append(rx_time_ns)
             cap_series.append(calibrated)
-            # For now, assume the samples are periodic at 2ms to create a time vector
-            # At some point, they should come with their own timestamps
-            t += 2e-3
+            if end_ns is None:
+                end_ns = rx_time_ns + int(MOVE_TIMEOUT * 1e9)
             if calibrated >= MOVE_THRESHOLD and not detected:
                 # keep capturing for a while longer after hitting the target threshold
-                end_time = time.time() + post_capture_time
+                end_ns = rx_time_ns + int(post_capture_time * 1e9)
                 detected = True
+            if rx_time_ns >= end_ns:
+                break
 
+        # Report times in seconds, relative to the first sample
+        time_series = [(t - rx_times[0]) * 1e-9 for t in rx_times]
         post_capacitance = cap_series[-1]
 
         closed_loop_result = MoveDropClosedLoopResult(
@@ -228,11 +223,6 @@ def move_drops(purpledrop, moves: List[Dict]) -> List[MoveDropResult]:
     if len(moves) > MAX_DROPS:
         raise ValueError(f"Cannot move more than {MAX_DROPS} concurrently")
 
-    def group_scan_filter(msg):
-        if isinstance(msg, messages.BulkCapacitanceMsg) and msg.group_scan != 0:
-            return True
-        return False
-
     # Collect all of the pins together from all drops
     start_pins: List[int] = list(reduce(lambda a,b: set(a).union(b), [m['start_pins'] for m in moves], set()))
     end_pins: List[int] = list(reduce(lambda a,b: set(a).union(b), [m['end_pins'] for m in moves], set()))
@@ -241,10 +231,9 @@ def move_drops(purpledrop, moves: List[Dict]) -> List[MoveDropResult]:
     purpledrop.set_electrode_pins([], 1)
 
     # Setup capacitance groups
+    # These are paced by the device's command window, so as not to overflow
+    # its receive buffer
     for i, m in enumerate(moves):
-        time.sleep(0.02) # hack to avoid overflowing receive buffer
-        # The delay can be removed embedded software supports acking and/or
-        # gets a longer rx buffer
         gain_setting = int(m.get('low_gain', False))
         purpledrop.set_capacitance_group(m['start_pins'], i, gain_setting)
 
@@ -255,16 +244,17 @@ def move_drops(purpledrop, moves: List[Dict]) -> List[MoveDropResult]:
 
     n_drops = len(moves)
     cap_series: List[List[float]] = []
+    # Monotonic receive time of each sample in cap_series, in ns
+    rx_times: List[int] = []
 
     # Begin collecting samples of group capacitance
-    with purpledrop.group_capacitance_collector() as collector:
+    with purpledrop.group_capacitance_collector(with_rx_time=True) as collector:
 
         # Read group capacitance to get initial values
         _raw, initial_cap = purpledrop.wait_for_group_capacitance(timeout=2.0)
 
         # Change capacitance groups to measure destination electrodes
         for i, m in enumerate(moves):
-            time.sleep(0.02) # hack to avoid overflowing receive buffer
             gain_setting = int(m.get('low_gain', False))
             purpledrop.set_capacitance_group(m['end_pins'], i, gain_setting)
 
@@ -277,11 +267,15 @@ def move_drops(purpledrop, moves: List[Dict]) -> List[MoveDropResult]:
             measurement = collector.next(timeout=2.0)
             if measurement is None:
                 raise TimeoutError("Timeout waiting for group capacitance report")
-            _raw, calibrated = measurement
+            _raw, calibrated, rx_time_ns = measurement
             cap_series.append(calibrated)
+            rx_times.append(rx_time_ns)
 
-        start_time = time.time()
-        end_times = [start_time + m.get('timeout', DEFAULT_TIMEOUT) for m in moves]
+        # Timeouts are compared to the monotonic receive time of each sample,
+        # so that samples which queue up before they are processed are judged
+        # by when they arrived. They start at the first sample after the pin
+        # change.
+        end_times: List[Optional[int]] = [None] * n_drops
         last_sample_index = [0] * n_drops
         finish_thresholds = [m.get('threshold', DEFAULT_THRESHOLD) * initial_cap[i] for i, m in enumerate(moves)]
         success_flags = [False] * n_drops
@@ -291,22 +285,23 @@ def move_drops(purpledrop, moves: List[Dict]) -> List[MoveDropResult]:
             measurement = collector.next(timeout=2.0)
             if measurement is None:
                 raise TimeoutError("Timeout waiting for group capacitance report")
-            _raw, calibrated = measurement
+            _raw, calibrated, rx_time_ns = measurement
             cap_series.append(calibrated)
-            if collector.empty():
-                curtime = time.time()
-                for i in range(n_drops):
-                    if last_sample_index[i] != 0:
-                        # Drop previously finished
-                        continue
-                    if not success_flags[i] and calibrated[i] >= finish_thresholds[i]:
-                        success_flags[i] = True
-                        # keep capturing for a while longer after hitting the target threshold
-                        end_times[i] = curtime + moves[i].get('post_capture_time', DEFAULT_POST_CAPTURE_TIME)
-                    if curtime > end_times[i]:
-                        # This drop is now finished
-                        last_sample_index[i] = len(cap_series)
-                        n_running -= 1
+            rx_times.append(rx_time_ns)
+            if end_times[0] is None:
+                end_times = [rx_time_ns + int(m.get('timeout', DEFAULT_TIMEOUT) * 1e9) for m in moves]
+            for i in range(n_drops):
+                if last_sample_index[i] != 0:
+                    # Drop previously finished
+                    continue
+                if not success_flags[i] and calibrated[i] >= finish_thresholds[i]:
+                    success_flags[i] = True
+                    # keep capturing for a while longer after hitting the target threshold
+                    end_times[i] = rx_time_ns + int(moves[i].get('post_capture_time', DEFAULT_POST_CAPTURE_TIME) * 1e9)
+                if rx_time_ns > end_times[i]:
+                    # This drop is now finished
+                    last_sample_index[i] = len(cap_series)
+                    n_running -= 1
 
         results = []
         for i in range(n_drops):
@@ -314,8 +309,8 @@ def move_drops(purpledrop, moves: List[Dict]) -> List[MoveDropResult]:
             final_cap = 0.0
             if len(cap_data) > 0:
                 final_cap = cap_data[-1]
-            # Assuming known sample period of 2ms
-            time_series = np.arange(0, len(cap_data) * 2e-3, 2e-3).tolist()
+            # Times in seconds, relative to the first sample
+            time_series = [(t - rx_times[0]) * 1e-9 for t in rx_times[:last_sample_index[i]]]
             closed_loop_result = MoveDropClosedLoopResult(
                 initial_cap[i],
                 final_cap,
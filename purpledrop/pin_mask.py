@@ -0,0 +1,44 @@
+"""Sets of electrode pins stored as integer bit masks
+
+A set of pins is an int with bit N set if pin N is in the set, so unions,
+intersections and comparisons are single integer operations. The byte form is
+16 bytes with pin N in bit N % 8 of byte N // 8, which is the layout used by
+ElectrodeEnableMsg and by the `mask` field of ElectrodeGroup events.
+"""
+from typing import Iterable, List
+
+N_PINS = 128
+N_MASK_BYTES = N_PINS // 8
+
+def pins_to_mask(pins: Iterable[int]) -> int:
+    """Convert a list of pin numbers to a mask
+
+    Raises ValueError if any pin is out of range
+    """
+    mask = 0
+    for p in pins:
+        if p < 0 or p >= N_PINS:
+            raise ValueError(f"Pin {p} is invalid. Must be < {N_PINS}")
+        mask |= 1 << p
+    return mask
+
+def mask_to_pins(mask: int) -> List[int]:
+    """Convert a mask to an ordered list of pin numbers
+    """
+    pins = []
+    while mask:
+        low_bit = mask & -mask
+        pins.append(low_bit.bit_length() - 1)
+        mask ^= low_bit
+    return pins
+
+def mask_to_bools(mask: int) -> List[bool]:
+    """Convert a mask to a list of N_PINS booleans
+    """
+    return [bool(mask >> p & 1) for p in range(N_PINS)]
+
+def mask_to_bytes(mask: int) -> bytes:
+    return mask.to_bytes(N_MASK_BYTES, 'little')
+
+def bytes_to_mask(data: bytes) -> int:
+    return int.from_bytes(data, 'little')
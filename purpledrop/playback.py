@@ -3,9 +3,11 @@ import os
 import struct
 import threading
 import time
-from typing import Callable, List, Optional, Sequence
+from typing import Callable, Dict, List, Optional, Sequence
 
 import purpledrop.protobuf.messages_pb2 as messages_pb2
+from purpledrop.event_policy import EventSubscription, PolicySpec
+from purpledrop.pin_mask import bytes_to_mask, mask_to_bools, pins_to_mask
 
 logger = logging.getLogger("purpledrop")
 
@@ -25,6 +27,16 @@ def get_timestamp(event: messages_pb2.PurpleDropEvent) -> Optional[float]:
             return event_time
     return None
 
+def electrode_group_mask(group: messages_pb2.ElectrodeGroup) -> int:
+    """Return the pin mask of an ElectrodeGroup event
+
+    Supports groups recorded by older versions, which store a list of bools
+    rather than a packed mask
+    """
+    if len(group.mask) > 0:
+        return bytes_to_mask(group.mask)
+    return pins_to_mask(i for i, enabled in enumerate(group.electrodes) if enabled)
+
 class State(object):
     def __init__(self, **kwargs):
         self.active_capacitance = 0.0
@@ -42,7 +54,15 @@ class State(object):
         elif event.HasField('bulk_capacitance'):
             self.bulk_capacitance = [m.capacitance for m in event.bulk_capacitance.measurements]
         elif event.HasField('electrode_state'):
-            self.electrode_state = event.electrode_state.electrodes
+            state = event.electrode_state
+            if len(state.drive_groups) > 0:
+                # Drive groups are OR'd together into a single list
+                mask = 0
+                for group in state.drive_groups:
+                    mask |= electrode_group_mask(group)
+                self.electrode_state = mask_to_bools(mask)
+            else:
+                self.electrode_state = list(state.electrodes)
         elif event.HasField('hv_regulator'):
             self.voltage = event.hv_regulator.voltage
         elif event.HasField('temperature_control'):
@@ -250,7 +270,7 @@ class PlaybackPurpleDrop(object):
         self.command = None
         self.state = State()
         self.playing = True
-        self.event_listeners: List[Callable] = []
+        self.event_listeners: List[EventSubscription] = []
         self.playback_time = 0.0
         self.listener_lock = threading.Lock()
         self.reader_lock = threading.Lock()
@@ -258,11 +278,21 @@ class PlaybackPurpleDrop(object):
         self.thread = threading.Thread(target=self.__thread_entry, name="Playback reader", daemon=True)
         self.thread.start()
 
-    def register_event_listener(self, func):
+    def register_event_listener(self, func, policies: Optional[Dict[str, PolicySpec]]=None):
         """Register a callback for state update events
+
+        Recordings were already reduced when they were made, so by default all
+        events are delivered. See PurpleDropController.register_event_listener
+        for policies.
+        """
+        with self.listener_lock:
+            self.event_listeners.append(EventSubscription(func, policies or {}))
+
+    def unregister_event_listener(self, func):
+        """Remove a previously registered listener
         """
         with self.listener_lock:
-            self.event_listeners.append(func)
+            self.event_listeners = [s for s in self.event_listeners if s.callback != func]
 
     def get_board_definition(self):
         """Get electrode board configuratin object
@@ -360,9 +390,11 @@ class PlaybackPurpleDrop(object):
                 break
 
     def __fire_event(self, event):
+        event_type = event.WhichOneof('msg')
         with self.listener_lock:
-            for listener in self.event_listeners:
-                listener(event)
+            for subscription in self.event_listeners:
+                if subscription.wants(event_type):
+                    subscription.deliver(event_type, event)
 
     def __thread_entry(self):
         last_time = None
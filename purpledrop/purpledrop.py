@@ -1,16 +1,24 @@
 """Low-level driver for communicating with PurpleDrop via serial messages
 """
 from abc import abstractmethod, ABC
+import collections
 import gevent
+import gevent.event
 import gevent.lock
+import gevent.queue
+import gevent.socket
 import inspect
 import logging
+import os
 import queue
 import serial
+import socket
+import threading
+import time
 import serial.tools.list_ports
-from typing import Any, AnyStr, Callable, Dict, List, Optional
+from typing import Any, AnyStr, Callable, Dict, List, Optional, Sequence, Tuple, Type, Union
 
-from .messages import PurpleDropMessage
+from .messages import PurpleDropMessage, CommandAckMsg, DataBlobMsg, GpioControlMsg, SetParameterMsg
 from .message_framer import MessageFramer, serialize
 
 
@@ -22,14 +30,48 @@ PURPLEDROP_VIDPIDS = [
     (0x1209, 0xCCAA),
 ]
 
-def resolve_msg_filter(filt):
-    """If the filter provided is a message type, then create a filter which returns
-    any message of that type. Otherwise, assume the filter is a lambda method.
+MsgFilter = Union[None, Type[PurpleDropMessage], Sequence[Type[PurpleDropMessage]], Callable[[PurpleDropMessage], bool]]
+
+def split_msg_filter(filt: MsgFilter, predicate: Optional[Callable[[PurpleDropMessage], bool]]=None) \
+        -> Tuple[Optional[Tuple[Type[PurpleDropMessage], ...]], Optional[Callable[[PurpleDropMessage], bool]]]:
+    """Separate a message filter into the message types it selects and a
+    predicate to apply to messages of those types
+
+    The filter may be a message class, a list of message classes, or a
+    function. A function filter cannot be keyed by type, so it is returned as
+    the predicate and will be called for every received message.
+
+    Returns: A tuple of (msg_types, predicate). msg_types is None if all
+    messages must be passed to the predicate.
+    """
+    if filt is None:
+        return None, predicate
+    if inspect.isclass(filt):
+        return (filt,), predicate
+    if isinstance(filt, (list, tuple)):
+        return tuple(filt), predicate
+    if predicate is not None:
+        raise ValueError("A predicate can only be combined with a message type filter")
+    return None, filt
+
+# Directories whose modification times change when a serial device is
+# attached or removed
+DEVICE_DIRS = ['/dev', '/dev/serial/by-id']
+
+def _device_dir_signature() -> Tuple[Optional[int], ...]:
+    """Return the modification times of DEVICE_DIRS
+
+    This changes whenever a device node is created or removed, which is much
+    cheaper to check than enumerating the serial ports. Directories which do
+    not exist, e.g. on Windows, are given as None.
     """
-    if inspect.isclass(filt): # and issubclass(filt, PurpleDropMessage):
-        return lambda x: isinstance(x, filt)
-    else:
-        return filt
+    signature = []
+    for path in DEVICE_DIRS:
+        try:
+            signature.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
 
 def list_purpledrop_devices() -> List[serial.tools.list_ports_common.ListPortInfo]:
     """Get a list of detected purpledrop devices
@@ -43,12 +85,31 @@ def list_purpledrop_devices() -> List[serial.tools.list_ports_common.ListPortInf
 
 
 class PurpleDropRxThread(object):
-    def __init__(self, port: serial.Serial, callback: Callable[[PurpleDropMessage], None]=None):
+    """Greenlet which receives and decodes messages from a serial port
+
+    Where the port provides a file descriptor, the greenlet waits for it to
+    become readable on the gevent event loop, so other greenlets keep running
+    while no data is available. Otherwise, the blocking read is run on the
+    gevent threadpool. Either way, all bytes waiting in the OS buffer are read
+    at once.
+    """
+    # Maximum time to wait for data before checking for stop()
+    POLL_TIMEOUT = 0.1
+    # Upper limit on the size of a single read
+    MAX_READ_SIZE = 65536
+
+    def __init__(self, port: serial.Serial, callback: Callable[[PurpleDropMessage], None]=None, capture=None):
         self._thread = gevent.Greenlet(self.run)
         self._ser = port
         self._framer = MessageFramer(PurpleDropMessage.predictSize)
         self._callback = callback
+        # Optional CaptureWriter, which records all bytes read
+        self.capture = capture
         self.running = True
+        try:
+            self._fileno: Optional[int] = port.fileno()
+        except (AttributeError, NotImplementedError, serial.SerialException):
+            self._fileno = None
 
     def start(self):
         self._thread.start()
@@ -59,40 +120,266 @@ class PurpleDropRxThread(object):
     def join(self):
         self._thread.join()
 
+    def _read_available(self) -> bytes:
+        """Read all bytes currently available on the port without blocking the
+        event loop
+
+        Returns an empty bytes object if nothing arrives within POLL_TIMEOUT
+        """
+        if self._fileno is not None:
+            try:
+                gevent.socket.wait_read(self._fileno, self.POLL_TIMEOUT)
+            except socket.timeout:
+                return b''
+            # Request at least one byte, so that a disconnected device raises
+            # rather than reading nothing forever
+            size = min(max(self._ser.in_waiting, 1), self.MAX_READ_SIZE)
+            return self._ser.read(size)
+        else:
+            def blocking_read():
+                return self._ser.read(min(max(self._ser.in_waiting, 1), self.MAX_READ_SIZE))
+            return gevent.get_hub().threadpool.apply(blocking_read)
+
     def run(self):
         while self.running:
             rxBytes = None
             try:
-                rxBytes = self._ser.read(64)
-            except serial.serialutil.SerialException as e:
+                rxBytes = self._read_available()
+            except (serial.serialutil.SerialException, OSError) as e:
                 logger.warn(f"Failed reading from port: {e}")
                 self.running = False
                 return
             if(len(rxBytes) > 0):
+                # All frames completed by this read share its receive time
+                rx_time_ns = time.monotonic_ns()
+                capture = self.capture
+                if capture is not None:
+                    capture.write_rx(rxBytes)
                 for buf in self._framer.parse(rxBytes):
                     if(self._callback):
                         try:
-                            self._callback(PurpleDropMessage.from_bytes(buf))
+                            self._callback(PurpleDropMessage.from_bytes(buf, rx_time_ns))
                         except Exception as e:
                             logger.exception(e)
 
     def set_callback(self, callback):
         self._callback = callback
 
+class PurpleDropTxThread(object):
+    """Greenlet which writes framed messages to a serial port
+
+    Senders queue data with `send` and return immediately. All data queued
+    while a write is in progress is coalesced into the next write, so messages
+    sent back-to-back go out in a single system call.
+
+    Where the port provides a file descriptor, the greenlet waits for it to
+    become writable on the gevent event loop. Otherwise, the blocking write is
+    run on the gevent threadpool.
+    """
+    # Maximum time to wait for the port to accept data before failing
+    WRITE_TIMEOUT = 0.5
+    # Upper limit on the amount of data coalesced into one write
+    MAX_WRITE_SIZE = 4096
+
+    def __init__(self, port: serial.Serial, capture=None):
+        self._thread = gevent.Greenlet(self.run)
+        self._ser = port
+        self._queue: gevent.queue.Queue = gevent.queue.Queue()
+        # Optional CaptureWriter, which records all bytes written
+        self.capture = capture
+        self.running = True
+        self.writes = 0
+        self.messages = 0
+        try:
+            self._fileno: Optional[int] = port.fileno()
+        except (AttributeError, NotImplementedError, serial.SerialException):
+            self._fileno = None
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        self._queue.put(None)
+
+    def join(self):
+        self._thread.join()
+
+    def send(self, data: bytes, count: int=1) -> gevent.event.AsyncResult:
+        """Queue framed data to be written
+
+        Args:
+          data: Serialized message(s)
+          count: Number of messages contained in data, for statistics
+
+        Returns: An AsyncResult which is set when the data has been written,
+        or set to an exception if the write fails
+        """
+        result = gevent.event.AsyncResult()
+        if not self.running:
+            result.set_exception(serial.SerialException("Port is closed"))
+        else:
+            self._queue.put((data, count, result))
+        return result
+
+    def _write(self, data: bytes):
+        if self._fileno is not None:
+            view = memoryview(data)
+            while len(view) > 0:
+                try:
+                    gevent.socket.wait_write(self._fileno, self.WRITE_TIMEOUT)
+                except socket.timeout:
+                    raise serial.SerialTimeoutException("Write timeout")
+                try:
+                    n = os.write(self._fileno, view)
+                except BlockingIOError:
+                    continue
+                view = view[n:]
+        else:
+            gevent.get_hub().threadpool.apply(self._ser.write, (data,))
+
+    def _fail_pending(self):
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                item[2].set_exception(serial.SerialException("Port is closed"))
+
+    def run(self):
+        while self.running:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            size = len(item[0])
+            while size < self.MAX_WRITE_SIZE and not self._queue.empty():
+                item = self._queue.peek()
+                if item is None:
+                    break
+                self._queue.get_nowait()
+                batch.append(item)
+                size += len(item[0])
+
+            data = b"".join(x[0] for x in batch)
+            try:
+                self._write(data)
+            except (serial.serialutil.SerialException, OSError) as e:
+                logger.warn(f"Failed writing to port: {e}")
+                self.running = False
+                for x in batch:
+                    x[2].set_exception(e)
+                break
+            self.writes += 1
+            capture = self.capture
+            if capture is not None:
+                capture.write_tx(data)
+            for x in batch:
+                self.messages += x[1]
+                x[2].set(None)
+        self.running = False
+        self._fail_pending()
+
+class ListenerQueue(object):
+    """A FIFO for received messages with a configurable policy for when it is
+    full, and counters for monitoring
+
+    Overflow policies:
+      - BLOCK: The receiver waits for space in the queue
+      - DROP_OLDEST: The oldest queued message is discarded to make room
+      - DROP_NEWEST: The new message is discarded
+      - COALESCE_LATEST: Only the most recent message is kept, regardless of
+        capacity
+    """
+    BLOCK = 'block'
+    DROP_OLDEST = 'drop_oldest'
+    DROP_NEWEST = 'drop_newest'
+    COALESCE_LATEST = 'coalesce_latest'
+    POLICIES = [BLOCK, DROP_OLDEST, DROP_NEWEST, COALESCE_LATEST]
+
+    def __init__(self, maxsize: int=0, policy: str=DROP_OLDEST):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Invalid overflow policy '{policy}'. Must be one of {self.POLICIES}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.received = 0
+        self.dropped = 0
+        self.high_water = 0
+        self._items: collections.deque = collections.deque()
+        self._cond = threading.Condition(threading.Lock())
+
+    def offer(self, item):
+        """Add an item to the queue, applying the overflow policy if it is full
+        """
+        with self._cond:
+            self.received += 1
+            if self.policy == self.COALESCE_LATEST:
+                self.dropped += len(self._items)
+                self._items.clear()
+            elif 0 < self.maxsize <= len(self._items):
+                if self.policy == self.BLOCK:
+                    while len(self._items) >= self.maxsize:
+                        self._cond.wait()
+                elif self.policy == self.DROP_NEWEST:
+                    self.dropped += 1
+                    return
+                else:
+                    self.dropped += 1
+                    self._items.popleft()
+            self._items.append(item)
+            self.high_water = max(self.high_water, len(self._items))
+            self._cond.notify_all()
+
+    def get(self, timeout: Optional[float]=None):
+        """Remove and return the oldest item
+
+        Raises queue.Empty if no item is available within timeout
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: len(self._items) > 0, timeout):
+                raise queue.Empty()
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def empty(self) -> bool:
+        return len(self._items) == 0
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'capacity': self.maxsize,
+                'policy': self.policy,
+                'depth': len(self._items),
+                'high_water': self.high_water,
+                'received': self.received,
+                'dropped': self.dropped,
+            }
+
 class SyncListener(object):
+    # Default queue limits. At 500 messages/s, this holds 20 seconds of data.
+    DEFAULT_CAPACITY = 10000
+    DEFAULT_POLICY = ListenerQueue.DROP_OLDEST
+
     class MsgDelegate(object):
-        def __init__(self, filter_func, fifo):
+        def __init__(self, filter_func, fifo, name):
             self.filter = filter_func
             self.fifo = fifo
+            self.name = name
 
         def __call__(self, msg: PurpleDropMessage):
             if self.filter is None or self.filter(msg):
-                self.fifo.put(msg)
+                self.fifo.offer(msg)
 
     def __init__(self,
                  purpledrop: 'PurpleDropDevice',
-                 msg_filter: Callable[[PurpleDropMessage], bool]=None,
-                 transform: Callable[[PurpleDropMessage], Any]=None):
+                 msg_filter: MsgFilter=None,
+                 transform: Callable[[PurpleDropMessage], Any]=None,
+                 predicate: Callable[[PurpleDropMessage], bool]=None,
+                 capacity: Optional[int]=None,
+                 policy: Optional[str]=None,
+                 name: Optional[str]=None):
         """Create a listener object
 
         The SyncListener can be used in a with statement, e.g.
@@ -100,6 +387,21 @@ class SyncListener(object):
             with purpledrop.get_sync_listener(filter) as listener:
                 msg = listener.next()
 
+        The filter is preferably a message class (or list of classes), with an
+        optional predicate to further select messages of that class, e.g.
+
+            purpledrop.get_sync_listener(CommandAckMsg, predicate=lambda m: m.acked_id == 0)
+
+        This allows messages to be routed to the listener by type, so that the
+        predicate is only evaluated for messages of the selected types.
+
+        Received messages are queued until read with `next`. The queue holds at
+        most `capacity` messages (0 for unlimited), and `policy` selects what
+        happens when it is full; see ListenerQueue. Statistics on dropped
+        messages are reported by `stats`, and by
+        `PurpleDropDevice.get_listener_stats` for all registered listeners
+        under the given name.
+
         Alternatively, you can call the `register` method to begin listening for
         messages, and `unregister` to stop. However, be sure to always call
         `unregister` when finished, or else you will create a memory leak and
@@ -107,10 +409,19 @@ class SyncListener(object):
         listener queue until it is unregistered.
         """
         self.owner = purpledrop
-        self.filter = resolve_msg_filter(msg_filter)
-        self.fifo: queue.Queue[PurpleDropMessage] = queue.Queue()
+        self.msg_types, self.filter = split_msg_filter(msg_filter, predicate)
+        if capacity is None:
+            capacity = self.DEFAULT_CAPACITY
+        if policy is None:
+            policy = self.DEFAULT_POLICY
+        if name is None:
+            if self.msg_types is not None:
+                name = ','.join(t.__name__ for t in self.msg_types)
+            else:
+                name = 'SyncListener'
+        self.fifo = ListenerQueue(capacity, policy)
         self.transform = transform
-        self.delegate = self.MsgDelegate(self.filter, self.fifo)
+        self.delegate = self.MsgDelegate(self.filter, self.fifo, name)
 
     def __enter__(self):
         self.register()
@@ -120,7 +431,7 @@ class SyncListener(object):
         self.unregister()
 
     def register(self):
-        self.owner.register_listener(self.delegate)
+        self.owner.register_listener(self.delegate, self.msg_types)
 
     def unregister(self):
         self.owner.unregister_listener(self.delegate)
@@ -128,6 +439,13 @@ class SyncListener(object):
     def get_msg_handler(self):
         return self.delegate
 
+    def stats(self) -> Dict[str, Any]:
+        """Return queue statistics for this listener
+        """
+        stats = self.fifo.stats()
+        stats['name'] = self.delegate.name
+        return stats
+
     def empty(self) -> bool:
         return self.fifo.empty()
 
@@ -151,10 +469,10 @@ class AsyncListener(object):
                 self.callback(msg)
 
 
-    def __init__(self, owner, callback, msg_filter=None):
+    def __init__(self, owner, callback, msg_filter: MsgFilter=None, predicate=None):
         self.owner = owner
         self.callback = callback
-        self.filter = resolve_msg_filter(msg_filter)
+        self.msg_types, self.filter = split_msg_filter(msg_filter, predicate)
         self.delegate = self.MsgDelegate(self.filter, callback)
 
     def __del__(self):
@@ -163,12 +481,196 @@ class AsyncListener(object):
     def get_msg_handler(self):
         return self.delegate
 
+# Functions returning the value used to match each type of response to the
+# request which produced it
+RESPONSE_KEYS: Dict[Type[PurpleDropMessage], Callable[[Any], Any]] = {
+    CommandAckMsg: lambda m: m.acked_id,
+    DataBlobMsg: lambda m: m.blob_id,
+    GpioControlMsg: lambda m: m.pin,
+    SetParameterMsg: lambda m: m.param_idx(),
+}
+
+class PendingRequests(object):
+    """Table of requests waiting for a response from the device
+
+    Waiters are keyed by the response message class, and by the value returned
+    for the response by its function in RESPONSE_KEYS. A waiter registered with
+    a key of None accepts any response of its class. Responses are delivered to
+    waiters with the same key in the order the waiters were added.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters: Dict[Type[PurpleDropMessage], Dict[Any, collections.deque]] = {}
+
+    def add(self, response_type: Type[PurpleDropMessage], key: Any=None) -> gevent.event.AsyncResult:
+        result = gevent.event.AsyncResult()
+        with self._lock:
+            by_key = self._waiters.setdefault(response_type, {})
+            by_key.setdefault(key, collections.deque()).append(result)
+        return result
+
+    def discard(self, response_type: Type[PurpleDropMessage], key: Any, result: gevent.event.AsyncResult):
+        """Remove a waiter, if it has not already received a response
+        """
+        with self._lock:
+            by_key = self._waiters.get(response_type)
+            if by_key is None or key not in by_key:
+                return
+            waiters = by_key[key]
+            try:
+                waiters.remove(result)
+            except ValueError:
+                return
+            self._prune(response_type, key)
+
+    def dispatch(self, msg: PurpleDropMessage) -> bool:
+        """Deliver a message to the oldest waiter matching it
+
+        Returns: True if the message was delivered
+        """
+        by_key = self._waiters.get(type(msg))
+        if by_key is None:
+            return False
+        key_func = RESPONSE_KEYS.get(type(msg))
+        key = key_func(msg) if key_func is not None else None
+        with self._lock:
+            if not by_key.get(key):
+                key = None
+                if not by_key.get(key):
+                    return False
+            result = by_key[key].popleft()
+            self._prune(type(msg), key)
+        result.set(msg)
+        return True
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(w) for by_key in self._waiters.values() for w in by_key.values())
+
+    def _prune(self, response_type, key):
+        by_key = self._waiters[response_type]
+        if len(by_key[key]) == 0:
+            del by_key[key]
+            if len(by_key) == 0:
+                del self._waiters[response_type]
+
+class CommandWindow(object):
+    """Pipelines commands to the device, limiting how much is unprocessed
+
+    The embedded software has a small receive buffer, and messages which
+    arrive while it is full are lost. Rather than waiting for each command to
+    complete before sending the next, commands are kept in flight as long as
+    there are fewer than `size` of them, and their framed size totals no more
+    than `rx_capacity` bytes.
+
+    A command sent with an ACK key holds its place in the window until the
+    CommandAckMsg with that acked_id (or another response type with that key,
+    see RESPONSE_KEYS) is received; it is resent on timeout, as with
+    `PurpleDropDevice.request`. Commands which the device does not
+    acknowledge hold their place for `lease` seconds, which must be at least
+    the time the device takes to process a message.
+    """
+    DEFAULT_SIZE = 4
+    # Conservatively, one USB full speed packet
+    DEFAULT_RX_CAPACITY = 64
+    # The processing time has not been measured on hardware, so the default
+    # is the 20ms delay which was previously used to avoid overflowing the
+    # receive buffer. Callers which know better can pass a smaller lease.
+    DEFAULT_LEASE = 0.02
+
+    def __init__(self,
+                 device: 'PurpleDropDevice',
+                 size: int=DEFAULT_SIZE,
+                 rx_capacity: int=DEFAULT_RX_CAPACITY,
+                 lease: float=DEFAULT_LEASE,
+                 ack_timeout: float=0.5,
+                 tries: int=3):
+        self.device = device
+        self.size = size
+        self.rx_capacity = rx_capacity
+        self.lease = lease
+        self.ack_timeout = ack_timeout
+        self.tries = tries
+        self._in_flight = 0
+        self._bytes_in_flight = 0
+        self._released = gevent.event.Event()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def send(self,
+             msg: PurpleDropMessage,
+             ack_key: Any=None,
+             response_type: Type[PurpleDropMessage]=CommandAckMsg) -> gevent.event.AsyncResult:
+        """Send a command once there is room in the window
+
+        Args:
+          msg: The command to send
+          ack_key: The acked_id expected in the ACK for this command, or None
+            if the device does not acknowledge it
+          response_type: The class of the message acknowledging the command,
+            e.g. SetParameterMsg for parameter reads and writes, whose key
+            is the parameter index
+
+        Returns: An AsyncResult which is set to the response when it is
+        received, or to None if no response is expected or none was received
+        """
+        frame_size = len(serialize(msg.to_bytes()))
+        self._acquire(frame_size)
+        result = gevent.event.AsyncResult()
+        if ack_key is None:
+            self.device.send_message(msg)
+            gevent.spawn_later(self.lease, self._complete, frame_size, result, None)
+        else:
+            def wait_for_ack():
+                ack = self.device.request(msg, response_type, ack_key, self.ack_timeout, self.tries)
+                self._complete(frame_size, result, ack)
+            gevent.spawn(wait_for_ack)
+        return result
+
+    def wait(self, timeout: Optional[float]=None) -> bool:
+        """Wait until all commands in flight have completed
+
+        This includes commands sent by other callers. Whether a command was
+        acknowledged is reported by the AsyncResult returned by `send`.
+
+        Returns: False if the timeout expired, otherwise True
+        """
+        with gevent.Timeout(timeout, False):
+            while self._in_flight > 0:
+                self._released.clear()
+                self._released.wait()
+            return True
+        return False
+
+    def _acquire(self, frame_size: int):
+        while self._in_flight >= self.size or \
+                (self._in_flight > 0 and self._bytes_in_flight + frame_size > self.rx_capacity):
+            self._released.clear()
+            self._released.wait()
+        self._in_flight += 1
+        self._bytes_in_flight += frame_size
+
+    def _complete(self, frame_size: int, result: gevent.event.AsyncResult, ack: Optional[PurpleDropMessage]):
+        self._in_flight -= 1
+        self._bytes_in_flight -= frame_size
+        self._released.set()
+        result.set(ack)
+
 class PurpleDropDevice(ABC):
     """Abstract class for a purple drop device
     """
     def __init__(self):
         self.lock = gevent.lock.RLock()
-        self.listeners = []
+        # Message listeners, keyed by the message class they receive, and a
+        # list of listeners which receive all messages. These are replaced
+        # under the lock rather than modified, so the receive path can read them
+        # without locking.
+        self.typed_listeners: Dict[Type[PurpleDropMessage], Tuple[Callable, ...]] = {}
+        self.listeners: Tuple[Callable, ...] = ()
+        self.pending_requests = PendingRequests()
+        self.command_window = CommandWindow(self)
         self.__connected_callbacks: List[Callable] = []
         self.__disconnected_callbacks: List[Callable] = []
 
@@ -186,28 +688,131 @@ class PurpleDropDevice(ABC):
         for cb in self.__disconnected_callbacks:
             cb()
 
-    def register_listener(self, listener):
+    def register_listener(self, listener, msg_types: Optional[Sequence[Type[PurpleDropMessage]]]=None):
+        """Register a callable to be called with received messages
+
+        Args:
+          listener: Callable taking a PurpleDropMessage
+          msg_types: If provided, the listener will only receive messages of
+            these exact classes. Otherwise it receives all messages.
+        """
         with self.lock:
-            self.listeners.append(listener)
+            if msg_types is None:
+                self.listeners = self.listeners + (listener,)
+            else:
+                typed_listeners = dict(self.typed_listeners)
+                for t in msg_types:
+                    typed_listeners[t] = typed_listeners.get(t, ()) + (listener,)
+                self.typed_listeners = typed_listeners
 
     def unregister_listener(self, listener):
         with self.lock:
             if listener in self.listeners:
-                self.listeners.remove(listener)
+                self.listeners = tuple(x for x in self.listeners if x is not listener)
+            typed_listeners = {}
+            for t, handlers in self.typed_listeners.items():
+                handlers = tuple(x for x in handlers if x is not listener)
+                if len(handlers) > 0:
+                    typed_listeners[t] = handlers
+            self.typed_listeners = typed_listeners
 
-    def get_sync_listener(self, msg_filter=None, transform=None) -> SyncListener:
-        return SyncListener(purpledrop=self, msg_filter=msg_filter, transform=transform)
+    def get_sync_listener(self,
+                          msg_filter: MsgFilter=None,
+                          transform=None,
+                          predicate=None,
+                          capacity: Optional[int]=None,
+                          policy: Optional[str]=None,
+                          name: Optional[str]=None) -> SyncListener:
+        return SyncListener(
+            purpledrop=self,
+            msg_filter=msg_filter,
+            transform=transform,
+            predicate=predicate,
+            capacity=capacity,
+            policy=policy,
+            name=name)
 
-    def get_async_listener(self, callback, msg_filter=None) -> AsyncListener:
-        new_listener = AsyncListener(owner=self, callback=callback, msg_filter=msg_filter)
-        with self.lock:
-            self.listeners.append(new_listener.get_msg_handler())
+    def get_connection_stats(self) -> Dict[str, Any]:
+        """Return connection statistics
+
+        Returns: Object with fields:
+          - connected: True if the device is connected
+          - reconnects: Number of times the connection was restored after
+            being lost
+          - last_reconnect_latency: Time in seconds from losing the connection
+            to restoring it, for the most recent reconnect, or None
+          - max_reconnect_latency: Largest reconnect time observed, or None
+        """
+        return {
+            'connected': self.connected(),
+            'reconnects': 0,
+            'last_reconnect_latency': None,
+            'max_reconnect_latency': None,
+        }
+
+    def get_listener_stats(self) -> List[Dict[str, Any]]:
+        """Return queue statistics for all registered SyncListeners
+
+        Returns: A list of objects, one per listener, with fields:
+          - name: Listener name
+          - capacity: Maximum queue length (0 for unlimited)
+          - policy: Overflow policy
+          - depth: Current number of queued messages
+          - high_water: Maximum queue depth observed
+          - received: Number of messages offered to the queue
+          - dropped: Number of messages discarded due to overflow
+        """
+        delegates = list(self.listeners)
+        for handlers in self.typed_listeners.values():
+            for h in handlers:
+                if h not in delegates:
+                    delegates.append(h)
+        result = []
+        for d in delegates:
+            if isinstance(d, SyncListener.MsgDelegate):
+                stats = d.fifo.stats()
+                stats['name'] = d.name
+                result.append(stats)
+        return result
+
+    def get_async_listener(self, callback, msg_filter: MsgFilter=None, predicate=None) -> AsyncListener:
+        new_listener = AsyncListener(owner=self, callback=callback, msg_filter=msg_filter, predicate=predicate)
+        self.register_listener(new_listener.get_msg_handler(), new_listener.msg_types)
         return new_listener
 
+    def request(self,
+                msg: PurpleDropMessage,
+                response_type: Type[PurpleDropMessage],
+                key: Any=None,
+                timeout: float=0.5,
+                tries: int=3) -> Optional[PurpleDropMessage]:
+        """Send a message and wait for the response to it
+
+        The response is matched by its class and key, e.g. a CommandAckMsg with
+        the ID of the request message, or a SetParameterMsg with the param_idx
+        of the request; see RESPONSE_KEYS. If no response is received within
+        `timeout`, the message is resent, up to `tries` times in total. A
+        response to an earlier try is accepted.
+
+        Returns: The response message, or None if no response was received
+        """
+        waiter = self.pending_requests.add(response_type, key)
+        try:
+            for _ in range(tries):
+                self.send_message(msg)
+                response = waiter.wait(timeout)
+                if response is not None:
+                    return response
+            return None
+        finally:
+            self.pending_requests.discard(response_type, key, waiter)
+
     def on_message_received(self, msg):
-        with self.lock:
-            for handler in self.listeners:
-                handler(msg)
+        self.pending_requests.dispatch(msg)
+        for handler in self.typed_listeners.get(type(msg), ()):
+            handler(msg)
+        for handler in self.listeners:
+            handler(msg)
 
     def connected_serial_number(self) -> Optional[str]:
         """Returns the serial number of the connected device
@@ -218,6 +823,16 @@ class PurpleDropDevice(ABC):
     def send_message(self, msg: PurpleDropMessage):
         pass
 
+    def send_many(self, msgs: Sequence[PurpleDropMessage]):
+        """Send several messages in order
+
+        Devices which can batch writes override this to send them together
+        """
+        result = None
+        for msg in msgs:
+            result = self.send_message(msg)
+        return result
+
     @abstractmethod
     def connected(self) -> bool:
         pass
@@ -233,26 +848,66 @@ class SerialPurpleDropDevice(PurpleDropDevice):
     you should be using PurpleDropControl which provides higher level
     functionality and matches the JSON-RPC methods provided by `pd-server`.
     """
-    def __init__(self, port=None):
+    def __init__(self, port=None, capture_path: Optional[str]=None):
         super().__init__()
         self._rx_thread = None
+        self._tx_thread = None
         self._ser = None
+        self._capture = None
 
+        if capture_path is not None:
+            self.start_capture(capture_path)
         if port is not None:
             self.open(port)
 
     def open(self, port):
+        self._attach(self._open_serial(port))
+
+    def _open_serial(self, port) -> serial.Serial:
         logger.debug(f"PurpleDropDevice: opening {port}")
-        self._ser = serial.Serial(port, timeout=0.01, write_timeout=0.5)
-        self._rx_thread = PurpleDropRxThread(self._ser, callback=self.on_message_received)
+        return serial.Serial(port, timeout=0.01, write_timeout=PurpleDropTxThread.WRITE_TIMEOUT)
+
+    def _attach(self, ser: serial.Serial):
+        """Start communicating over an open port, and run the connected
+        callbacks
+        """
+        self._ser = ser
+        self._rx_thread = PurpleDropRxThread(self._ser, callback=self.on_message_received, capture=self._capture)
         self._rx_thread.start()
+        self._tx_thread = PurpleDropTxThread(self._ser, capture=self._capture)
+        self._tx_thread.start()
         self.on_connected()
 
+    def start_capture(self, path: str):
+        """Record all bytes sent and received to a capture file
+
+        See purpledrop.capture for the file format. Capture continues across
+        reconnects until `stop_capture` is called.
+        """
+        from .capture import CaptureWriter
+        self.stop_capture()
+        self._capture = CaptureWriter(path)
+        self.__set_capture(self._capture)
+
+    def stop_capture(self):
+        if self._capture is not None:
+            self.__set_capture(None)
+            self._capture.close()
+            self._capture = None
+
+    def __set_capture(self, capture):
+        for thread in (self._rx_thread, self._tx_thread):
+            if thread is not None:
+                thread.capture = capture
+
     def close(self):
         logger.debug("Closing PurpleDropDevice")
         if self._rx_thread is not None:
             self._rx_thread.stop()
             self._rx_thread.join()
+        if self._tx_thread is not None:
+            self._tx_thread.stop()
+            self._tx_thread.join()
         if self._ser is not None:
             self._ser.close()
             self.on_disconnected()
@@ -262,10 +917,39 @@ class SerialPurpleDropDevice(PurpleDropDevice):
             self._rx_thread is not None and \
             self._rx_thread.running
 
-    def send_message(self, msg: PurpleDropMessage):
-        tx_bytes = serialize(msg.to_bytes())
-        with self.lock:
-            self._ser.write(tx_bytes)
+    def send_message(self, msg: PurpleDropMessage) -> gevent.event.AsyncResult:
+        """Queue a message to be written to the device
+
+        Returns: An AsyncResult which is set once the message has been written.
+        Callers which do not need to know may ignore it.
+        """
+        return self._tx_thread.send(serialize(msg.to_bytes()))
+
+    def send_many(self, msgs: Sequence[PurpleDropMessage]) -> gevent.event.AsyncResult:
+        """Queue several messages to be written to the device in one write
+
+        Returns: An AsyncResult which is set once all messages have been
+        written.
+        """
+        data = b"".join(serialize(msg.to_bytes()) for msg in msgs)
+        return self._tx_thread.send(data, count=len(msgs))
+
+    def get_tx_stats(self) -> Dict[str, int]:
+        """Return counters for the serial writer
+
+        Returns: Object with fields:
+          - writes: Number of write calls made to the port
+          - messages: Number of messages written
+          - depth: Number of sends queued and not yet written
+        """
+        if self._tx_thread is None:
+            return {'writes': 0, 'messages': 0, 'depth': 0}
+        return {
+            'writes': self._tx_thread.writes,
+            'messages': self._tx_thread.messages,
+            'depth': self._tx_thread._queue.qsize(),
+        }
+
 class PersistentPurpleDropDevice(SerialPurpleDropDevice):
     """A wrapper for PurpleDropDevice that transparently tries to
     connect/reconnect to a device.
@@ -273,11 +957,24 @@ class PersistentPurpleDropDevice(SerialPurpleDropDevice):
     If a serial is provided, it will only connect to that serial number.
     Otherwise, it will connect to any purple drop detected (and may choose
     one arbitrarilty if there are multiple).
+
+    While disconnected, the device directories are watched for changes, so
+    that a newly attached device is connected as soon as it appears. Failed
+    connection attempts are retried with exponential backoff.
     """
-    def __init__(self, serial_number: Optional[str]=None):
-        super().__init__()
+    # Interval at which the connection and the device directories are checked
+    POLL_PERIOD = 0.1
+    # Limits on the delay between failed connection attempts
+    MIN_RETRY_DELAY = 0.1
+    MAX_RETRY_DELAY = 5.0
+
+    def __init__(self, serial_number: Optional[str]=None, capture_path: Optional[str]=None):
+        super().__init__(capture_path=capture_path)
         self.target_serial_number: Optional[str] = serial_number
         self.device_info: Optional[Any] = None
+        self.reconnects = 0
+        self.last_reconnect_latency: Optional[float] = None
+        self.max_reconnect_latency: Optional[float] = None
         self.__thread = gevent.Greenlet(self.__thread_entry)
         self.__thread.start()
 
@@ -289,6 +986,21 @@ class PersistentPurpleDropDevice(SerialPurpleDropDevice):
         else:
             return self.device_info.serial_number
 
+    def stop(self):
+        """Stop trying to connect, and close the device
+        """
+        self.__thread.kill()
+        self.close()
+
+    def get_connection_stats(self) -> Dict[str, Any]:
+        stats = super().get_connection_stats()
+        stats.update({
+            'reconnects': self.reconnects,
+            'last_reconnect_latency': self.last_reconnect_latency,
+            'max_reconnect_latency': self.max_reconnect_latency,
+        })
+        return stats
+
     def __try_to_connect(self) -> bool:
         device_list = list_purpledrop_devices()
         selected_device = None
@@ -304,24 +1016,70 @@ class PersistentPurpleDropDevice(SerialPurpleDropDevice):
 
         if selected_device is None:
             serial_numbers = [d.serial_number for d in device_list]
-            logger.warn(f"Found purpledrop, but not connecting because it has unexpected serial number ({serial_numbers}")
+            logger.debug(f"Found purpledrop, but not connecting because it has unexpected serial number ({serial_numbers}")
             return False
 
+        # Set before opening, so the serial number is available to connected
+        # callbacks
         self.device_info = selected_device
-        self.open(selected_device.device)
+        try:
+            ser = self._open_serial(selected_device.device)
+        except (serial.SerialException, OSError) as e:
+            # e.g. the device node exists, but udev hasn't finished setting its
+            # permissions yet
+            logger.info(f"Failed to open {selected_device.device}: {e}")
+            self.device_info = None
+            return False
+        # The port is open from here on, so a failing connected callback
+        # leaves the device connected rather than opening it again
+        try:
+            self._attach(ser)
+        except Exception as e:
+            logger.exception(f"Error while setting up purpledrop: {e}")
         logger.warning(f"Connected to purpledrop {selected_device.serial_number} on {selected_device.device}")
         return True
 
+    def __record_reconnect(self, disconnect_time: float):
+        latency = time.monotonic() - disconnect_time
+        self.reconnects += 1
+        self.last_reconnect_latency = latency
+        if self.max_reconnect_latency is None or latency > self.max_reconnect_latency:
+            self.max_reconnect_latency = latency
+        logger.warning(f"Reconnected to purpledrop after {latency:.3f}s")
+
     def __thread_entry(self):
         status = False
+        # Monotonic time at which the connection was lost, or None if the
+        # device has never connected
+        disconnect_time: Optional[float] = None
+        retry_delay = self.MIN_RETRY_DELAY
+        next_attempt = 0.0
+        dir_signature = None
         while True:
             if not self.connected():
                 if status:
                     logger.warning("Closing purpledrop device")
+                    disconnect_time = time.monotonic()
                     self.close()
                     self.device_info = None
                     status = False
-                logger.debug("Attempting to connect to purpledrop")
-                status = self.__try_to_connect()
-            gevent.sleep(5.0)
-
+                    retry_delay = self.MIN_RETRY_DELAY
+                    next_attempt = 0.0
+                signature = _device_dir_signature()
+                if signature != dir_signature:
+                    # Something was attached or removed, so try right away
+                    dir_signature = signature
+                    retry_delay = self.MIN_RETRY_DELAY
+                    next_attempt = 0.0
+                if time.monotonic() >= next_attempt:
+                    logger.debug("Attempting to connect to purpledrop")
+                    # open() runs the connected callbacks, so this includes the
+                    # time taken for the controller to restore device state
+                    status = self.__try_to_connect()
+                    if status:
+                        if disconnect_time is not None:
+                            self.__record_reconnect(disconnect_time)
+                    else:
+                        next_attempt = time.monotonic() + retry_delay
+                        retry_delay = min(2 * retry_delay, self.MAX_RETRY_DELAY)
+            gevent.sleep(self.POLL_PERIOD)
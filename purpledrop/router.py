@@ -0,0 +1,326 @@
+"""Path planning and execution for moving several drops across a grid
+
+Routes are planned with cooperative A*: drops are planned one at a time,
+through space and time, and each planned path is reserved so that later drops
+route around it. Drops which have not been planned yet are treated as fixed
+obstacles at their start locations, and drops which have reached their targets
+stay there. A drop which cannot be routed is moved later in the order, so
+that, e.g., a drop whose target is another drop's start location is planned
+after that drop moves away.
+
+Drops are kept at least `spacing` empty electrodes apart -- including
+diagonally -- at every step, and while moving from one step to the next, so
+that they cannot be pulled by, or merge with, each other.
+
+The planned paths are executed one step at a time, with all drops which move
+in a step moved together by a single `move_drops` call.
+"""
+import collections
+import gevent
+import heapq
+import schema
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from purpledrop.electrode_board import Layout
+from purpledrop.move_drop import move_drops, MoveDropResult
+
+Position = Tuple[int, int]
+
+# Up to 5 drops can be moved at once, one per capacitance scan group
+MAX_DROPS = 5
+DEFAULT_SPACING = 1
+DEFAULT_MAX_STEPS = 200
+
+DropRouteSchema = schema.Schema({
+    'start': schema.And([int], lambda p: len(p) == 2),
+    'target': schema.And([int], lambda p: len(p) == 2),
+    schema.Optional('size', default=[1, 1]): schema.And([int], lambda s: len(s) == 2 and min(s) > 0),
+    schema.Optional('timeout'): schema.Use(float),
+    schema.Optional('post_capture_time'): schema.Use(float),
+    schema.Optional('low_gain'): bool,
+    schema.Optional('threshold'): schema.Use(float),
+    })
+
+# Fields of a drop route passed through to move_drops
+MOVE_OPTIONS = ('timeout', 'post_capture_time', 'low_gain', 'threshold')
+
+class RouteResult(dict):
+    """Inherits from dict for JSON serializability
+    """
+    def __init__(self, success: bool, paths: List[List[Position]], steps: List[List[MoveDropResult]]):
+        dict.__init__(
+            self,
+            success=success,
+            paths=paths,
+            steps=steps,
+        )
+
+def _separated(a: Position, a_size: Sequence[int], b: Position, b_size: Sequence[int], spacing: int) -> bool:
+    """Check whether two drops have at least `spacing` empty electrodes
+    between them
+    """
+    gap_x = max(b[0] - (a[0] + a_size[0]), a[0] - (b[0] + b_size[0]))
+    gap_y = max(b[1] - (a[1] + a_size[1]), a[1] - (b[1] + b_size[1]))
+    return gap_x >= spacing or gap_y >= spacing
+
+class _Reservation(object):
+    """The path of an already planned drop
+    """
+    def __init__(self, path: List[Position], size: Sequence[int]):
+        self.path = path
+        self.size = size
+
+    def at(self, t: int) -> Position:
+        # Drops stay where their path ends
+        return self.path[min(t, len(self.path) - 1)]
+
+def _drop_pins(layout: Layout, pos: Position, size: Sequence[int]) -> Optional[List[int]]:
+    """Return the pins under a drop, or None if any of its cells has no
+    electrode
+    """
+    pins = []
+    for x in range(pos[0], pos[0] + size[0]):
+        for y in range(pos[1], pos[1] + size[1]):
+            pin = layout.grid_location_to_pin(x, y)
+            if pin is None:
+                return None
+            pins.append(pin)
+    return pins
+
+def _plan_one(layout: Layout,
+              start: Position,
+              target: Position,
+              size: Sequence[int],
+              reservations: List[_Reservation],
+              spacing: int,
+              max_steps: int) -> Optional[List[Position]]:
+    """Find the shortest path for one drop which avoids the reservations
+    """
+    def transition_ok(pos, next_pos, t):
+        for r in reservations:
+            if not _separated(next_pos, size, r.at(t), r.size, spacing) or \
+                    not _separated(next_pos, size, r.at(t + 1), r.size, spacing) or \
+                    not _separated(pos, size, r.at(t + 1), r.size, spacing):
+                return False
+        return True
+
+    # After the last reserved move, a drop resting at its target can stay there
+    horizon = max([len(r.path) for r in reservations], default=0)
+    def can_rest(pos, t):
+        for r in reservations:
+            for T in range(t, max(horizon, t + 1)):
+                if not _separated(pos, size, r.at(T), r.size, spacing):
+                    return False
+        return True
+
+    # Fail early if the drop could never rest at its target, e.g. because it
+    # is next to another drop's start location
+    if not can_rest(target, horizon):
+        return None
+
+    def heuristic(pos):
+        return abs(pos[0] - target[0]) + abs(pos[1] - target[1])
+
+    valid: Dict[Position, bool] = {}
+    def is_valid(pos):
+        if pos not in valid:
+            valid[pos] = _drop_pins(layout, pos, size) is not None
+        return valid[pos]
+
+    # Search states are (pos, t), but from the time of the last reserved move
+    # onwards nothing else changes, so all later times are the same state
+    def key(pos, t):
+        return (pos, min(t, horizon))
+
+    # Entries are (f, g, pos); g is also the time step
+    open_set = [(heuristic(start), 0, start)]
+    best_g = {key(start, 0): 0}
+    came_from: Dict[Tuple[Position, int], Tuple[Position, int]] = {}
+    closed = set()
+    while len(open_set) > 0:
+        _f, t, pos = heapq.heappop(open_set)
+        node = key(pos, t)
+        if node in closed:
+            continue
+        closed.add(node)
+        if pos == target and can_rest(pos, t):
+            path = [pos]
+            while node in came_from:
+                node = came_from[node]
+                path.append(node[0])
+            return path[::-1]
+        if t >= max_steps:
+            continue
+        x, y = pos
+        for next_pos in [(x, y), (x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]:
+            next_node = key(next_pos, t + 1)
+            if next_node in closed or t + 1 >= best_g.get(next_node, max_steps + 1):
+                continue
+            if not is_valid(next_pos) or not transition_ok(pos, next_pos, t):
+                continue
+            best_g[next_node] = t + 1
+            came_from[next_node] = node
+            heapq.heappush(open_set, (t + 1 + heuristic(next_pos), t + 1, next_pos))
+    return None
+
+def _distance(layout: Layout, start: Position, target: Position, size: Sequence[int]) -> Optional[int]:
+    """Return the length of the shortest path for a drop on an empty board,
+    or None if there is none
+    """
+    distance = {start: 0}
+    queue = collections.deque([start])
+    while len(queue) > 0:
+        pos = queue.popleft()
+        if pos == target:
+            return distance[pos]
+        x, y = pos
+        for next_pos in [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]:
+            if next_pos not in distance and _drop_pins(layout, next_pos, size) is not None:
+                distance[next_pos] = distance[pos] + 1
+                queue.append(next_pos)
+    return None
+
+def plan_routes(layout: Layout,
+                drops: List[Dict],
+                spacing: int=DEFAULT_SPACING,
+                max_steps: int=DEFAULT_MAX_STEPS) -> List[List[Position]]:
+    """Plan collision free paths for several drops
+
+    Args:
+        layout: The board layout. Drops are routed on its first grid.
+        drops: A list of drop route objects, as for `route_drops`
+        spacing: Minimum number of empty electrodes kept between drops
+        max_steps: Maximum number of steps in a path
+
+    Returns:
+        A list of paths, one for each drop, each a list of (x, y) locations
+        of the top-left corner of the drop, starting at its start location.
+        All paths have the same length; drops which arrive early wait at
+        their targets.
+
+    Raises ValueError if any drop cannot be routed
+    """
+    drops = schema.Schema([DropRouteSchema]).validate(drops)
+    for i, d in enumerate(drops):
+        for key in ('start', 'target'):
+            if _drop_pins(layout, tuple(d[key]), d['size']) is None:
+                raise ValueError(f"Drop {i} {key} location {d[key]} is not on the grid")
+    for i, a in enumerate(drops):
+        for j, b in enumerate(drops[i + 1:], i + 1):
+            if not _separated(tuple(a['start']), a['size'], tuple(b['start']), b['size'], spacing):
+                raise ValueError(f"Drops {i} and {j} start closer than the minimum spacing")
+
+    # Rule out drops which could not reach their targets even on an empty
+    # board, before searching through time
+    for i, d in enumerate(drops):
+        distance = _distance(layout, tuple(d['start']), tuple(d['target']), d['size'])
+        if distance is None or distance > max_steps:
+            raise ValueError(f"No route found for drop {i} within {max_steps} steps")
+
+    # Drops are planned in priority order. If a drop can't be routed, e.g.
+    # because its target is the start location of a drop which has not been
+    # planned yet, it is moved to the end of the order and planning restarts.
+    order = list(range(len(drops)))
+    for _attempt in range(len(drops)):
+        planned: Dict[int, List[Position]] = {}
+        failed = None
+        for n, i in enumerate(order):
+            reservations = [_Reservation(p, drops[j]['size']) for j, p in planned.items()]
+            # Drops not yet planned are obstacles at their starting locations
+            reservations += [_Reservation([tuple(drops[j]['start'])], drops[j]['size']) for j in order[n + 1:]]
+            d = drops[i]
+            path = _plan_one(layout, tuple(d['start']), tuple(d['target']), d['size'], reservations, spacing, max_steps)
+            if path is None:
+                failed = i
+                break
+            planned[i] = path
+        if failed is None:
+            break
+        order.remove(failed)
+        order.append(failed)
+    else:
+        raise ValueError(f"No route found for drop {failed} within {max_steps} steps")
+
+    paths = [planned[i] for i in range(len(drops))]
+    length = max(len(p) for p in paths)
+    return [p + [p[-1]] * (length - len(p)) for p in paths]
+
+def plan_routes_in_thread(layout: Layout,
+                          drops: List[Dict],
+                          spacing: int=DEFAULT_SPACING,
+                          max_steps: int=DEFAULT_MAX_STEPS) -> List[List[Position]]:
+    """Run `plan_routes` on the gevent threadpool
+
+    Planning can take long enough to hold up serial I/O and event delivery
+    if it runs on the hub, so RPCs plan routes in a worker thread.
+    """
+    def plan():
+        # Return the error rather than raising it, so that the threadpool
+        # does not report an expected failure as an unhandled exception
+        try:
+            return plan_routes(layout, drops, spacing, max_steps), None
+        except ValueError as e:
+            return None, e
+    paths, error = gevent.get_hub().threadpool.apply(plan)
+    if error is not None:
+        raise error
+    return paths
+
+def route_drops(purpledrop,
+                drops: List[Dict],
+                spacing: int=DEFAULT_SPACING,
+                max_steps: int=DEFAULT_MAX_STEPS) -> RouteResult:
+    """Plan and execute routes for up to 5 drops
+
+    Args:
+        drops: A list of drop route objects, of the form shown below
+        spacing: Minimum number of empty electrodes kept between drops
+        max_steps: Maximum number of steps in a route
+
+    Returns:
+        A RouteResult, with the planned paths, and the list of
+        MoveDropResults for each step executed. Execution stops after the
+        first step in which any move does not complete.
+
+    A drop route object has the following fields:
+        "start": [x, y] grid location of the top-left corner of the drop
+        "target": [x, y] grid location to move the top-left corner to
+        "size": Optional. [width, height] of the drop. Default: [1, 1]
+        "timeout", "post_capture_time", "low_gain", "threshold": Optional.
+            Passed to move_drops for each move of the drop.
+
+    Example drop route object:
+
+        {
+            "start": [2, 3],
+            "target": [10, 3],
+            "size": [2, 2],
+        }
+    """
+    drops = schema.Schema([DropRouteSchema]).validate(drops)
+    if len(drops) > MAX_DROPS:
+        raise ValueError(f"Cannot route more than {MAX_DROPS} drops")
+
+    layout = Layout(purpledrop.get_board_definition()['layout'])
+    paths = plan_routes_in_thread(layout, drops, spacing, max_steps)
+
+    steps: List[List[MoveDropResult]] = []
+    success = True
+    for t in range(len(paths[0]) - 1):
+        moves = []
+        for d, path in zip(drops, paths):
+            if path[t] == path[t + 1]:
+                continue
+            move = {
+                'start_pins': _drop_pins(layout, path[t], d['size']),
+                'end_pins': _drop_pins(layout, path[t + 1], d['size']),
+            }
+            move.update({k: d[k] for k in MOVE_OPTIONS if k in d})
+            moves.append(move)
+        results = move_drops(purpledrop, moves)
+        steps.append(results)
+        if not all(r['success'] for r in results):
+            success = False
+            break
+
+    return RouteResult(success, [[list(p) for p in path] for path in paths], steps)
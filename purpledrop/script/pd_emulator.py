@@ -0,0 +1,48 @@
+import click
+import logging
+import time
+
+from purpledrop.emulator import PurpleDropEmulator
+
+@click.command()
+@click.option('-v', '--verbose', count=True, help='-v for INFO, -vv for DEBUG')
+@click.option('--version', 'software_version', help='Software version string to report', default='v0.6.0-emulator')
+@click.option('--capacitance', help='Comma separated list of pin:counts capacitance values', required=False)
+def main(verbose, software_version, capacitance):
+    """Emulates a purpledrop device on a pseudo-terminal
+
+    The path of the pty is printed once it is ready. Connect to it with
+    `pdserver --port <path>`, or with `SerialPurpleDropDevice`.
+
+    For example: `pdemulator --capacitance 5:1000,6:1000` to report a
+    capacitance of 1000 counts on pins 5 and 6.
+    """
+    if verbose == 0:
+        console_log_level = logging.WARNING
+    elif verbose == 1:
+        console_log_level = logging.INFO
+    else:
+        console_log_level = logging.DEBUG
+
+    logging.basicConfig(
+        format="%(asctime)s.%(msecs)03d %(levelname)s (%(name)s): %(message)s",
+        datefmt="%H:%M:%S",
+        level=console_log_level)
+
+    emulator = PurpleDropEmulator(software_version=software_version)
+    if capacitance is not None:
+        for item in capacitance.split(','):
+            pin, value = item.split(':')
+            emulator.set_electrode_capacitance([int(pin)], int(value))
+    emulator.start()
+    print(f"Emulating purpledrop on {emulator.port}")
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    emulator.close()
+    print(f"Received messages: {emulator.received}")
+
+if __name__ == '__main__':
+    main()
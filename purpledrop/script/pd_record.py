@@ -1,10 +1,28 @@
 import asyncio
 import click
 import struct
+import urllib.parse
 import websockets
 
+from purpledrop.event_policy import DEFAULT_EVENT_POLICIES
 import purpledrop.protobuf.messages_pb2 as messages_pb2
 
+# Capacitance block events duplicate the per-sample events, and playback can't
+# read them yet, so they are not recorded
+BLOCK_EVENT_TYPES = ('active_capacitance_block', 'group_capacitance_block')
+
+def full_rate_uri(uri):
+    """Add a query string to uri, requesting every per-sample event from the
+    server
+    """
+    parts = urllib.parse.urlsplit(uri)
+    query = urllib.parse.parse_qsl(parts.query)
+    query += [
+        (event_type, 'off' if event_type in BLOCK_EVENT_TYPES else 'full')
+        for event_type in DEFAULT_EVENT_POLICIES
+    ]
+    return urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(query)))
+
 async def record(uri, filepath, verbose):
     with open(filepath, 'wb') as f:
         async with websockets.connect(uri) as ws:
@@ -20,11 +38,15 @@ async def record(uri, filepath, verbose):
 
 @click.command()
 @click.option('--host', help="Websocket URI (e.g. 'ws://localhost:7001')", default='ws://localhost:7001')
+@click.option('--full-rate', is_flag=True, default=False,
+    help="Record every event, instead of the reduced rate sent to the UI")
 @click.option('-v', '--verbose', is_flag=True, default=False)
 @click.argument('filename', required=True)
-def main(host, filename, verbose):
+def main(host, filename, full_rate, verbose):
     """Records the event stream to a file.
     """
+    if full_rate:
+        host = full_rate_uri(host)
     asyncio.run(record(host, filename, verbose))
 
 if __name__ == '__main__':
@@ -8,8 +8,10 @@ import os
 
 from purpledrop.calibration import load_electrode_offset_calibration
 from purpledrop.electrode_board import load_board
-from purpledrop.purpledrop import PersistentPurpleDropDevice
+from purpledrop.purpledrop import PersistentPurpleDropDevice, SerialPurpleDropDevice
 from purpledrop.controller import PurpleDropController
+from purpledrop.descriptor_cache import DescriptorCache
+from purpledrop.device_manager import DeviceManager
 from purpledrop.playback import PlaybackPurpleDrop, index_log
 from purpledrop.simulated_purpledrop import SimulatedPurpleDropDevice
 from purpledrop.video_client import VideoClientProtobuf
@@ -21,7 +23,11 @@ import purpledrop.server as server
 @click.option('--ecal', 'electrode_calibration_file', help='Name of calibration or path to JSON file', required=False)
 @click.option('--replay', 'replay_file', help='Launch replay server instead of connecting to HW', required=False)
 @click.option('--sim', help='Simulate a purpledrop device', required=False)
-def main(verbose, board_file, replay_file, sim, electrode_calibration_file=None, ):
+@click.option('--port', help='Connect to the device on this serial port, instead of detecting it', required=False)
+@click.option('--capture', 'capture_file', help='Record raw serial data to a capture file', required=False)
+@click.option('--serial', 'serial_numbers', multiple=True, help='Connect to the device with this serial number. May be repeated.')
+@click.option('--all-devices', is_flag=True, help='Connect to every detected device')
+def main(verbose, board_file, replay_file, sim, port, capture_file, serial_numbers, all_devices, electrode_calibration_file=None, ):
     """Runs hardware gateway
 
     Will auto-connect to any detected purpledrop USB devices, and provides HTTP interfaces for control.
@@ -38,6 +44,19 @@ def main(verbose, board_file, replay_file, sim, electrode_calibration_file=None,
 
     For example: `pdserver --sim 5,10,120` to create a simulation starting with
     drops present on electrodes 5, 10, and 120.
+
+    The --port option connects to a specific serial port, without reconnecting
+    if it is lost. This can be used with the pty created by `pdemulator`.
+
+    The --capture option records all bytes sent to and received from the
+    device, with timestamps, for later analysis; see purpledrop.capture.
+
+    Several devices can be served at once, either by giving --serial more
+    than once, or with --all-devices. Each device's RPC methods are then
+    prefixed with its serial number (e.g. `<serial>.get_active_capacitance`),
+    and its events are served on the websocket path `/<serial>`. When used
+    with --capture, each device records to its own file, with the serial
+    number appended to the file name.
     """
     if verbose == 0:
         console_log_level = logging.WARNING
@@ -53,8 +72,9 @@ def main(verbose, board_file, replay_file, sim, electrode_calibration_file=None,
         datefmt="%H:%M:%S",
         level=console_log_level)
 
-    if replay_file is not None and sim is not None:
-        print("Cannot run both --replay and --sim")
+    multi_device = all_devices or len(serial_numbers) > 1
+    if len([x for x in (replay_file, sim, port) if x is not None]) + int(multi_device) > 1:
+        print("Only one of --replay, --sim, --port, or multiple devices may be used")
         sys.exit(-1)
 
     board = load_board(board_file)
@@ -73,6 +93,7 @@ def main(verbose, board_file, replay_file, sim, electrode_calibration_file=None,
                 print(f"Loading calibration based on {board_file} board name")
 
     video_client = None
+    device_manager = None
     if replay_file is not None:
         print(f"Computing seek index for {replay_file}...")
         index, end_time = index_log(replay_file)
@@ -85,15 +106,28 @@ def main(verbose, board_file, replay_file, sim, electrode_calibration_file=None,
         pd_dev = SimulatedPurpleDropDevice(board, drop_pins)
         pd_control = PurpleDropController(pd_dev, board, ecal)
         pd_dev.open()
+    elif port is not None:
+        print(f"Launching HW server on {port}...")
+        pd_dev = SerialPurpleDropDevice(capture_path=capture_file)
+        pd_control = PurpleDropController(pd_dev, board, ecal, DescriptorCache())
+        pd_dev.open(port)
+    elif multi_device:
+        print("Launching HW server for multiple devices...")
+        pd_control = None
+        device_manager = DeviceManager(
+            board, ecal, serial_numbers or None,
+            capture_path=capture_file,
+            descriptor_cache=DescriptorCache())
     else:
         print("Launching HW server...")
-        pd_dev = PersistentPurpleDropDevice()
-        pd_control = PurpleDropController(pd_dev, board, ecal)
+        serial_number = serial_numbers[0] if len(serial_numbers) > 0 else None
+        pd_dev = PersistentPurpleDropDevice(serial_number, capture_path=capture_file)
+        pd_control = PurpleDropController(pd_dev, board, ecal, DescriptorCache())
         # TODO: make video host configurable
         video_host = "localhost:5000"
         video_client = VideoClientProtobuf(video_host)
 
-    server.run_server(pd_control, video_client)
+    server.run_server(pd_control, video_client, device_manager)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
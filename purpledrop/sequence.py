@@ -0,0 +1,173 @@
+"""Timed execution of a sequence of electrode settings
+
+Rather than setting electrodes with one RPC call per step, a client can send
+a whole sequence of steps to `run_sequence`, which applies each step at its
+scheduled time and returns the timing and capacitance measured for each one.
+
+Steps are scheduled on the monotonic clock, relative to the start of the
+sequence, so that errors in the time at which one step is applied do not
+accumulate into later steps. The ACK for each step is collected while the step
+dwells, rather than before its dwell time starts. Capacitance is read from the
+controller's active capacitance history, which records the receive time of
+each sample.
+"""
+import gevent
+import schema
+import time
+from typing import Dict, List, Optional
+
+from purpledrop.messages import get_rx_time_ns
+from purpledrop.pin_mask import N_PINS
+
+# Interval at which new capacitance samples are checked during a step
+POLL_INTERVAL = 0.002
+
+ConditionSchema = schema.Or(
+    {'above': schema.Use(float), schema.Optional('required', default=False): bool},
+    {'below': schema.Use(float), schema.Optional('required', default=False): bool},
+)
+
+SequenceStepSchema = schema.Schema({
+    'pins': [schema.And(int, lambda p: 0 <= p < N_PINS)],
+    schema.Optional('group', default=0): schema.And(int, lambda g: g in (0, 1)),
+    schema.Optional('duty_cycle', default=255): schema.And(int, lambda d: 0 <= d <= 255),
+    'dwell': schema.And(schema.Use(float), lambda d: d >= 0),
+    schema.Optional('condition'): ConditionSchema,
+})
+
+class SequenceStepResult(dict):
+    """Inherits from dict for JSON serializability
+
+    Times are in seconds, relative to the start of the sequence
+    """
+    def __init__(self,
+                 scheduled_time: float,
+                 start_time: float,
+                 ack_time: Optional[float]=None,
+                 end_time: Optional[float]=None,
+                 capacitance: Optional[float]=None,
+                 condition_met: Optional[bool]=None):
+        dict.__init__(
+            self,
+            scheduled_time=scheduled_time,
+            start_time=start_time,
+            ack_time=ack_time,
+            end_time=end_time,
+            capacitance=capacitance,
+            condition_met=condition_met,
+        )
+
+class SequenceResult(dict):
+    """Inherits from dict for JSON serializability
+    """
+    def __init__(self, completed: bool, steps: List[SequenceStepResult]):
+        dict.__init__(self, completed=completed, steps=steps)
+
+def run_sequence(purpledrop, steps: List[Dict]) -> SequenceResult:
+    """Apply a sequence of drive group settings on a fixed schedule
+
+    Args:
+        steps: A list of step objects, of the form shown below
+
+    Returns:
+        A SequenceResult, with a SequenceStepResult for each step executed.
+        `completed` is False if the sequence stopped early, because a step
+        was not acknowledged or a required condition was not met.
+
+    A step object has the following fields:
+        "pins": List of pins to enable in the drive group
+        "group": Optional. Drive group to set, 0 or 1. Default: 0
+        "duty_cycle": Optional. Duty cycle for the group (0-255). Default: 255
+        "dwell": Time, in seconds, to hold the step before the next one
+        "condition": Optional. Ends the step as soon as the active
+            capacitance is "above" or "below" a value, in pF, with "dwell"
+            as the time limit. If "required" is true, the sequence stops if
+            the condition is not met.
+
+    Example step object:
+
+        {
+            "pins": [5, 6],
+            "dwell": 2.0,
+            "condition": {"above": 20.0, "required": True},
+        }
+    """
+    steps = schema.Schema([SequenceStepSchema]).validate(steps)
+
+    # Let any commands in flight complete, so that their ACKs cannot be taken
+    # for the ACK of the first step
+    purpledrop.purpledrop.command_window.wait()
+
+    history = purpledrop.active_history
+    results: List[SequenceStepResult] = []
+    completed = True
+    start_ns = time.monotonic_ns()
+    scheduled_ns = start_ns
+    pending = None
+
+    def seconds(t_ns):
+        return (t_ns - start_ns) * 1e-9
+
+    def collect_ack(pending):
+        ack = pending.get()
+        if ack is None:
+            return False
+        results[-1]['ack_time'] = seconds(get_rx_time_ns(ack))
+        return True
+
+    for step in steps:
+        delay = (scheduled_ns - time.monotonic_ns()) * 1e-9
+        if delay > 0:
+            gevent.sleep(delay)
+        if pending is not None:
+            acked = collect_ack(pending)
+            pending = None
+            if not acked:
+                completed = False
+                break
+
+        step_start_ns = time.monotonic_ns()
+        pending = purpledrop.send_electrode_pins(step['pins'], step['group'], step['duty_cycle'])
+        result = SequenceStepResult(seconds(scheduled_ns), seconds(step_start_ns))
+        results.append(result)
+
+        condition = step.get('condition')
+        if condition is not None:
+            result['condition_met'] = False
+        end_ns = scheduled_ns + int(step['dwell'] * 1e9)
+        # Samples measured before the step was applied are ignored
+        next_sample_ns = step_start_ns
+        while True:
+            now_ns = time.monotonic_ns()
+            samples = history.query(next_sample_ns, end_ns)
+            if len(samples.times) > 0:
+                capacitance = samples.calibrated[:, 0]
+                if condition is not None:
+                    if 'above' in condition:
+                        met = capacitance >= condition['above']
+                    else:
+                        met = capacitance <= condition['below']
+                    if met.any():
+                        i = int(met.argmax())
+                        result['capacitance'] = float(capacitance[i])
+                        result['condition_met'] = True
+                        # The next step is scheduled from when the condition
+                        # was detected
+                        end_ns = int(samples.times[i])
+                        break
+                result['capacitance'] = float(capacitance[-1])
+                next_sample_ns = int(samples.times[-1]) + 1
+            if now_ns >= end_ns:
+                break
+            gevent.sleep(min(POLL_INTERVAL, (end_ns - now_ns) * 1e-9))
+        result['end_time'] = seconds(end_ns)
+        scheduled_ns = end_ns
+
+        if condition is not None and condition['required'] and not result['condition_met']:
+            completed = False
+            break
+
+    if pending is not None and not collect_ack(pending):
+        completed = False
+
+    return SequenceResult(completed, results)
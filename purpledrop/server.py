@@ -7,9 +7,24 @@ controlling the PurpleDrop.
 The server consists of:
   - HTTP server proving a JSON-RPC endpoint, and serving the single-page app
   - A websocket which provides a stream of events for real-time state update
+
+When serving several devices through a DeviceManager, each device's RPC
+methods are prefixed with its serial number (e.g.
+`<serial_number>.get_active_capacitance`), and its events are sent only to
+websocket clients connected on the path `/<serial_number>`. Clients may
+connect before the device is found. Connections for a serial number which the
+manager does not accept are closed.
+
+Websocket clients can choose the rate at which they receive each type of
+event with the URL query string, e.g.
+`ws://localhost:7001/?active_capacitance=full&hv_regulator=max_hz:2`. See
+purpledrop.event_policy for the available policies. Event types which aren't
+specified use DEFAULT_EVENT_POLICIES.
 """
 
+import collections
 import gevent
+import gevent.event
 from gevent.pywsgi import WSGIServer
 from geventwebsocket import WebSocketServer, WebSocketApplication, Resource
 from geventwebsocket.exceptions import WebSocketError
@@ -17,9 +32,17 @@ from flask import Flask, Response, send_file
 from jsonrpc.backend.flask import api
 import logging
 import pkg_resources
+import struct
 import tarfile
+import urllib.parse
+
+from typing import Callable, Dict, Optional, Set
 
 from .controller import PurpleDropController
+from .device_manager import DeviceManager
+from .event_policy import DEFAULT_EVENT_POLICIES, EventPolicy
+from .event_publisher import EventEnvelope
+from .loop_monitor import LoopLagMonitor
 
 logger = logging.getLogger('purpledrop')
 
@@ -30,21 +53,113 @@ class Config(object):
     WS_PORT = 7001
     WEBROOT = None
 
+def parse_event_policies(query_string: str) -> Optional[Dict[str, EventPolicy]]:
+    """Get the event policies for a client from its URL query string
+
+    Each parameter names an event type, and its value is a policy, e.g.
+    `active_capacitance=full&group_capacitance=every:5`. They override the
+    defaults.
+
+    Returns: The policies, or None if none were given so that the source's
+    defaults apply
+    """
+    if not query_string:
+        return None
+    policies = dict(DEFAULT_EVENT_POLICIES)
+    for event_type, policy in urllib.parse.parse_qsl(query_string):
+        policies[event_type] = EventPolicy.parse(policy)
+    return policies
+
 class EventApp(WebSocketApplication):
-    """Empty Application. This server only broadcasts events
+    """Sends events to a websocket client
+
+    When a client connects, an event listener is registered with the event
+    source for its path, using the policies from its query string. Messages
+    from the client are ignored.
+
+    Each client has its own send queue and greenlet, so that a slow client
+    does not hold up event delivery to other clients. If a client falls
+    behind, the oldest of its queued messages are dropped.
     """
+    # Registers an event listener for a client on a path, and returns a
+    # function which unregisters it. Raises ValueError if the path has no
+    # event source. Set by run_server.
+    subscribe: Callable = staticmethod(lambda path, listener, policies: (lambda: None))
+    # Open clients, for broadcasting events which don't come from a source
+    clients: Set['EventApp'] = set()
+    # Maximum number of messages queued for each client
+    SEND_QUEUE_SIZE = 100
+
+    def on_open(self):
+        self.unsubscribe = None
+        self.dropped = 0
+        self.send_queue: collections.deque = collections.deque()
+        self.send_ready = gevent.event.Event()
+        self.sender = gevent.spawn(self.__send_loop)
+        self.clients.add(self)
+        try:
+            policies = parse_event_policies(self.ws.environ.get('QUERY_STRING', ''))
+            self.unsubscribe = self.subscribe(self.ws.path, self.send_event, policies)
+        except ValueError as e:
+            logger.warning(f"Closing websocket client: {e}")
+            # WebSocket.close does not send a status code, so the close frame
+            # is sent here, with 1008: policy violation
+            self.ws.send_frame(struct.pack('!H', 1008) + str(e).encode(), self.ws.OPCODE_CLOSE)
+            self.ws.close()
+            return
+
+    def on_close(self, reason=None):
+        self.clients.discard(self)
+        if getattr(self, 'sender', None) is not None:
+            self.sender.kill(block=False)
+            self.sender = None
+        if getattr(self, 'unsubscribe', None) is not None:
+            self.unsubscribe()
+            self.unsubscribe = None
+
     def on_message(self, msg):
         pass
 
+    def send_event(self, event):
+        self.send(event.SerializeToString())
+
+    def send(self, data):
+        """Queue a message to be sent to the client
+        """
+        if len(self.send_queue) >= self.SEND_QUEUE_SIZE:
+            self.send_queue.popleft()
+            self.dropped += 1
+        self.send_queue.append(data)
+        self.send_ready.set()
+
+    def __send_loop(self):
+        while True:
+            self.send_ready.wait()
+            self.send_ready.clear()
+            while len(self.send_queue) > 0:
+                try:
+                    self.ws.send(self.send_queue.popleft())
+                except WebSocketError:
+                    pass
+
 def extract_frontend_file(path):
     tarball_data = pkg_resources.resource_stream('purpledrop', 'frontend-dist.tar.gz')
     #print(f"Tarball is {len(tarball_data)}")
     tar = tarfile.open(fileobj=tarball_data)
     return tar.extractfile(path)
 
-def run_server(purpledrop: PurpleDropController, video_client=None):
-    lock = gevent.lock.Semaphore()
-
+def run_server(purpledrop: Optional[PurpleDropController], video_client=None, device_manager: Optional[DeviceManager]=None):
+    """Run the server until the process exits
+
+    Args:
+      purpledrop: Controller whose RPC methods are served without a prefix,
+        and whose events are sent to all clients. May be None when a
+        device_manager is provided.
+      video_client: Optional source of video events, which are sent to all
+        clients
+      device_manager: Optional manager whose devices are each served under
+        their serial number
+    """
     flask_app = Flask(__name__)
 
     def return_files(path):
@@ -65,42 +180,59 @@ def run_server(purpledrop: PurpleDropController, video_client=None):
         '/', view_func=return_files, methods=['GET'], defaults={'path':'index.html'})
 
     # Register RPC methods
-    for method_name in purpledrop.RPC_METHODS:
-        api.dispatcher.add_method(getattr(purpledrop, method_name))
+    if purpledrop is not None:
+        for method_name in purpledrop.RPC_METHODS:
+            api.dispatcher.add_method(getattr(purpledrop, method_name))
+
+    # Measure event loop responsiveness, and make it available for diagnostics
+    loop_monitor = LoopLagMonitor()
+    loop_monitor.start()
+    api.dispatcher.add_method(loop_monitor.stats, name='get_event_loop_lag')
 
     http_server = WSGIServer(('', 7000), flask_app, log=None)
     http_server.start()
 
-    ws_server = WebSocketServer(('', 7001), Resource([('^/', EventApp)]), debug=False)
+    def subscribe(path, listener, policies):
+        # Without a device manager, all clients get the events of the one
+        # controller
+        serial_number = path.strip('/')
+        if device_manager is None or serial_number == '':
+            if purpledrop is None:
+                return lambda: None
+            purpledrop.register_event_listener(listener, policies)
+            return lambda: purpledrop.unregister_event_listener(listener)
+        # Clients may connect before their device is found, and receive its
+        # events once it is
+        def handle_event(_serial_number, event):
+            listener(event)
+        device_manager.register_event_listener(handle_event, policies, serial_number)
+        return lambda: device_manager.unregister_event_listener(handle_event)
+
+    class ServerEventApp(EventApp):
+        clients: Set[EventApp] = set()
+    ServerEventApp.subscribe = staticmethod(subscribe)
+
+    ws_server = WebSocketServer(('', 7001), Resource([('^/', ServerEventApp)]), debug=False)
     ws_server.start()
 
-
-    def handle_event(event):
-        data = event.SerializeToString()
-        with lock:
-            for client in ws_server.clients.values():
-                try:
-                    client.ws.send(data)
-                except WebSocketError:
-                    pass
-
     def handle_video_update(image_event, transform_event):
-        for event in [transform_event, image_event]:
-            data = event.SerializeToString()
-            with lock:
-                clients = list(ws_server.clients.values())
-                for client in clients:
-                    try:
-                        client.ws.send(data)
-                    except WebSocketError:
-                        pass
+        # Each event is serialized once, for all clients
+        events = [EventEnvelope.wrap(transform_event), EventEnvelope.wrap(image_event)]
+        for client in list(ServerEventApp.clients):
+            for event in events:
+                client.send_event(event)
 
     if video_client is not None:
         video_client.register_callback(handle_video_update)
 
-    purpledrop.register_event_listener(handle_event)
+    if device_manager is not None:
+        def handle_device_added(serial_number, _controller):
+            for name, method in device_manager.rpc_methods(serial_number):
+                api.dispatcher.add_method(method, name=name)
+
+        api.dispatcher.add_method(device_manager.list_devices, name='list_devices')
+        device_manager.register_device_added_listener(handle_device_added)
+        device_manager.start()
 
     while(True):
         gevent.sleep(1.0)
-
-
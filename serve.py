@@ -3,6 +3,7 @@ from gevent import monkey
 monkey.patch_all()
 import sys
 import purpledrop.server as server
+from purpledrop.descriptor_cache import DescriptorCache
 from purpledrop.purpledrop import list_purpledrop_devices, PurpleDropDevice, PurpleDropController
 
 devices = list_purpledrop_devices()
@@ -15,6 +16,6 @@ elif len(devices) > 1:
         print(f"{d.device}: Serial {d.serial_number}")
     sys.exit(1)
 dev = PurpleDropDevice(devices[0].device)
-controller = PurpleDropController(dev)
+controller = PurpleDropController(dev, descriptor_cache=DescriptorCache())
 
 server.run_server(controller, "localhost:5000")
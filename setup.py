@@ -19,6 +19,7 @@ or via  a browser based UI""",
             'pdserver=purpledrop.script.pd_server:main',
             'pdrecord=purpledrop.script.pd_record:main',
             'pdlog=purpledrop.script.pd_log:main',
+            'pdemulator=purpledrop.script.pd_emulator:main',
         ],
     },
     install_requires=[
@@ -30,7 +31,7 @@ or via  a browser based UI""",
         'json-rpc~=1.13',
         'matplotlib',
         'opencv-python-headless',
-        'protobuf',
+        'protobuf>=3.20',
         'pyserial',
         'requests',
         'schema',
@@ -0,0 +1,24 @@
+"""Tests for the purpledrop.capacitance_block module
+"""
+import numpy as np
+
+from purpledrop.capacitance_block import CapacitanceBlockBuffer
+
+def test_flush_on_size():
+    buf = CapacitanceBlockBuffer(channels=2, max_samples=4, max_age=1.0)
+    assert buf.flush() is None
+    ready = [buf.append(1000 + i * 2000000, [i, -i], [10 * i, 0]) for i in range(4)]
+    assert ready == [False, False, False, True]
+    block = buf.flush()
+    assert block.start_ns == 1000
+    assert block.sample_interval == 0.002
+    assert np.array_equal(block.calibrated, [[0, 0], [1, -1], [2, -2], [3, -3]])
+    assert np.array_equal(block.raw[:, 0], [0, 10, 20, 30])
+    assert buf.flush() is None
+
+def test_flush_on_age():
+    buf = CapacitanceBlockBuffer(channels=1, max_samples=50, max_age=0.1)
+    assert not buf.append(0, 1.0, 1.0)
+    assert not buf.append(50000000, 1.0, 1.0)
+    assert buf.append(100000000, 1.0, 1.0)
+    assert buf.flush().calibrated.shape == (3, 1)
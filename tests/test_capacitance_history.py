@@ -0,0 +1,35 @@
+"""Tests for the purpledrop.capacitance_history module
+"""
+import numpy as np
+import pytest
+
+from purpledrop.capacitance_history import CapacitanceHistory
+
+def test_query_wrapped():
+    history = CapacitanceHistory(8)
+    assert len(history.query().times) == 0
+    for t in range(20):
+        history.append(t, float(t), float(t * 10))
+    # Only the last 8 samples are kept
+    assert len(history) == 8
+    assert history.query().times.tolist() == list(range(12, 20))
+    samples = history.query(13, 17)
+    assert samples.times.tolist() == [13, 14, 15, 16, 17]
+    assert samples.calibrated[:, 0].tolist() == [13, 14, 15, 16, 17]
+    assert samples.raw[:, 0].tolist() == [130, 140, 150, 160, 170]
+    # Decimation is continuous across the end of the arrays
+    assert history.query(decimate=3).times.tolist() == [12, 15, 18]
+    assert history.query(start_ns=100).times.tolist() == []
+    with pytest.raises(ValueError):
+        history.query(decimate=0)
+
+def test_channels():
+    history = CapacitanceHistory(4, channels=3)
+    history.append(0, np.array([1.0, 2.0, 3.0]), np.array([1, 2, 3]))
+    history.append(1, np.array([4.0, 5.0]), np.array([4, 5]))
+    history.append(2, np.array([6.0, 7.0, 8.0, 9.0]), np.array([6, 7, 8, 9]))
+    calibrated = history.query().calibrated
+    assert calibrated[0].tolist() == [1.0, 2.0, 3.0]
+    assert calibrated[1, :2].tolist() == [4.0, 5.0]
+    assert np.isnan(calibrated[1, 2])
+    assert calibrated[2].tolist() == [6.0, 7.0, 8.0]
@@ -0,0 +1,82 @@
+"""Tests for the purpledrop.capture module
+"""
+import gevent
+import os
+import pytest
+
+import purpledrop.messages as messages
+from purpledrop.capture import CapturePurpleDropDevice, CaptureWriter, RX, TX, \
+    decode_capture, read_capture
+from purpledrop.message_framer import serialize
+
+def make_ack(acked_id):
+    msg = messages.CommandAckMsg()
+    msg.acked_id = acked_id
+    return msg
+
+def test_capture_round_trip(tmp_path):
+    path = str(tmp_path / 'test.pdcap')
+    frames = b"".join(serialize(make_ack(i).to_bytes()) for i in range(10))
+    writer = CaptureWriter(path)
+    # Split a frame across records
+    writer.write_rx(frames[:7])
+    writer.write_tx(serialize(messages.ParameterDescriptorMsg().to_bytes()))
+    writer.write_rx(frames[7:])
+    writer.close()
+    # Appending continues the same file
+    writer = CaptureWriter(path)
+    writer.write_rx(serialize(make_ack(10).to_bytes()))
+    writer.close()
+
+    records = list(read_capture(path))
+    assert [r.direction for r in records] == [RX, TX, RX, RX]
+    timestamps = [r.timestamp_ns for r in records]
+    assert timestamps == sorted(timestamps)
+    assert [m.acked_id for m in decode_capture(path)] == list(range(11))
+    # Messages are stamped with the time of the record which completed them
+    assert [m.rx_time_ns for m in decode_capture(path)] == [timestamps[0]] + [timestamps[2]] * 9 + [timestamps[3]]
+    sent = list(decode_capture(path, TX))
+    assert len(sent) == 1 and isinstance(sent[0], messages.ParameterDescriptorMsg)
+
+def test_truncated_capture(tmp_path):
+    path = str(tmp_path / 'test.pdcap')
+    writer = CaptureWriter(path)
+    writer.write_rx(serialize(make_ack(1).to_bytes()))
+    writer.write_rx(serialize(make_ack(2).to_bytes()))
+    writer.close()
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) - 2)
+    assert [m.acked_id for m in decode_capture(path)] == [1]
+
+def test_replay_device(tmp_path):
+    path = str(tmp_path / 'test.pdcap')
+    writer = CaptureWriter(path)
+    writer.write_rx(b"".join(serialize(make_ack(i).to_bytes()) for i in range(100)))
+    writer.close()
+    dev = CapturePurpleDropDevice(path)
+    received = []
+    _listener = dev.get_async_listener(received.append, messages.CommandAckMsg)
+    assert dev.replay() == 100
+    assert [m.acked_id for m in received] == list(range(100))
+
+@pytest.mark.skipif(not hasattr(os, 'openpty'), reason="Requires a pseudo-terminal")
+def test_serial_device_capture(tmp_path):
+    from purpledrop.emulator import PurpleDropEmulator
+    from purpledrop.purpledrop import SerialPurpleDropDevice
+    path = str(tmp_path / 'test.pdcap')
+    emulator = PurpleDropEmulator()
+    emulator.start()
+    dev = SerialPurpleDropDevice(emulator.port, capture_path=path)
+    try:
+        msg = messages.ElectrodeEnableMsg()
+        assert dev.request(msg, messages.CommandAckMsg, msg.ID) is not None
+        gevent.sleep(0.1)
+    finally:
+        dev.stop_capture()
+        dev.close()
+        emulator.close()
+    sent = list(decode_capture(path, TX))
+    assert isinstance(sent[0], messages.ElectrodeEnableMsg)
+    received = list(decode_capture(path, RX))
+    assert any(isinstance(m, messages.CommandAckMsg) for m in received)
+    assert sum(isinstance(m, messages.ActiveCapacitanceMsg) for m in received) > 10
@@ -0,0 +1,201 @@
+"""Tests for the purpledrop.controller module
+"""
+import numpy as np
+import pytest
+
+import purpledrop.messages as messages
+from purpledrop.controller import CAPGAIN_HIGH, CAPGAIN_LOW, SAVE_PARAMETERS_IDX, PurpleDropController
+from purpledrop.electrode_board import load_board
+from purpledrop.exceptions import NoDeviceException
+from purpledrop.pin_mask import bytes_to_mask, pins_to_mask
+from purpledrop.purpledrop import PurpleDropDevice
+
+class FakeDevice(PurpleDropDevice):
+    """Device which acknowledges gain and electrode settings, and discards
+    other messages"""
+    def __init__(self):
+        super().__init__()
+        self.is_connected = False
+
+    def connected(self):
+        return self.is_connected
+
+    def send_message(self, msg):
+        if isinstance(msg, (messages.SetGainMsg, messages.ElectrodeEnableMsg)):
+            ack = messages.CommandAckMsg()
+            ack.acked_id = msg.ID
+            self.on_message_received(ack)
+
+@pytest.fixture
+def controller():
+    dev = FakeDevice()
+    controller = PurpleDropController(dev, load_board('misl_v4'))
+    hv = messages.HvRegulatorMsg()
+    hv.voltage = 100.0
+    dev.on_message_received(hv)
+    return controller
+
+def bulk_msg(measurements, start_index=0, group_scan=0):
+    msg = messages.BulkCapacitanceMsg()
+    msg.group_scan = group_scan
+    msg.start_index = start_index
+    msg.measurements = measurements
+    msg.count = len(measurements)
+    return msg
+
+def test_scan_calibration(controller):
+    dev = controller.purpledrop
+    dev.is_connected = True
+    controller.set_scan_gains([i < 8 for i in range(128)])
+    assert controller.get_scan_capacitance() == {'raw': [], 'calibrated': []}
+
+    dev.on_message_received(bulk_msg(list(range(16)), start_index=0))
+    dev.on_message_received(bulk_msg([1000] * 16, start_index=16))
+    scan = controller.get_scan_capacitance()
+    assert scan['raw'] == list(range(16)) + [1000] * 16
+    gains = np.array([CAPGAIN_LOW] * 8 + [CAPGAIN_HIGH] * 24)
+    assert np.allclose(scan['calibrated'], np.array(scan['raw']) * 1e12 / gains / 100.0)
+    assert controller.get_bulk_capacitance() == scan['calibrated']
+    assert controller.get_scan_gains()[7:9] == [True, False]
+
+def test_group_calibration(controller):
+    dev = controller.purpledrop
+    dev.is_connected = True
+    controller.set_capacitance_group([1, 2], 1, 1)
+    dev.on_message_received(bulk_msg([500, 500, 0, 0, 0], group_scan=1))
+    group = controller.get_group_capacitance()
+    assert group['raw'] == [500, 500, 0, 0, 0]
+    assert group['calibrated'][0] == pytest.approx(500 * 1e12 / CAPGAIN_HIGH / 100.0)
+    assert group['calibrated'][1] == pytest.approx(500 * 1e12 / CAPGAIN_LOW / 100.0)
+    assert all(type(x) is float for x in group['calibrated'])
+
+def test_event_policies(controller):
+    dev = controller.purpledrop
+    full, default = [], []
+    controller.register_event_listener(full.append, {'hv_regulator': 'full'})
+    controller.register_event_listener(default.append)
+    msg = messages.HvRegulatorMsg()
+    for i in range(20):
+        msg.voltage = float(i)
+        dev.on_message_received(msg)
+    # Events are delivered by the publisher greenlet
+    assert full == []
+    assert controller.flush_events()
+    assert [e.hv_regulator.voltage for e in full] == [float(i) for i in range(20)]
+    assert len(default) == 2
+    # Listeners share one envelope for each event, so it is serialized once
+    assert default[0] is full[9]
+
+    controller.unregister_event_listener(full.append)
+    dev.on_message_received(msg)
+    assert controller.flush_events()
+    assert len(full) == 20
+    # One event is built for all listeners which want it
+    assert controller.get_event_queue_stats()['published'] == 20
+
+def test_capacitance_blocks(controller):
+    dev = controller.purpledrop
+    events = []
+    default_events = []
+    controller.register_event_listener(events.append, {'active_capacitance_block': 'full'})
+    controller.register_event_listener(default_events.append)
+    msg = messages.ActiveCapacitanceMsg()
+    msg.baseline = 100
+    msg.settings = 0
+    for i in range(controller.active_block.max_samples):
+        msg.measurement = 100 + i
+        dev.on_message_received(msg)
+    assert controller.flush_events()
+    blocks = [e.active_capacitance_block for e in events if e.HasField('active_capacitance_block')]
+    assert len(blocks) == 1
+    assert blocks[0].channels == 1
+    assert blocks[0].raw == list(range(controller.active_block.max_samples))
+    assert len(blocks[0].calibrated) == controller.active_block.max_samples
+    # Listeners using the default policies don't receive blocks
+    assert {e.WhichOneof('msg') for e in default_events} == {'active_capacitance'}
+
+def test_capacitance_history(controller):
+    dev = controller.purpledrop
+    msg = messages.ActiveCapacitanceMsg()
+    msg.baseline = 100
+    for i in range(10):
+        msg.measurement = 100 + i
+        dev.on_message_received(msg)
+    dev.on_message_received(bulk_msg([1, 2, 3, 4, 5], group_scan=1))
+
+    history = controller.get_capacitance_history('active', -10.0)
+    assert history['raw'] == list(range(10))
+    assert history['calibrated'][-1] == pytest.approx(controller.get_active_capacitance())
+    assert history['time'] == sorted(history['time'])
+    assert controller.get_capacitance_history('active', decimate=5)['raw'] == [0, 5]
+    assert controller.get_capacitance_history('active', end=-5.0)['raw'] == []
+    assert controller.get_capacitance_history('group')['raw'] == [[1, 2, 3, 4, 5]]
+    assert controller.get_capacitance_history('scan')['raw'] == []
+    with pytest.raises(ValueError):
+        controller.get_capacitance_history('bogus')
+
+def test_electrode_state_event(controller):
+    dev = controller.purpledrop
+    dev.is_connected = True
+    events = []
+    controller.register_event_listener(events.append)
+    controller.set_capacitance_group([3, 100], 2, 1)
+    controller.flush_events()
+    state = events[-1].electrode_state
+    assert bytes_to_mask(state.scan_groups[2].mask) == pins_to_mask([3, 100])
+    assert state.scan_groups[2].setting == 1
+    # The bool list is kept for clients which don't read the mask
+    assert [i for i, e in enumerate(state.scan_groups[2].electrodes) if e] == [3, 100]
+    assert controller.pin_state.scan_groups[2].pins == [3, 100]
+    assert controller.get_electrode_pins()['scan_groups'][2]['pins'][100] is True
+
+def test_parameter_cache_requires_device(controller):
+    dev = controller.purpledrop
+    controller.parameter_values = {1: 5.0}
+    with pytest.raises(NoDeviceException):
+        controller.get_parameter(1)
+    with pytest.raises(NoDeviceException):
+        controller.get_parameters([1])
+    dev.is_connected = True
+    assert controller.get_parameter(1) == 5.0
+    dev.on_disconnected()
+    assert controller.parameter_values == {}
+
+def test_set_parameters_saves_last(controller):
+    dev = controller.purpledrop
+    dev.is_connected = True
+    received = []
+    def send_message(msg):
+        if isinstance(msg, messages.SetParameterMsg):
+            received.append(msg.param_idx())
+            # Lose the first write of parameter 1, so that it is resent
+            if received.count(1) > 1 or msg.param_idx() != 1:
+                dev.on_message_received(msg)
+    dev.send_message = send_message
+    controller.set_parameters({SAVE_PARAMETERS_IDX: 0, 1: 5, 2: 7})
+    assert received[-1] == SAVE_PARAMETERS_IDX
+    assert received.count(SAVE_PARAMETERS_IDX) == 1
+    assert controller.parameter_values == {1: 5, 2: 7}
+
+def test_send_electrode_pins_update_error(controller):
+    dev = controller.purpledrop
+    dev.is_connected = True
+    controller.set_electrode_pins([4, 5])
+    assert controller.pin_state.drive_groups[0].pins == [4, 5]
+    # A failure updating the local state still completes the result
+    controller.pin_state.drive_groups = None
+    ack = controller.send_electrode_pins([6]).get(timeout=1.0)
+    assert ack.acked_id == messages.ElectrodeEnableMsg.ID
+
+def test_collector_item_shape(controller):
+    dev = controller.purpledrop
+    with controller.group_capacitance_collector() as plain, \
+            controller.group_capacitance_collector(with_rx_time=True) as timed:
+        dev.on_message_received(bulk_msg([500, 0, 0, 0, 0], group_scan=1))
+        raw, _calibrated = plain.next(timeout=1.0)
+        assert raw == [500, 0, 0, 0, 0]
+        _raw, _calibrated, rx_time_ns = timed.next(timeout=1.0)
+        assert isinstance(rx_time_ns, int)
+
+def test_default_descriptor_cache_in_memory(controller):
+    assert controller.descriptor_cache.path is None
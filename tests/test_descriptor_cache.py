@@ -0,0 +1,40 @@
+"""Tests for the purpledrop.descriptor_cache module
+"""
+from purpledrop.descriptor_cache import DescriptorCache
+
+DESCRIPTORS = [
+    {'id': 0, 'name': 'HV Target', 'description': 'High voltage target', 'type': 'float'},
+    {'id': 1, 'name': 'Sample Delay', 'description': 'Sample delay', 'type': 'int'},
+]
+
+def test_persistence(tmp_path):
+    path = str(tmp_path / 'cache' / 'descriptors.json')
+    cache = DescriptorCache(path)
+    assert cache.get('SN1', 'v0.6.0') is None
+    cache.put('SN1', 'v0.6.0', DESCRIPTORS)
+    assert cache.get('SN1', 'v0.6.0') == DESCRIPTORS
+    # Entries are specific to the software version
+    assert cache.get('SN1', 'v0.6.1') is None
+
+    # Entries written by another cache sharing the file are kept
+    other = DescriptorCache(path)
+    other.put('SN2', 'v0.6.0', DESCRIPTORS[:1])
+    cache.put('SN3', 'v0.6.0', DESCRIPTORS)
+    reloaded = DescriptorCache(path)
+    assert reloaded.get('SN1', 'v0.6.0') == DESCRIPTORS
+    assert reloaded.get('SN2', 'v0.6.0') == DESCRIPTORS[:1]
+
+def test_unidentified_devices_not_cached():
+    cache = DescriptorCache(persistent=False)
+    cache.put(None, 'v0.6.0', DESCRIPTORS)
+    cache.put('SN1', None, DESCRIPTORS)
+    assert cache.get(None, 'v0.6.0') is None
+    assert cache.get('SN1', None) is None
+
+def test_unreadable_file(tmp_path):
+    path = tmp_path / 'descriptors.json'
+    path.write_text('{not json')
+    cache = DescriptorCache(str(path))
+    assert cache.get('SN1', 'v0.6.0') is None
+    cache.put('SN1', 'v0.6.0', DESCRIPTORS)
+    assert DescriptorCache(str(path)).get('SN1', 'v0.6.0') == DESCRIPTORS
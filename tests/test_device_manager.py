@@ -0,0 +1,97 @@
+"""Tests for the purpledrop.device_manager module
+"""
+import pytest
+from types import SimpleNamespace
+
+import purpledrop.device_manager as device_manager
+import purpledrop.messages as messages
+from purpledrop.device_manager import DeviceManager, capture_path_for_device
+from purpledrop.electrode_board import load_board
+from purpledrop.purpledrop import PurpleDropDevice
+
+class FakeDevice(PurpleDropDevice):
+    """Stands in for PersistentPurpleDropDevice, without connecting"""
+    def __init__(self, serial_number=None, capture_path=None):
+        super().__init__()
+        self.serial_number = serial_number
+        self.capture_path = capture_path
+
+    def connected(self):
+        return False
+
+    def send_message(self, msg):
+        pass
+
+def make_manager(monkeypatch, detected, **kwargs):
+    infos = [SimpleNamespace(serial_number=s, device=f"/dev/fake{i}") for i, s in enumerate(detected)]
+    monkeypatch.setattr(device_manager, 'list_purpledrop_devices', lambda: infos)
+    monkeypatch.setattr(device_manager, 'PersistentPurpleDropDevice', FakeDevice)
+    return DeviceManager(load_board('misl_v4'), **kwargs)
+
+def test_scan(monkeypatch):
+    manager = make_manager(monkeypatch, ['A', 'B', None])
+    added = []
+    manager.register_device_added_listener(lambda sn, ctl: added.append(sn))
+    assert manager.scan() == ['A', 'B']
+    # Known devices are not added twice
+    assert manager.scan() == []
+    assert added == ['A', 'B']
+    assert manager.list_devices() == [
+        {'serial_number': 'A', 'connected': False},
+        {'serial_number': 'B', 'connected': False},
+    ]
+    assert manager.get_controller('A').purpledrop is manager.devices['A']
+
+def test_serial_number_filter(monkeypatch):
+    manager = make_manager(monkeypatch, ['A', 'B'], serial_numbers=['B', 'C'], capture_path='/tmp/x.pdcap')
+    manager.start()
+    manager.stop()
+    # Named devices are added whether or not they are detected
+    assert sorted(manager.controllers) == ['B', 'C']
+    assert manager.devices['C'].serial_number == 'C'
+    assert manager.devices['C'].capture_path == '/tmp/x-C.pdcap'
+
+def test_rpc_namespace_and_events(monkeypatch):
+    manager = make_manager(monkeypatch, ['A', 'B'])
+    manager.scan()
+    methods = dict(manager.rpc_methods('B'))
+    assert methods['B.get_hv_supply_voltage'] == manager.controllers['B'].get_hv_supply_voltage
+
+    events = []
+    full_rate = []
+    manager.register_event_listener(lambda sn, event: events.append((sn, event)))
+    def on_full_rate(sn, event):
+        full_rate.append(sn)
+    manager.register_event_listener(on_full_rate, {'hv_regulator': 'full'})
+    msg = messages.HvRegulatorMsg()
+    msg.voltage = 100.0
+    # By default, HV events are reduced to one in ten messages
+    for _ in range(10):
+        manager.devices['B'].on_message_received(msg)
+    manager.controllers['B'].flush_events()
+    assert [(sn, e.WhichOneof('msg')) for sn, e in events] == [('B', 'hv_regulator')]
+    assert full_rate == ['B'] * 10
+    manager.unregister_event_listener(on_full_rate)
+    manager.devices['B'].on_message_received(msg)
+    manager.controllers['B'].flush_events()
+    assert len(full_rate) == 10
+    assert manager.controllers['A'].get_hv_supply_voltage() == 0.0
+
+def test_device_event_listener(monkeypatch):
+    manager = make_manager(monkeypatch, ['A', 'B'], serial_numbers=['A', 'B'])
+    with pytest.raises(ValueError):
+        manager.register_event_listener(lambda sn, event: None, serial_number='C')
+    events = []
+    # Registered before the device is added
+    manager.register_event_listener(lambda sn, event: events.append(sn), {'hv_regulator': 'full'}, 'B')
+    manager.scan()
+    msg = messages.HvRegulatorMsg()
+    msg.voltage = 100.0
+    for sn in ['A', 'B']:
+        manager.devices[sn].on_message_received(msg)
+        manager.controllers[sn].flush_events()
+    assert events == ['B']
+
+def test_capture_path_for_device():
+    assert capture_path_for_device('session.pdcap', '123') == 'session-123.pdcap'
+    assert capture_path_for_device('/data/session', '123') == '/data/session-123'
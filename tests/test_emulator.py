@@ -0,0 +1,220 @@
+"""Tests for the purpledrop.emulator module, driven through SerialPurpleDropDevice
+"""
+import gevent
+import os
+import pytest
+import schema
+from types import SimpleNamespace
+
+import purpledrop.messages as messages
+import purpledrop.purpledrop
+from purpledrop.controller import PurpleDropController
+from purpledrop.descriptor_cache import DescriptorCache
+from purpledrop.electrode_board import load_board
+from purpledrop.emulator import PurpleDropEmulator
+from purpledrop.messages import predict_request_size
+from purpledrop.purpledrop import PersistentPurpleDropDevice, SerialPurpleDropDevice
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'openpty'), reason="Requires a pseudo-terminal")
+
+@pytest.fixture
+def emulated_device():
+    emulator = PurpleDropEmulator(software_version='v0.6.0-test')
+    emulator.start()
+    dev = SerialPurpleDropDevice(emulator.port)
+    yield emulator, dev
+    dev.close()
+    emulator.close()
+
+def collect(dev, msg_types, duration):
+    received = []
+    listener = dev.get_async_listener(received.append, msg_types)
+    gevent.sleep(duration)
+    dev.unregister_listener(listener.get_msg_handler())
+    return received
+
+def test_predict_request_size():
+    gains = messages.SetGainMsg()
+    gains.gains = [1] * 128
+    for msg in [gains, messages.ParameterDescriptorMsg(), messages.SetPwmMsg(),
+                messages.FeedbackCommandMsg(), messages.ElectrodeEnableMsg()]:
+        buf = msg.to_bytes()
+        assert predict_request_size(buf[:2]) in (0, len(buf))
+        assert predict_request_size(buf) == len(buf)
+
+def test_streams_measurements(emulated_device):
+    emulator, dev = emulated_device
+    emulator.set_electrode_capacitance(range(16, 32), 100)
+    received = collect(dev, [messages.ActiveCapacitanceMsg, messages.BulkCapacitanceMsg], 0.3)
+    active = [m for m in received if isinstance(m, messages.ActiveCapacitanceMsg)]
+    scan = [m for m in received if isinstance(m, messages.BulkCapacitanceMsg) and m.group_scan == 0]
+    # Nominally 150 samples and 3 full scans
+    assert len(active) > 75
+    assert len(scan) >= 2 * 128 // emulator.SCAN_CHUNK_SIZE
+    # The first scan may have started before the capacitance was set
+    chunk = [m for m in scan if m.start_index == 16][-1]
+    assert list(chunk.measurements) == [100] * 16
+
+def test_requests(emulated_device):
+    emulator, dev = emulated_device
+    version_request = messages.DataBlobMsg()
+    version_request.blob_id = messages.DataBlobMsg.SOFTWARE_VERSION_ID
+    resp = dev.request(version_request, messages.DataBlobMsg, version_request.blob_id)
+    assert resp.payload == b'v0.6.0-test'
+
+    msg = messages.ElectrodeEnableMsg()
+    msg.values[0] = 0x7e
+    ack = dev.request(msg, messages.CommandAckMsg, msg.ID)
+    assert ack is not None
+    assert emulator.drive_pins() == [1, 2, 3, 4, 5, 6]
+
+    param = messages.SetParameterMsg()
+    param.set_param_idx(1)
+    param.set_param_value_int(1234)
+    param.set_write_flag(True)
+    resp = dev.request(param, messages.SetParameterMsg, 1)
+    assert resp.param_value_int() == 1234
+
+def test_parameter_descriptors(emulated_device):
+    emulator, dev = emulated_device
+    received = []
+    listener = dev.get_async_listener(received.append, messages.ParameterDescriptorMsg)
+    dev.send_message(messages.ParameterDescriptorMsg())
+    for _ in range(50):
+        if len(received) == len(emulator.parameters):
+            break
+        gevent.sleep(0.01)
+    dev.unregister_listener(listener.get_msg_handler())
+    assert [m.param_id for m in received] == sorted(emulator.parameters)
+    assert received[0].name == emulator.parameters[0]['name']
+    assert received[0].value == emulator.parameters[0]['value']
+
+def wait_for(condition, timeout=1.0):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return True
+        gevent.sleep(0.01)
+    return condition()
+
+def test_persistent_device_reconnects(monkeypatch):
+    emulators = [PurpleDropEmulator()]
+    emulators[0].start()
+    ports = [SimpleNamespace(serial_number='SN1', device=emulators[0].port)]
+    monkeypatch.setattr(purpledrop.purpledrop, 'list_purpledrop_devices', lambda: ports)
+    dev = PersistentPurpleDropDevice('SN1')
+    try:
+        assert wait_for(dev.connected)
+        assert dev.get_connection_stats()['reconnects'] == 0
+        # Unplug, and re-attach on a different port
+        emulators[0].close()
+        assert wait_for(lambda: not dev.connected())
+        emulators.append(PurpleDropEmulator())
+        emulators[1].start()
+        ports[0] = SimpleNamespace(serial_number='SN1', device=emulators[1].port)
+        assert wait_for(dev.connected)
+        stats = dev.get_connection_stats()
+        assert stats['reconnects'] == 1
+        assert stats['last_reconnect_latency'] < 1.0
+    finally:
+        dev.stop()
+        emulators[-1].close()
+
+def test_persistent_device_callback_error(monkeypatch):
+    emulator = PurpleDropEmulator()
+    emulator.start()
+    ports = [SimpleNamespace(serial_number='SN1', device=emulator.port)]
+    monkeypatch.setattr(purpledrop.purpledrop, 'list_purpledrop_devices', lambda: ports)
+    dev = PersistentPurpleDropDevice('SN1')
+    calls = []
+    def on_connected():
+        calls.append(1)
+        raise TimeoutError("No response")
+    dev.register_connected_callback(on_connected)
+    try:
+        assert wait_for(dev.connected)
+        gevent.sleep(0.3)
+        # The device stays open, and is not opened again
+        assert dev.connected()
+        assert dev.connected_serial_number() == 'SN1'
+        assert calls == [1]
+    finally:
+        dev.stop()
+        emulator.close()
+
+def test_handshake_uses_descriptor_cache(monkeypatch):
+    emulator = PurpleDropEmulator(software_version='v0.6.0-test')
+    emulator.start()
+    ports = [SimpleNamespace(serial_number='SN1', device=emulator.port)]
+    monkeypatch.setattr(purpledrop.purpledrop, 'list_purpledrop_devices', lambda: ports)
+    cache = DescriptorCache(persistent=False)
+    board = load_board('misl_v4')
+    try:
+        for _ in range(2):
+            dev = PersistentPurpleDropDevice('SN1')
+            controller = PurpleDropController(dev, board, descriptor_cache=cache)
+            assert wait_for(lambda: len(controller.parameter_list) == len(emulator.parameters))
+            dev.stop()
+        # Descriptors were only read from the device the first time
+        assert emulator.received['ParameterDescriptorMsg'] == 1
+        assert cache.get('SN1', 'v0.6.0-test') == controller.parameter_list
+    finally:
+        emulator.close()
+
+def test_parameter_cache(emulated_device):
+    emulator, dev = emulated_device
+    controller = PurpleDropController(dev, load_board('misl_v4'), descriptor_cache=DescriptorCache(persistent=False))
+    expected = {p['id']: p['value'] for p in emulator.parameters.values()}
+    # Values are seeded from the descriptors
+    assert controller.get_parameters() == expected
+    assert emulator.received.get('SetParameterMsg', 0) == 0
+
+    float_id = next(p['id'] for p in emulator.parameters.values() if p['type'] == 'float')
+    int_id = next(p['id'] for p in emulator.parameters.values() if p['type'] == 'int')
+    controller.set_parameters({str(float_id): 1.5, int_id: 7})
+    assert emulator.parameters[float_id]['value'] == 1.5
+    assert emulator.parameters[int_id]['value'] == 7
+    assert controller.get_parameter(float_id) == 1.5
+    assert controller.get_parameters([int_id]) == {int_id: 7}
+    assert emulator.received['SetParameterMsg'] == 2
+
+    emulator.parameters[int_id]['value'] = 8
+    assert controller.get_parameters([int_id], refresh=True) == {int_id: 8}
+    assert emulator.received['SetParameterMsg'] == 3
+
+def test_run_sequence(emulated_device):
+    emulator, dev = emulated_device
+    controller = PurpleDropController(dev, load_board('misl_v4'), descriptor_cache=DescriptorCache(persistent=False))
+    emulator.set_electrode_capacitance([10], 1000)
+    result = controller.run_sequence([
+        {'pins': [1], 'dwell': 0.05},
+        {'pins': [10], 'dwell': 2.0, 'condition': {'above': 20.0}},
+        {'pins': [], 'group': 1, 'duty_cycle': 100, 'dwell': 0.02},
+    ])
+    assert result['completed']
+    first, second, third = result['steps']
+    assert first['scheduled_time'] == 0.0
+    assert first['capacitance'] == pytest.approx(0.0)
+    assert all(s['ack_time'] >= s['start_time'] for s in result['steps'])
+    # The condition ends the step early, and the next step follows at once
+    assert second['condition_met']
+    assert second['capacitance'] > 20.0
+    assert second['end_time'] < 1.0
+    assert third['scheduled_time'] == second['end_time']
+    assert third['end_time'] == pytest.approx(second['end_time'] + 0.02)
+    assert emulator.drive_pins() == [10]
+    assert emulator.duty_cycles == [255, 100]
+    assert controller.pin_state.drive_groups[0].pins == [10]
+
+    # Invalid steps are rejected before any step is applied
+    sent = emulator.received['ElectrodeEnableMsg']
+    with pytest.raises(schema.SchemaError):
+        controller.run_sequence([{'pins': [1], 'dwell': 0.05}, {'pins': [128], 'dwell': 0.05}])
+    assert emulator.received['ElectrodeEnableMsg'] == sent
+
+    result = controller.run_sequence([
+        {'pins': [1], 'dwell': 0.05, 'condition': {'below': -1.0, 'required': True}},
+        {'pins': [2], 'dwell': 0.05},
+    ])
+    assert not result['completed']
+    assert len(result['steps']) == 1
+    assert result['steps'][0]['condition_met'] is False
@@ -0,0 +1,40 @@
+"""Tests for the purpledrop.event_policy module
+"""
+import gevent
+import pytest
+
+from purpledrop.event_policy import DEFAULT_EVENT_POLICIES, EventPolicy, EventSubscription
+
+def test_parse():
+    assert EventPolicy.parse('full') == EventPolicy.full()
+    assert EventPolicy.parse('every:10') == EventPolicy.every(10)
+    assert EventPolicy.parse('max_hz:2.5') == EventPolicy.max_hz(2.5)
+    assert EventPolicy.parse('latest') == EventPolicy.latest()
+    assert EventPolicy.parse('off') == EventPolicy.off()
+    for bad in ['', 'every', 'every:0', 'max_hz:x', 'full:1', 'sometimes']:
+        with pytest.raises(ValueError):
+            EventPolicy.parse(bad)
+
+def test_wants():
+    sub = EventSubscription(None, {'a': 'every:3', 'b': EventPolicy.max_hz(10)})
+    assert [sub.wants('a') for _ in range(6)] == [False, False, True, False, False, True]
+    assert [sub.wants('b', t) for t in [0.0, 0.05, 0.1, 0.15, 0.2]] == [True, False, True, False, True]
+    # Types without a policy are delivered at full rate
+    assert sub.wants('c')
+
+def test_default_policies():
+    sub = EventSubscription(None)
+    assert sub.policies == DEFAULT_EVENT_POLICIES
+    assert sum(sub.wants('active_capacitance') for _ in range(100)) == 10
+    assert all(sub.wants('scan_capacitance') for _ in range(10))
+
+def test_latest():
+    received = []
+    sub = EventSubscription(received.append, {'a': 'latest'})
+    for i in range(5):
+        assert sub.wants('a')
+        sub.deliver('a', i)
+    # Events coalesce until the delivery greenlet runs
+    assert received == []
+    gevent.sleep(0)
+    assert received == [4]
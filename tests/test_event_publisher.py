@@ -0,0 +1,58 @@
+"""Tests for the purpledrop.event_publisher module
+"""
+import purpledrop.protobuf.messages_pb2 as messages_pb2
+from purpledrop.event_policy import EventSubscription
+from purpledrop.event_publisher import EventEnvelope, EventPublisher
+
+def test_publish():
+    received = []
+    sub = EventSubscription(received.append, {})
+    publisher = EventPublisher(capacity=3)
+    publisher.start()
+    for i in range(5):
+        publisher.publish('a', lambda i=i: i, [sub])
+    # Nothing is built or delivered in the caller
+    assert received == []
+    assert publisher.flush(1.0)
+    # The oldest events were dropped when the queue filled
+    assert [e.event for e in received] == [2, 3, 4]
+    stats = publisher.stats()
+    assert stats['published'] == 3
+    assert stats['dropped'] == 2
+    assert stats['high_water'] == 3
+    assert stats['depth'] == 0
+    publisher.stop()
+
+def test_listener_error():
+    def fail(event):
+        raise RuntimeError("listener failed")
+    received = []
+    subs = [EventSubscription(fail, {}), EventSubscription(received.append, {})]
+    publisher = EventPublisher()
+    publisher.start()
+    publisher.publish('a', lambda: 1, subs)
+    assert publisher.flush(1.0)
+    # Later listeners still receive the event
+    assert [e.event for e in received] == [1]
+    publisher.stop()
+
+def test_envelope():
+    builds = []
+    def build():
+        builds.append(1)
+        event = messages_pb2.PurpleDropEvent()
+        event.hv_regulator.voltage = 100.0
+        return event
+    envelope = EventEnvelope('hv_regulator', build)
+    assert envelope.WhichOneof('msg') == 'hv_regulator'
+    assert builds == []
+    # Attributes are forwarded to the event
+    assert envelope.hv_regulator.voltage == 100.0
+    data = envelope.SerializeToString()
+    assert envelope.SerializeToString() is data
+    assert builds == [1]
+    assert data == build().SerializeToString()
+
+    wrapped = EventEnvelope.wrap(build())
+    assert wrapped.WhichOneof('msg') == 'hv_regulator'
+    assert wrapped.HasField('hv_regulator')
@@ -0,0 +1,93 @@
+"""Tests for the purpledrop.message_framer module
+"""
+import random
+import struct
+
+from purpledrop.message_framer import MessageFramer, calc_checksum, serialize
+from purpledrop.messages import PurpleDropMessage
+
+def reference_checksum(data):
+    a = 0
+    b = 0
+    for x in data:
+        a = (a + x) % 256
+        b = (b + a) % 256
+    return (a, b)
+
+def make_stream(n_msgs, seed=0):
+    """Generate a stream of framed device messages, some of which contain
+    bytes that must be escaped
+    """
+    rng = random.Random(seed)
+    msgs = []
+    for _ in range(n_msgs):
+        kind = rng.randrange(3)
+        if kind == 0:
+            msg = struct.pack("<BHHB", 3, rng.randrange(4096), rng.choice([0x7d7e, 0x7e7d, 1000]), 0)
+        elif kind == 1:
+            count = rng.randrange(1, 20)
+            msg = struct.pack("<BBBB", 2, 1, 0, count) + bytes(rng.randrange(256) for _ in range(count * 2))
+        else:
+            msg = struct.pack("<BB", 4, rng.choice([0, 0x7d, 0x7e]))
+        msgs.append(msg)
+    stream = b"".join(serialize(m) for m in msgs)
+    return msgs, stream
+
+def parse_bytewise(stream):
+    framer = MessageFramer(PurpleDropMessage.predictSize)
+    out = []
+    for b in stream:
+        msg = framer.parse_byte(b)
+        if msg is not None:
+            out.append(msg)
+    return out
+
+def parse_chunked(stream, chunk_size):
+    framer = MessageFramer(PurpleDropMessage.predictSize)
+    out = []
+    for i in range(0, len(stream), chunk_size):
+        out.extend(framer.parse(stream[i:i+chunk_size]))
+    return out
+
+def test_checksum():
+    rng = random.Random(1)
+    for n in [0, 1, 2, 17, 300]:
+        data = bytes(rng.randrange(256) for _ in range(n))
+        assert calc_checksum(data) == reference_checksum(data)
+
+def test_parse_whole_buffer():
+    msgs, stream = make_stream(200)
+    framer = MessageFramer(PurpleDropMessage.predictSize)
+    assert list(framer.parse(stream)) == msgs
+
+def test_parse_chunk_boundaries():
+    """Splitting the stream anywhere, including between an escape and the
+    escaped byte, must not change the result
+    """
+    msgs, stream = make_stream(50)
+    for chunk_size in [1, 2, 3, 7, 64, 1000]:
+        assert parse_chunked(stream, chunk_size) == msgs
+
+def test_parse_matches_bytewise_on_corrupt_stream():
+    _msgs, stream = make_stream(300, seed=2)
+    rng = random.Random(3)
+    corrupt = bytearray(stream)
+    for _ in range(100):
+        corrupt[rng.randrange(len(corrupt))] = rng.randrange(256)
+    corrupt = bytes(corrupt)
+    expected = parse_bytewise(corrupt)
+    assert len(expected) > 0
+    for chunk_size in [1, 5, 64, 4096]:
+        assert parse_chunked(corrupt, chunk_size) == expected
+
+def test_checksum_mismatch_dropped():
+    good = serialize(bytes([4, 1]))
+    bad = bytearray(serialize(bytes([4, 2])))
+    bad[-1] ^= 0xff
+    framer = MessageFramer(PurpleDropMessage.predictSize)
+    assert list(framer.parse(bytes(bad) + good)) == [bytes([4, 1])]
+
+def test_invalid_id_dropped():
+    framer = MessageFramer(PurpleDropMessage.predictSize)
+    stream = bytes([0x7e, 0xf0, 1, 2, 3]) + serialize(bytes([4, 1]))
+    assert list(framer.parse(stream)) == [bytes([4, 1])]
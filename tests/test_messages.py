@@ -0,0 +1,135 @@
+"""Tests for the purpledrop.messages module
+"""
+import pytest
+import struct
+
+import purpledrop.messages as messages
+from purpledrop.messages import PurpleDropMessage
+
+def test_find_class_by_id():
+    assert PurpleDropMessage.findClassById(3) is messages.ActiveCapacitanceMsg
+    assert PurpleDropMessage.findClassById(2) is messages.BulkCapacitanceMsg
+    assert PurpleDropMessage.findClassById(200) is None
+
+def test_predict_size():
+    # Fixed size
+    assert PurpleDropMessage.predictSize(bytes([3])) == 6
+    assert PurpleDropMessage.predictSize(bytes([4])) == 2
+    # Variable size
+    assert PurpleDropMessage.predictSize(bytes([2, 0, 0])) == 0
+    assert PurpleDropMessage.predictSize(bytes([2, 0, 0, 5])) == 14
+    # Unknown, or never received by the driver
+    assert PurpleDropMessage.predictSize(bytes([200])) == -1
+    assert PurpleDropMessage.predictSize(bytes([messages.SetPwmMsg.ID])) == -1
+    assert PurpleDropMessage.predictSize(bytes([])) == 0
+
+def test_duplicate_id_rejected():
+    with pytest.raises(ValueError):
+        class DuplicateMsg(PurpleDropMessage):
+            ID = messages.ActiveCapacitanceMsg.ID
+
+def test_from_bytes():
+    msg = PurpleDropMessage.from_bytes(struct.pack("<BHHB", 3, 10, 20, 1))
+    assert isinstance(msg, messages.ActiveCapacitanceMsg)
+    assert (msg.baseline, msg.measurement, msg.settings) == (10, 20, 1)
+    assert PurpleDropMessage.from_bytes(bytes([200, 0])) is None
+
+def test_rx_time():
+    msg = PurpleDropMessage.from_bytes(struct.pack("<BHHB", 3, 10, 20, 1), 12345)
+    assert msg.rx_time_ns == 12345
+    # Messages which weren't received have no receive time
+    assert messages.ActiveCapacitanceMsg().rx_time_ns is None
+    with pytest.raises(AttributeError):
+        msg.not_an_attribute
+
+def test_bulk_capacitance_decode():
+    buf = struct.pack("<BBBB3H", 2, 1, 4, 3, 100, 0x7e7d, 4095)
+    msg = messages.BulkCapacitanceMsg(buf)
+    assert (msg.group_scan, msg.start_index, msg.count) == (1, 4, 3)
+    assert list(msg.measurements) == [100, 0x7e7d, 4095]
+
+def test_temperature_round_trip():
+    msg = messages.TemperatureMsg()
+    msg.measurements = [2500, -150]
+    decoded = messages.TemperatureMsg(msg.to_bytes())
+    assert list(decoded.measurements) == [2500, -150]
+
+def test_hv_regulator_round_trip():
+    msg = messages.HvRegulatorMsg()
+    msg.voltage = 120.5
+    msg.v_target_out = -3
+    decoded = messages.HvRegulatorMsg(msg.to_bytes())
+    assert decoded.voltage == 120.5
+    assert decoded.v_target_out == -3
+
+def test_parameter_descriptor_decode():
+    strings = b"name\x00a description\x00float"
+    buf = struct.pack("<BHIfHH", 12, len(strings), 7, 1.5, 2, 10) + strings
+    assert PurpleDropMessage.predictSize(buf[:3]) == len(buf)
+    msg = messages.ParameterDescriptorMsg(buf)
+    assert msg.param_id == 7
+    assert msg.value == 1.5
+    assert (msg.sequence_number, msg.sequence_total) == (2, 10)
+    assert (msg.name, msg.description, msg.type) == ("name", "a description", "float")
+
+def test_data_blob_round_trip():
+    msg = messages.DataBlobMsg()
+    msg.blob_id = messages.DataBlobMsg.SOFTWARE_VERSION_ID
+    msg.chunk_index = 300
+    msg.payload = b"v0.6.1"
+    msg.payload_size = len(msg.payload)
+    decoded = messages.DataBlobMsg(msg.to_bytes())
+    assert (decoded.blob_id, decoded.chunk_index, decoded.payload) == (0, 300, b"v0.6.1")
+
+def test_electrode_enable_encode():
+    msg = messages.ElectrodeEnableMsg()
+    msg.group_id = 1
+    msg.setting = 200
+    msg.values[2] = 0x81
+    data = msg.to_bytes()
+    assert len(data) == messages.ElectrodeEnableMsg.SIZE
+    assert data[:3] == bytes([0, 1, 200])
+    assert data[5] == 0x81
+
+def test_parameter_descriptor_round_trip():
+    assert messages.ParameterDescriptorMsg().to_bytes() == bytes([12])
+    msg = messages.ParameterDescriptorMsg()
+    msg.param_id = 3
+    msg.value = -20
+    msg.sequence_number = 1
+    msg.sequence_total = 4
+    msg.name, msg.description, msg.type = "name", "description", "int"
+    buf = msg.to_bytes()
+    assert PurpleDropMessage.predictSize(buf[:3]) == len(buf)
+    decoded = messages.ParameterDescriptorMsg(buf)
+    assert (decoded.param_id, decoded.value, decoded.name, decoded.type) == (3, -20, "name", "int")
+
+@pytest.mark.parametrize("msg_class,fields", [
+    (messages.ActiveCapacitanceMsg, {'baseline': 10, 'measurement': 0x7e7d, 'settings': 1}),
+    (messages.CommandAckMsg, {'acked_id': 11}),
+    (messages.DutyCycleUpdatedMsg, {'duty_cycle_A': 128, 'duty_cycle_B': 255}),
+    (messages.ElectrodeEnableMsg, {'group_id': 102, 'setting': 1, 'values': list(range(16))}),
+    (messages.SetGainMsg, {'gains': [1, 0, 0, 1, 1]}),
+    (messages.FeedbackCommandMsg, {'target': 1.5, 'mode': 2, 'input_groups_p_mask': 1,
+                                   'input_groups_n_mask': 2, 'baseline': 100}),
+])
+def test_round_trip(msg_class, fields):
+    msg = msg_class()
+    for name, value in fields.items():
+        setattr(msg, name, value)
+    decoded = msg_class(msg.to_bytes())
+    for name, value in fields.items():
+        assert getattr(decoded, name) == value
+
+def test_bulk_capacitance_round_trip():
+    msg = messages.BulkCapacitanceMsg()
+    msg.start_index = 16
+    msg.measurements = [1, 2, 0x7e7e]
+    decoded = messages.BulkCapacitanceMsg(msg.to_bytes())
+    assert (decoded.group_scan, decoded.start_index, decoded.count) == (0, 16, 3)
+    assert list(decoded.measurements) == [1, 2, 0x7e7e]
+
+def test_messages_use_slots():
+    msg = messages.ActiveCapacitanceMsg()
+    with pytest.raises(AttributeError):
+        msg.not_a_field = 1
@@ -0,0 +1,23 @@
+"""Tests for the purpledrop.pin_mask module
+"""
+import pytest
+
+from purpledrop.pin_mask import bytes_to_mask, mask_to_bools, mask_to_bytes, mask_to_pins, pins_to_mask
+
+def test_round_trip():
+    pins = [0, 7, 8, 63, 64, 127]
+    mask = pins_to_mask(pins)
+    assert mask_to_pins(mask) == pins
+    data = mask_to_bytes(mask)
+    assert len(data) == 16
+    assert data[0] == 0x81 and data[1] == 0x01 and data[15] == 0x80
+    assert bytes_to_mask(data) == mask
+    bools = mask_to_bools(mask)
+    assert [i for i, b in enumerate(bools) if b] == pins
+    assert mask_to_pins(0) == []
+
+def test_invalid_pin():
+    with pytest.raises(ValueError):
+        pins_to_mask([128])
+    with pytest.raises(ValueError):
+        pins_to_mask([-1])
@@ -0,0 +1,294 @@
+"""Tests for the purpledrop.purpledrop module
+"""
+import gevent
+import gevent.socket
+import os
+import pytest
+import queue
+import serial
+import struct
+import threading
+import time
+
+import purpledrop.messages as messages
+from purpledrop.message_framer import serialize
+from purpledrop.purpledrop import CommandWindow, ListenerQueue, PendingRequests, PurpleDropDevice, \
+    PurpleDropRxThread, PurpleDropTxThread, SerialPurpleDropDevice
+
+requires_pty = pytest.mark.skipif(not hasattr(os, 'openpty'), reason="Requires a pseudo-terminal")
+
+class LoopbackDevice(PurpleDropDevice):
+    """Device which delivers sent messages back to its listeners"""
+    def send_message(self, msg):
+        self.on_message_received(msg)
+
+    def connected(self):
+        return True
+
+def make_ack(acked_id):
+    msg = messages.CommandAckMsg()
+    msg.acked_id = acked_id
+    return msg
+
+@pytest.fixture
+def pty_port():
+    master_fd, slave_fd = os.openpty()
+    port = serial.Serial(os.ttyname(slave_fd), timeout=0.01)
+    yield master_fd, port
+    port.close()
+    os.close(master_fd)
+    os.close(slave_fd)
+
+@requires_pty
+def test_rx_thread_receives_messages(pty_port):
+    master_fd, port = pty_port
+    received = []
+    rx_thread = PurpleDropRxThread(port, callback=received.append)
+    rx_thread.start()
+
+    frames = [serialize(struct.pack("<BHHB", 3, i, 0x7e00 + i, 0)) for i in range(100)]
+    start_ns = time.monotonic_ns()
+    os.write(master_fd, b"".join(frames))
+    for _ in range(100):
+        if len(received) == 100:
+            break
+        gevent.sleep(0.01)
+    rx_thread.stop()
+    rx_thread.join()
+
+    assert len(received) == 100
+    assert all(isinstance(m, messages.ActiveCapacitanceMsg) for m in received)
+    assert [m.measurement for m in received] == [0x7e00 + i for i in range(100)]
+    # Messages are stamped with the time they were read
+    assert all(start_ns <= m.rx_time_ns <= time.monotonic_ns() for m in received)
+
+@requires_pty
+def test_rx_thread_does_not_block_hub(pty_port):
+    """While waiting for data, other greenlets must keep running"""
+    _master_fd, port = pty_port
+    rx_thread = PurpleDropRxThread(port)
+    rx_thread.start()
+
+    ticks = []
+    def ticker():
+        for _ in range(10):
+            gevent.sleep(0.005)
+            ticks.append(1)
+    gevent.spawn(ticker).join(timeout=1.0)
+    rx_thread.stop()
+    rx_thread.join()
+    assert len(ticks) == 10
+
+def read_exactly(fd, size):
+    data = b""
+    while len(data) < size:
+        gevent.socket.wait_read(fd, 1.0)
+        data += os.read(fd, size - len(data))
+    return data
+
+def make_gpio(pin):
+    msg = messages.GpioControlMsg()
+    msg.pin = pin
+    return msg
+
+@requires_pty
+def test_tx_thread_coalesces_writes(pty_port):
+    master_fd, port = pty_port
+    tx_thread = PurpleDropTxThread(port)
+    tx_thread.start()
+
+    # Pins 0x7d and 0x7e require escaping
+    frames = [serialize(make_gpio(0x70 + i).to_bytes()) for i in range(20)]
+    results = [tx_thread.send(f) for f in frames]
+    results.append(tx_thread.send(b"".join(frames), count=len(frames)))
+    for r in results:
+        r.get(timeout=1.0)
+    expected = b"".join(frames) * 2
+    assert read_exactly(master_fd, len(expected)) == expected
+    assert tx_thread.writes == 1
+    assert tx_thread.messages == 40
+
+    tx_thread.stop()
+    tx_thread.join()
+    with pytest.raises(serial.SerialException):
+        tx_thread.send(frames[0]).get(timeout=1.0)
+
+@requires_pty
+def test_serial_device_send_many():
+    master_fd, slave_fd = os.openpty()
+    dev = SerialPurpleDropDevice(os.ttyname(slave_fd))
+    try:
+        msgs = [make_gpio(i) for i in range(5)]
+        dev.send_message(msgs[0])
+        dev.send_many(msgs[1:]).get(timeout=1.0)
+        expected = b"".join(serialize(m.to_bytes()) for m in msgs)
+        assert read_exactly(master_fd, len(expected)) == expected
+        stats = dev.get_tx_stats()
+        assert stats['messages'] == 5
+        assert stats['writes'] == 1
+    finally:
+        dev.close()
+        os.close(master_fd)
+        os.close(slave_fd)
+
+def test_send_many_default():
+    dev = LoopbackDevice()
+    with dev.get_sync_listener(messages.CommandAckMsg) as listener:
+        dev.send_many([make_ack(i) for i in range(3)])
+        assert [listener.next(0).acked_id for _ in range(3)] == [0, 1, 2]
+
+def test_listener_type_dispatch():
+    dev = LoopbackDevice()
+    with dev.get_sync_listener(messages.CommandAckMsg, predicate=lambda m: m.acked_id == 2) as acks, \
+            dev.get_sync_listener(lambda m: isinstance(m, messages.DutyCycleUpdatedMsg)) as duty_cycles, \
+            dev.get_sync_listener([messages.CommandAckMsg, messages.DutyCycleUpdatedMsg]) as both:
+        dev.send_message(make_ack(1))
+        dev.send_message(make_ack(2))
+        dev.send_message(messages.DutyCycleUpdatedMsg())
+        assert acks.next(0).acked_id == 2
+        assert acks.empty()
+        assert isinstance(duty_cycles.next(0), messages.DutyCycleUpdatedMsg)
+        assert duty_cycles.empty()
+        assert [both.next(0).__class__ for _ in range(3)] == \
+            [messages.CommandAckMsg, messages.CommandAckMsg, messages.DutyCycleUpdatedMsg]
+    assert dev.typed_listeners == {}
+    assert dev.listeners == ()
+
+def test_unregister_during_dispatch():
+    """A listener may unregister itself, or others, from its callback"""
+    dev = LoopbackDevice()
+    received = []
+    def first(msg):
+        received.append('first')
+        dev.unregister_listener(first)
+        dev.unregister_listener(second)
+    def second(msg):
+        received.append('second')
+    dev.register_listener(first, [messages.CommandAckMsg])
+    dev.register_listener(second, [messages.CommandAckMsg])
+    dev.send_message(make_ack(0))
+    dev.send_message(make_ack(0))
+    assert received == ['first', 'second']
+
+@pytest.mark.parametrize("policy,expected,dropped", [
+    ('drop_oldest', [2, 3, 4], 2),
+    ('drop_newest', [0, 1, 2], 2),
+    ('coalesce_latest', [4], 4),
+])
+def test_sync_listener_overflow(policy, expected, dropped):
+    dev = LoopbackDevice()
+    with dev.get_sync_listener(messages.CommandAckMsg, capacity=3, policy=policy, name='test') as listener:
+        for i in range(5):
+            dev.send_message(make_ack(i))
+        stats = dev.get_listener_stats()
+        assert len(stats) == 1
+        assert stats[0]['name'] == 'test'
+        assert stats[0]['dropped'] == dropped
+        assert stats[0]['received'] == 5
+        assert stats[0]['high_water'] == len(expected)
+        received = []
+        while not listener.empty():
+            received.append(listener.next(0).acked_id)
+        assert received == expected
+    assert dev.get_listener_stats() == []
+
+def test_sync_listener_invalid_policy():
+    dev = LoopbackDevice()
+    with pytest.raises(ValueError):
+        dev.get_sync_listener(messages.CommandAckMsg, policy='sometimes')
+
+def test_listener_queue_block_policy():
+    fifo = ListenerQueue(1, ListenerQueue.BLOCK)
+    fifo.offer(1)
+    producer = threading.Thread(target=fifo.offer, args=(2,))
+    producer.start()
+    producer.join(timeout=0.05)
+    # Producer must wait for space
+    assert producer.is_alive()
+    assert fifo.get(timeout=1.0) == 1
+    producer.join(timeout=1.0)
+    assert not producer.is_alive()
+    assert fifo.get(timeout=1.0) == 2
+    assert fifo.stats()['dropped'] == 0
+    with pytest.raises(queue.Empty):
+        fifo.get(timeout=0)
+
+class AckingDevice(LoopbackDevice):
+    """Device which acks each sent message, after ignoring the first `drop`"""
+    def __init__(self, drop=0):
+        super().__init__()
+        self.drop = drop
+        self.sent = 0
+
+    def send_message(self, msg):
+        self.sent += 1
+        if self.sent > self.drop:
+            self.on_message_received(make_ack(msg.ID))
+
+def test_pending_requests_match_by_key():
+    table = PendingRequests()
+    first = table.add(messages.CommandAckMsg, 1)
+    second = table.add(messages.CommandAckMsg, 2)
+    any_ack = table.add(messages.CommandAckMsg)
+    assert table.dispatch(make_ack(2))
+    assert table.dispatch(make_ack(3))
+    assert table.dispatch(make_ack(1))
+    assert not table.dispatch(make_ack(1))
+    assert first.get(timeout=0).acked_id == 1
+    assert second.get(timeout=0).acked_id == 2
+    assert any_ack.get(timeout=0).acked_id == 3
+    assert len(table) == 0
+
+def test_request_retries():
+    dev = AckingDevice(drop=2)
+    ack = dev.request(make_gpio(0), messages.CommandAckMsg, messages.GpioControlMsg.ID, timeout=0.01)
+    assert ack.acked_id == messages.GpioControlMsg.ID
+    assert dev.sent == 3
+    assert len(dev.pending_requests) == 0
+
+def test_request_timeout():
+    dev = AckingDevice(drop=10)
+    ack = dev.request(make_gpio(0), messages.CommandAckMsg, messages.GpioControlMsg.ID, timeout=0.01, tries=2)
+    assert ack is None
+    assert dev.sent == 2
+    assert len(dev.pending_requests) == 0
+
+class DelayedAckDevice(LoopbackDevice):
+    """Device which acks messages after a delay, and records the number of
+    commands in flight when each is sent"""
+    def __init__(self, delay, ack=True):
+        super().__init__()
+        self.delay = delay
+        self.ack = ack
+        self.in_flight = []
+
+    def send_message(self, msg):
+        self.in_flight.append(self.command_window.in_flight)
+        if self.ack:
+            gevent.spawn_later(self.delay, self.on_message_received, make_ack(msg.ID))
+
+def test_command_window_acked():
+    dev = DelayedAckDevice(0.005)
+    window = dev.command_window
+    results = [window.send(make_gpio(i), ack_key=messages.GpioControlMsg.ID) for i in range(10)]
+    assert window.wait(timeout=1.0)
+    assert max(dev.in_flight) <= window.size
+    assert all(r.get(timeout=0).acked_id == messages.GpioControlMsg.ID for r in results)
+    assert window.in_flight == 0
+
+def test_command_window_lease():
+    dev = DelayedAckDevice(0, ack=False)
+    window = dev.command_window = CommandWindow(dev, size=2, lease=0.005)
+    for i in range(6):
+        window.send(make_gpio(i))
+    assert window.in_flight == 2
+    assert window.wait(timeout=1.0)
+    assert max(dev.in_flight) == 2
+
+def test_command_window_missing_ack():
+    dev = DelayedAckDevice(0, ack=False)
+    window = CommandWindow(dev, ack_timeout=0.005, tries=1)
+    result = window.send(make_gpio(0), ack_key=messages.GpioControlMsg.ID)
+    assert window.wait(timeout=1.0)
+    assert result.get(timeout=0) is None
+    assert window.in_flight == 0
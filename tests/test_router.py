@@ -0,0 +1,90 @@
+"""Tests for the purpledrop.router module
+"""
+import pytest
+
+import purpledrop.router as router
+from purpledrop.electrode_board import load_board
+from purpledrop.router import plan_routes, route_drops
+
+def layout():
+    return load_board('misl_v4').layout
+
+def gap(a, a_size, b, b_size):
+    return max(
+        max(b[0] - (a[0] + a_size[0]), a[0] - (b[0] + b_size[0])),
+        max(b[1] - (a[1] + a_size[1]), a[1] - (b[1] + b_size[1])),
+    )
+
+def test_single_drop_shortest_path():
+    paths = plan_routes(layout(), [{'start': [0, 2], 'target': [13, 7]}])
+    assert len(paths[0]) == 13 + 5 + 1
+    assert paths[0][0] == (0, 2) and paths[0][-1] == (13, 7)
+
+def test_crossing_drops_keep_spacing():
+    drops = [
+        {'start': [0, 2], 'target': [13, 7]},
+        {'start': [12, 2], 'target': [0, 6], 'size': [2, 2]},
+        {'start': [6, 10], 'target': [6, 0]},
+    ]
+    paths = plan_routes(layout(), drops)
+    assert len(set(len(p) for p in paths)) == 1
+    for d, path in zip(drops, paths):
+        assert path[0] == tuple(d['start']) and path[-1] == tuple(d['target'])
+        for a, b in zip(path, path[1:]):
+            assert abs(a[0] - b[0]) + abs(a[1] - b[1]) <= 1
+    for i in range(len(drops)):
+        for j in range(i + 1, len(drops)):
+            size_i = drops[i].get('size', [1, 1])
+            size_j = drops[j].get('size', [1, 1])
+            for t in range(len(paths[0])):
+                assert gap(paths[i][t], size_i, paths[j][t], size_j) >= 1
+                if t > 0:
+                    assert gap(paths[i][t], size_i, paths[j][t - 1], size_j) >= 1
+                    assert gap(paths[i][t - 1], size_i, paths[j][t], size_j) >= 1
+
+def test_invalid_routes():
+    with pytest.raises(ValueError):
+        plan_routes(layout(), [{'start': [0, 0], 'target': [6, 0]}])
+    with pytest.raises(ValueError):
+        plan_routes(layout(), [{'start': [0, 2], 'target': [6, 0]}, {'start': [1, 3], 'target': [6, 10]}])
+    # The target is next to a drop which stays where it is
+    with pytest.raises(ValueError):
+        plan_routes(layout(), [{'start': [6, 1], 'target': [6, 1]},
+                               {'start': [6, 10], 'target': [7, 0]}], max_steps=30)
+
+def test_route_drops_batches_moves(monkeypatch):
+    board = load_board('misl_v4')
+    calls = []
+    def fake_move_drops(purpledrop, moves):
+        calls.append(moves)
+        return [{'success': True} for _ in moves]
+    monkeypatch.setattr(router, 'move_drops', fake_move_drops)
+    class FakeController(object):
+        def get_board_definition(self):
+            return board.as_dict()
+    drops = [
+        {'start': [0, 2], 'target': [3, 2], 'low_gain': True},
+        {'start': [13, 7], 'target': [11, 7]},
+    ]
+    result = route_drops(FakeController(), drops)
+    assert result['success']
+    # Both drops move together until the second one arrives
+    assert len(calls) == 3
+    assert [len(m) for m in calls] == [2, 2, 1]
+    pin = board.layout.grid_location_to_pin
+    assert calls[0][0] == {'start_pins': [pin(0, 2)], 'end_pins': [pin(1, 2)], 'low_gain': True}
+    assert calls[0][1] == {'start_pins': [pin(13, 7)], 'end_pins': [pin(12, 7)]}
+    assert result['paths'][1][-1] == [11, 7]
+
+def test_target_at_other_start():
+    """A drop whose target is another drop's start is planned after it"""
+    paths = plan_routes(layout(), [{'start': [2, 4], 'target': [9, 4]}, {'start': [9, 4], 'target': [12, 4]}])
+    assert paths[0][-1] == (9, 4) and paths[1][-1] == (12, 4)
+    for a, b in zip(paths[0], paths[1]):
+        assert gap(a, [1, 1], b, [1, 1]) >= 1
+
+def test_plan_in_thread():
+    drops = [{'start': [0, 2], 'target': [13, 7]}]
+    assert router.plan_routes_in_thread(layout(), drops) == plan_routes(layout(), drops)
+    with pytest.raises(ValueError):
+        router.plan_routes_in_thread(layout(), [{'start': [0, 2], 'target': [6, 0]}, {'start': [1, 3], 'target': [6, 10]}])